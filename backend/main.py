@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 import map_setup # Setup paths
@@ -5,13 +6,29 @@ import map_setup # Setup paths
 from src.energy_client import EntsoeClient
 from src.visualizer import EnergyVisualizer
 from src.analyzer import GridAnalyzer
+from response_cache import ResponseCache
+from metrics import Metrics, profile
 
 def main():
+    parser = argparse.ArgumentParser(description="GridWatch automation backend")
+    parser.add_argument('--metrics', metavar='PATH', help="write Prometheus text metrics to PATH")
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'], help="profile this run")
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    with profile(args.profile):
+        run(metrics)
+    for line in metrics.summary():
+        print(f"   ⏱️ {line}")
+    if args.metrics:
+        metrics.write_prometheus(args.metrics)
+
+def run(metrics):
     print("--- ⚡️ GridWatch Automation Backend ⚡️ ---")
     
     # 1. Initialize Client
     try:
-        client = EntsoeClient()
+        client = EntsoeClient(cache=ResponseCache())
         print("✅ Client initialized with API Key.")
     except Exception as e:
         print(f"❌ {e}")
@@ -20,20 +37,26 @@ def main():
     # 2. Fetch Data (Example: SE3 Stockholm)
     zone = 'SE3'
     print(f"\n📡 Fetching data for {zone}...")
-    df_prices = client.fetch_day_ahead_prices(client.ZONES[zone])
+    with metrics.stage('fetch', zone):
+        df_prices = client.fetch_day_ahead_prices(client.ZONES[zone])
     
     if df_prices is not None and not df_prices.empty:
         curr_price = df_prices.iloc[-1]['value']  # Mock 'current', ideally find current hour
         print(f"   Current Price Estimation: {curr_price} €/MWh")
         
         # 3. Analyze: Find Cheapest Hours
-        cheapest = GridAnalyzer.get_cheapest_hours(df_prices)
+        with metrics.stage('analyze', zone):
+            cheapest = GridAnalyzer.get_cheapest_hours(df_prices)
+            window = GridAnalyzer.get_cheapest_window(df_prices, hours=3)
+            alerts = GridAnalyzer.check_alerts(df_prices, price_threshold=80.0, zone=zone) # Lower threshold for demo
         print("\n📉 Smart Control - Cheapest Hours:")
         for h in cheapest:
             print(f"   🕒 {h['time']} : {h['price']} €")
 
+        if window:
+            print(f"   🔌 Best 3h block: {window['start']}-{window['end']} (avg {window['avg_price']:.2f} €)")
+
         # 4. Monitor: Check Alerts
-        alerts = GridAnalyzer.check_alerts(df_prices, price_threshold=80.0) # Lower threshold for demo
         if alerts:
             print("\n🚨 ALERTS:")
             for a in alerts:
@@ -52,12 +75,14 @@ def main():
         }
         
         viz = EnergyVisualizer('src/assets/data/zones.json')
-        m = viz.create_price_map(mock_map_data)
         out_path = "backend/notebooks/price_map.html"
-        m.save(out_path)
+        with metrics.stage('render'):
+            m = viz.create_price_map(mock_map_data)
+            m.save(out_path)
         print(f"✅ Map saved to: {out_path}")
         
     else:
+        metrics.inc('gridwatch_api_errors_total', zone=zone, document='A44')
         print("⚠️ No data received.")
 
 if __name__ == "__main__":
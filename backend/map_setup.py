@@ -1,3 +1,5 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Shared modules (ENTSO-E parser etc.) live in backend_rebuild/src
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend_rebuild', 'src'))
@@ -1,6 +1,9 @@
 import pandas as pd
 from datetime import datetime
 
+from alert_rules import AlertEngine
+from price_analytics import cheapest_window, steps_per_hour, top_n
+
 class GridAnalyzer:
     
     @staticmethod
@@ -12,30 +15,52 @@ class GridAnalyzer:
         if df.empty:
             return []
             
-        sorted_df = df.sort_values(by='value', ascending=True)
-        cheapest = sorted_df.head(n)
+        idx = top_n(df['value'].to_numpy(), n)
+        times = df['time'].to_numpy()[idx].astype('datetime64[m]')
+        prices = df['value'].to_numpy()[idx]
         
-        result = []
-        for _, row in cheapest.iterrows():
-            result.append({
-                'time': row['time'].strftime("%H:%M"),
-                'price': row['value']
-            })
+        # Keep price order (cheapest first)
+        return [
+            {'time': str(t)[11:16], 'price': float(p)}
+            for t, p in zip(times, prices)
+        ]
+
+    @staticmethod
+    def get_cheapest_window(df, hours=3):
+        """
+        Finds the cheapest contiguous block of `hours` (for loads that must run
+        uninterrupted). Returns {'start', 'end', 'avg_price'} or None.
+        """
+        if df.empty:
+            return None
             
-        # Sort by time for display? or price? Let's keep price order (cheapest first)
-        return result
+        times = df['time'].to_numpy().astype('datetime64[m]')
+        k = int(hours * steps_per_hour(times))
+        if k > len(df):
+            return None
+        start, avg = cheapest_window(df['value'].to_numpy(), k)
+        start = int(start)
+        if start < 0:
+            return None
+        step = times[1] - times[0] if len(times) > 1 else 60
+        return {
+            'start': str(times[start])[11:16],
+            'end': str(times[start + k - 1] + step)[11:16],
+            'avg_price': float(avg)
+        }
 
     @staticmethod
-    def check_alerts(df, price_threshold=100.0, generation_drop_threshold=0.2):
+    def check_alerts(df, price_threshold=100.0, generation_drop_threshold=0.2, rules=None, zone=''):
         """
-        Simple monitoring logic.
+        Monitoring messages from the declarative alert rules (see
+        alert_rules); by default one high-price rule at price_threshold.
+        zone only picks the per-zone overrides of custom rules.
         """
-        alerts = []
-        
-        # Check High Prices
-        high_prices = df[df['value'] > price_threshold]
-        if not high_prices.empty:
-            max_p = high_prices['value'].max()
-            alerts.append(f"⚠️ HIGH PRICE ALERT: {max_p} €/MWh detected!")
+        if df.empty:
+            return []
 
-        return alerts
+        if rules is None:
+            rules = [{'name': 'high_price', 'above': price_threshold, 'cooldown_minutes': 720,
+                      'message': "⚠️ HIGH PRICE ALERT: {value:.2f} €/MWh detected!"}]
+        alerts = AlertEngine(rules).evaluate_series({zone: (df['time'].to_numpy(), df['value'].to_numpy())})
+        return [a.message for a in alerts]
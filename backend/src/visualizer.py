@@ -1,6 +1,9 @@
 import pandas as pd
 import folium
-import json
+import branca.colormap as cm
+
+from geometry import load_zone_geometry
+from time_map import TimeSlider, color_domain, encode_frames
 
 class EnergyVisualizer:
     def __init__(self, geojson_path):
@@ -14,9 +17,8 @@ class EnergyVisualizer:
         # Center on Sweden
         m = folium.Map(location=[62.0, 15.0], zoom_start=5, tiles='CartoDB dark_matter')
 
-        # Load GeoJSON
-        with open(self.geojson_path, 'r') as f:
-            geo_data = json.load(f)
+        # Only the priced zones, simplified for the zoom level (cached per process)
+        geo_data = load_zone_geometry(self.geojson_path, zone_prices.keys(), zoom=5)
 
         # Create a dataframe for the choropleth
         df = pd.DataFrame(list(zone_prices.items()), columns=['Zone', 'Price'])
@@ -27,7 +29,7 @@ class EnergyVisualizer:
             name='Spot Prices',
             data=df,
             columns=['Zone', 'Price'],
-            key_on='feature.properties.id', # Assuming GeoJSON has ID 'SE1', 'SE2'...
+            key_on='feature.id', # Zone ids normalised by load_zone_geometry
             fill_color='YlOrRd',
             fill_opacity=0.7,
             line_opacity=0.2,
@@ -40,6 +42,31 @@ class EnergyVisualizer:
 
         return m
 
+    def create_time_map(self, zones, timestamps, matrix):
+        """
+        One map for a (zones x timesteps) price matrix with a time slider.
+        Geometry is embedded once; prices for all timesteps are encoded
+        compactly and the zones are restyled in the browser.
+        """
+        m = folium.Map(location=[62.0, 15.0], zoom_start=5, tiles='CartoDB dark_matter')
+        geo_data = load_zone_geometry(self.geojson_path, zones, zoom=5)
+
+        low, high = color_domain(matrix)
+        colormap = cm.linear.YlOrRd_09.scale(low, high)
+        colormap.caption = 'Price (€/MWh)'
+        layer = folium.GeoJson(
+            geo_data,
+            name='Spot Prices',
+            style_function=lambda x: {'fillColor': '#cccccc', 'color': '#000000', 'fillOpacity': 0.7, 'weight': 0.2},
+        ).add_to(m)
+        colors = [colormap.rgb_hex_str(v) for v in colormap.index]
+        TimeSlider(layer, encode_frames(timestamps, matrix), {z: i for i, z in enumerate(zones)}, colors, (low, high),
+                   zone_label='Zone: ', price_label='Price (€/MWh): ').add_to(m)
+        colormap.add_to(m)
+        folium.LayerControl().add_to(m)
+
+        return m
+
     def generate_dashboard_graphs(self, df_mix):
         """
         Generates Plotly graphs for generation mix.
@@ -0,0 +1,131 @@
+"""
+Alert rule benchmark: a few hundred generated rules of every kind (with
+per-zone overrides, hysteresis and cooldown) over all registered zones,
+checked the straightforward way (each rule, each zone, one price at a time)
+and with AlertEngine (one masked pass per signal), for a day and a week of
+PT15M prices. Both must raise the same alerts. Then the batch write of the
+alerts with DatabaseManager.log_alerts.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_alerts.py [rules]
+"""
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import zone_registry
+from alert_rules import AlertEngine, to_records
+from database import DatabaseManager
+from synthetic import generate_prices
+
+
+def make_rules(n, zones, seed=1):
+    rng = random.Random(seed)
+    rules = []
+    for i in range(n):
+        kind = ('threshold', 'negative', 'percentile', 'ramp', 'spread')[i % 5]
+        rule = {'name': f'{kind}_{i}', 'kind': kind, 'hysteresis': rng.choice([0, 2, 5]),
+                'cooldown_minutes': rng.choice([0, 60, 720])}
+        if kind == 'threshold':
+            if rng.random() < 0.7:
+                rule['above'] = rng.uniform(80, 200)
+            else:
+                rule['below'] = rng.uniform(0, 40)
+        elif kind == 'negative':
+            rule['below'] = rng.uniform(-5, 5)
+        elif kind == 'percentile':
+            rule['above'] = rng.uniform(90, 99.5)
+        elif kind == 'ramp':
+            if rng.random() < 0.5:
+                rule['above'] = rng.uniform(30, 150)
+            else:
+                rule['below'] = -rng.uniform(30, 150)
+        else:
+            rule['above'] = rng.uniform(20, 80)
+        key = (lambda z: '/'.join(rng.choice(zone_registry.BORDERS))) if kind == 'spread' else (lambda z: z)
+        direction = 'above' if 'above' in rule else 'below'
+        value = min(rule[direction] + 10, 100) if kind == 'percentile' else rule[direction] + 10
+        rule['overrides'] = {key(None): {direction: value, 'enabled': rng.random() < 0.8} for _ in range(3)}
+        rules.append(rule)
+    return rules
+
+
+def reference(engine, zones, ts, matrix):
+    """Each rule and zone (or border) in turn, one value at a time."""
+    alerts = set()
+    pairs = sorted({f"{a}/{b}" for a, b in zone_registry.BORDERS if a in zones and b in zones})
+    for rule in engine.rules:
+        if rule.kind == 'spread':
+            rows = [(p, [abs(matrix[zones.index(p.split('/')[0])][t] - matrix[zones.index(p.split('/')[1])][t])
+                         for t in range(len(ts))]) for p in pairs]
+        elif rule.kind == 'ramp':
+            rows = [(z, [math.nan] + [(row[t] - row[t - 1]) / ((ts[t] - ts[t - 1]) / 3600) for t in range(1, len(ts))])
+                    for z, row in zip(zones, matrix.tolist())]
+        else:
+            rows = list(zip(zones, matrix.tolist()))
+        for zone, values in rows:
+            threshold, hysteresis, enabled = rule.overrides.get(zone, (rule.value, rule.hysteresis, True))
+            if not enabled:
+                continue
+            if rule.kind == 'percentile':
+                threshold = float(np.nanpercentile(values, threshold))
+            sign = 1 if rule.above else -1
+            active, reported, fired, start, peak = False, False, None, None, None
+            for t, x in enumerate(values + [math.nan]):        # NaN closes an episode open at the end
+                if math.isnan(x) or sign * x <= sign * threshold - hysteresis:
+                    if active and reported:
+                        alerts.add((rule.name, zone, int(ts[start]), round(peak, 6)))
+                    active = False
+                elif not active and sign * x > sign * threshold:
+                    active = True
+                    reported = fired is None or ts[t] >= fired + rule.cooldown
+                    if reported:
+                        fired, start, peak = ts[t], t, x
+                elif active and reported:
+                    peak = max(peak, x) if rule.above else min(peak, x)
+    return alerts
+
+
+def main():
+    n_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    zones = list(zone_registry.ZONES)
+    rules = make_rules(n_rules, zones)
+    print(f"{n_rules} rules x {len(zones)} zones ({len(AlertEngine(rules).rules)} parsed)")
+
+    for label, days in (('1 day', 1), ('1 week', 7)):
+        market = generate_prices(zones, '2024-01-01', days=days, resolution='PT15M', seed=9)
+        ts = market.timestamps.astype('datetime64[s]').astype(np.int64)
+        engine = AlertEngine(rules)
+        t0 = time.perf_counter()
+        expected = reference(engine, zones, ts.tolist(), market.prices)
+        old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        alerts = engine.evaluate(zones, ts, market.prices)
+        new = time.perf_counter() - t0
+        print(f"  {label:<7} ({len(ts):4d} steps)  per rule and zone {old * 1000:8.1f} ms   "
+              f"AlertEngine {new * 1000:6.1f} ms   {old / new:4.0f}x   {len(alerts)} alerts")
+        got = {(a.rule, a.zone, int(a.time.astype(np.int64)), round(a.value, 6)) for a in alerts}
+        assert got == expected, (len(got ^ expected), sorted(got ^ expected)[:5])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseManager(os.path.join(tmp, 'grid.db'))
+            t0 = time.perf_counter()
+            db.log_alerts(to_records(alerts))
+            secs = time.perf_counter() - t0
+        print(f"  log_alerts, {len(alerts)} alerts in one batch {secs * 1000:8.1f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Analytics benchmark: a year of PT15M prices for SE1-SE4, analysed per zone
+and day with the previous DataFrame functions and in one call per metric with
+price_analytics on a (zones x days x steps) array.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_analytics.py [days]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from price_analytics import cheapest_window, threshold_summary, top_n
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+STEPS_PER_DAY = 96
+
+
+def legacy_get_cheapest_hours(df, n=5):
+    """The previous GridAnalyzer.get_cheapest_hours."""
+    sorted_df = df.sort_values(by='value', ascending=True)
+    return [{'time': row['time'].strftime("%H:%M"), 'price': row['value']}
+            for _, row in sorted_df.head(n).iterrows()]
+
+
+def legacy_find_cheapest_hours(df, n=5):
+    """The previous SmartGridAnalyzer.find_cheapest_hours."""
+    return df.sort_values(by='value').head(n)
+
+
+def legacy_check_alerts(df, price_threshold=100.0):
+    """The previous GridAnalyzer.check_alerts."""
+    high = df[df['value'] > price_threshold]
+    return [f"HIGH PRICE ALERT: {high['value'].max()}"] if not high.empty else []
+
+
+def legacy_cheapest_window(df, k):
+    """Per-frame rolling mean, the pandas way to find a k-step block."""
+    rolling = df['value'].rolling(k).mean()
+    return int(rolling.idxmin()) - k + 1
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    fn()
+    secs = time.perf_counter() - t0
+    print(f"  {label:<34} {secs * 1000:10.1f} ms")
+    return secs
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    rng = np.random.default_rng(0)
+    cube = rng.normal(70, 30, (len(ZONES), days, STEPS_PER_DAY))
+    times = np.datetime64('2025-01-01T00:00') + np.arange(STEPS_PER_DAY) * np.timedelta64(15, 'm')
+    frames = [pd.DataFrame({'time': times, 'value': cube[z, d]})
+              for z in range(len(ZONES)) for d in range(days)]
+    print(f"{len(ZONES)} zones x {days} days x {STEPS_PER_DAY} steps = {cube.size:,} prices")
+
+    comparisons = [
+        ('top-5 cheapest (GridAnalyzer)',
+         lambda: [legacy_get_cheapest_hours(df) for df in frames],
+         lambda: top_n(cube, 5)),
+        ('top-5 cheapest (SmartGridAnalyzer)',
+         lambda: [legacy_find_cheapest_hours(df) for df in frames],
+         lambda: top_n(cube, 5)),
+        ('cheapest 3h window',
+         lambda: [legacy_cheapest_window(df, 12) for df in frames],
+         lambda: cheapest_window(cube, 12)),
+        ('threshold alerts',
+         lambda: [legacy_check_alerts(df) for df in frames],
+         lambda: threshold_summary(cube, 100.0)),
+    ]
+    for name, legacy, vectorized in comparisons:
+        print(name)
+        before = timed('per zone-day DataFrame', legacy)
+        after = timed('price_analytics, one call', vectorized)
+        print(f"  speedup {before / after:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Read API load test: a database with a year of PT15M prices for SE1-SE4 is
+served by PriceApi in a separate process, and keep-alive clients replay a mix
+of latest/range/cheapest/aggregate/alert requests for a fixed time.
+
+Runs the mix with the response LRU disabled, with it enabled, and with
+clients revalidating through If-None-Match (304s).
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_api.py [seconds] [connections]
+"""
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from api_server import PriceApi
+from database import DatabaseManager
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+DAYS = 365
+
+
+def build_db(path):
+    rng = np.random.default_rng(0)
+    ts = np.datetime64('2025-01-01', 's') + np.arange(DAYS * 96) * np.timedelta64(900, 's')
+    with DatabaseManager(path) as db, contextlib.redirect_stdout(io.StringIO()):
+        for zone in ZONES:
+            db.save_prices(zone, pd.DataFrame({'timestamp': ts, 'price': rng.normal(60, 20, len(ts))}))
+
+
+def request_mix(n):
+    rng = random.Random(1)
+    paths = []
+    for _ in range(n):
+        zone = rng.choice(ZONES)
+        day = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        paths.append(rng.choice([
+            f"/api/prices/latest?zone={zone}",
+            f"/api/prices?zone={zone}&start={day}&end={day}T23:59",
+            f"/api/prices?zone={zone}&start={day}&end={day}T23:59&format=bin",
+            f"/api/cheapest?zone={zone}&day={day}&hours=3",
+            f"/api/aggregates?zone={zone}&granularity=month",
+            "/api/alerts?limit=20",
+        ]))
+    return paths
+
+
+def serve(path, port, cache_entries):
+    import asyncio as aio
+    with DatabaseManager(path) as db, contextlib.redirect_stdout(io.StringIO()):
+        aio.run(PriceApi(db, cache_entries).serve('127.0.0.1', port))
+
+
+async def client(port, paths, deadline, revalidate, counts):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    etags = {}
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        extra = f"If-None-Match: {etags[path]}\r\n" if revalidate and path in etags else ""
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n{extra}\r\n".encode())
+        head = await reader.readuntil(b'\r\n\r\n')
+        length, etag = 0, None
+        for line in head.split(b'\r\n'):
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+            elif line.lower().startswith(b'etag:'):
+                etag = line.split(b':', 1)[1].strip().decode()
+        if length:
+            await reader.readexactly(length)
+        etags[path] = etag
+        counts[head[9:12].decode()] = counts.get(head[9:12].decode(), 0) + 1
+    writer.close()
+
+
+async def load(port, seconds, connections, revalidate):
+    counts = {}
+    paths = request_mix(2000)
+    deadline = time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client(port, paths[i::connections], deadline, revalidate, counts)
+                           for i in range(connections)])
+    return counts, time.perf_counter() - t0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run(label, path, seconds, connections, cache_entries, revalidate=False):
+    port = free_port()
+    proc = multiprocessing.Process(target=serve, args=(path, port, cache_entries), daemon=True)
+    proc.start()
+    for _ in range(100):
+        with contextlib.suppress(OSError), socket.create_connection(('127.0.0.1', port)):
+            break
+        time.sleep(0.05)
+    counts, elapsed = asyncio.run(load(port, seconds, connections, revalidate))
+    proc.terminate()
+    proc.join()
+    total = sum(counts.values())
+    print(f"  {label:<28} {total / elapsed:9,.0f} req/s   {dict(sorted(counts.items()))}")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'grid.db')
+        build_db(path)
+        print(f"{len(ZONES)} zones x {DAYS} days, {connections} keep-alive connections, {seconds:.0f} s per run")
+        run('no response cache', path, seconds, connections, 0)
+        run('LRU response cache', path, seconds, connections, 4096)
+        run('LRU + If-None-Match (304)', path, seconds, connections, 4096, revalidate=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Cold-archive benchmark: three years of PT15M prices for SE1-SE4 read from
+SQLite, then again after archive_cold has moved everything but the last
+months into Arrow IPC partitions.
+
+Reports on-disk size, a full-history get_prices, yearly aggregates, and the
+archive-only percentile curve and seasonal profile with their peak Python
+allocations (tracemalloc; memory-mapped pages are not counted).
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_archive.py [days]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from database import DatabaseManager
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 3 * 365
+    start = np.datetime64('2022-01-01', 's')
+    timestamps = start + np.arange(days * 96) * np.timedelta64(900, 's')
+    rng = np.random.default_rng(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'grid_history.db')
+        with DatabaseManager(path) as db, contextlib.redirect_stdout(io.StringIO()):
+            for zone in ZONES:
+                prices = np.round(60 + 25 * np.sin(np.arange(len(timestamps)) / 96 * 2 * np.pi)
+                                  + rng.normal(0, 15, len(timestamps)), 2)
+                db.save_prices(zone, pd.DataFrame({'timestamp': timestamps, 'price': prices}))
+
+        with DatabaseManager(path) as db:
+            sql_size = os.path.getsize(path)
+            full = lambda: db.get_prices('SE3')
+            monthly = lambda: db.get_price_aggregates('SE3', 'month', None, None, (0.1, 0.5, 0.9))
+            sql_full, before = timed(full)
+            sql_agg, _ = timed(monthly)
+            sql_peak = peak_kib(full)
+            sql_pct, _ = timed(lambda: db.get_prices('SE3')['price'].quantile(np.linspace(0, 1, 101)))
+
+            cutoff = str(timestamps[-1].astype('datetime64[M]') - 2)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                months = db.archive_cold(cutoff)
+                archive_time = (time.perf_counter() - t0) * 1000
+            db.conn.execute('VACUUM')
+
+            arc_full, after = timed(full)
+            arc_agg, _ = timed(monthly)
+            arc_peak = peak_kib(full)
+            arc_pct, _ = timed(lambda: db.archive.percentile_curve('SE3'))
+            seasonal, _ = timed(lambda: db.archive.seasonal_profile('SE3'))
+            stream_peak = peak_kib(lambda: db.archive.percentile_curve('SE3'))
+
+            print(f"{len(ZONES)} zones x {days} days ({len(timestamps)} points per zone), "
+                  f"{months} zone-months archived in {archive_time:.0f} ms")
+            print(f"  on disk:               SQLite {sql_size / 2**20:6.1f} MiB -> "
+                  f"SQLite {os.path.getsize(path) / 2**20:5.1f} MiB + archive {dir_size(db.archive.root) / 2**20:5.1f} MiB")
+            print(f"  get_prices, all SE3:   {sql_full:8.1f} ms -> {arc_full:8.1f} ms "
+                  f"(peak {sql_peak / 1024:.1f} -> {arc_peak / 1024:.1f} MiB)")
+            print(f"  monthly aggregates:    {sql_agg:8.1f} ms -> {arc_agg:8.1f} ms")
+            print(f"  percentile curve:      {sql_pct:8.1f} ms (pandas over SQLite) -> {arc_pct:8.1f} ms "
+                  f"(streamed, peak {stream_peak:.0f} KiB)")
+            print(f"  seasonal 12x24:        {seasonal:8.1f} ms")
+            print(f"  results identical:     {before.equals(after)}")
+
+
+if __name__ == "__main__":
+    main()
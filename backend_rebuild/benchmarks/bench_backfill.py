@@ -0,0 +1,122 @@
+"""
+Backfill benchmark against a local ENTSO-E stub that generates a PT15M A44
+document for whatever period is requested, after a fixed latency plus a
+per-day server cost.
+
+Loads two years for SE1-SE4 with a serial fetch -> parse -> write loop and
+with Backfiller's pipeline, then shows that a re-run fetches nothing and that
+a deleted week is the only thing fetched afterwards.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_backfill.py [days]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from backfill import Backfiller
+from data_loader import EntsoeLoader
+from database import DatabaseManager
+from entsoe_parser import parse_timeseries, to_frame
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+
+
+def build_document(start, end):
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D'))
+    rng = np.random.default_rng(int(days[0].astype(np.int64)))
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><Publication_MarketDocument><type>A44</type>']
+    for day in days:
+        points = ''.join(f'<Point><position>{i + 1}</position><price.amount>{p:.2f}</price.amount></Point>'
+                         for i, p in enumerate(rng.normal(60, 20, 96)))
+        parts.append(f'<TimeSeries><curveType>A01</curveType><Period><timeInterval><start>{day}T00:00Z</start>'
+                     f'<end>{day + 1}T00:00Z</end></timeInterval><resolution>PT15M</resolution>'
+                     f'{points}</Period></TimeSeries>')
+    parts.append('</Publication_MarketDocument>')
+    return ''.join(parts).encode()
+
+
+def start_stub_server(latency, per_day):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            start = datetime.strptime(query['periodStart'][0], '%Y%m%d%H%M')
+            end = datetime.strptime(query['periodEnd'][0], '%Y%m%d%H%M')
+            time.sleep(latency + per_day * (end - start).days)
+            payload = build_document(start, end)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serial_backfill(loader, db, windows):
+    for w in windows:
+        ts, prices = parse_timeseries(loader.fetch_document(w.zone, 'A44', w.start, w.end))
+        db.save_prices(w.zone, to_frame(ts, prices))
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    start = np.datetime64('2023-01-01', 'D')
+    end = start + days
+    server = start_stub_server(latency=0.2, per_day=0.001)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api"
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = EntsoeLoader(api_key='stub', base_url=base_url)
+        with DatabaseManager(os.path.join(tmp, 'serial.db')) as db:
+            windows = Backfiller(loader, db).plan(ZONES, start, end)
+            t0 = time.perf_counter()
+            with quiet:
+                serial_backfill(loader, db, windows)
+            serial = time.perf_counter() - t0
+
+        with DatabaseManager(os.path.join(tmp, 'pipeline.db')) as db:
+            backfiller = Backfiller(loader, db)
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = backfiller.run(ZONES, start, end)
+            pipelined = time.perf_counter() - t0
+
+            print(f"{len(ZONES)} zones x {days} days in {len(windows)} windows, {summary['points']} points")
+            print(f"  serial fetch/parse/write: {serial * 1000:8.1f} ms")
+            print(f"  pipelined Backfiller:     {pipelined * 1000:8.1f} ms")
+
+            print(f"  windows on re-run:        {len(backfiller.plan(ZONES, start, end))}")
+            with db.conn:
+                db.conn.execute("DELETE FROM prices WHERE zone = 'SE3' AND timestamp >= ? AND timestamp < ?",
+                                (int((start + 100).astype('datetime64[s]').astype(np.int64)),
+                                 int((start + 107).astype('datetime64[s]').astype(np.int64))))
+                db.conn.execute("DELETE FROM backfill_checkpoints")
+            gaps = backfiller.plan(ZONES, start, end)
+            print(f"  after deleting a week:    {[(w.zone, f'{w.start:%Y-%m-%d}', f'{w.end:%Y-%m-%d}') for w in gaps]}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold-start benchmark for scheduler-driven runs: a complete `cli.py alerts`
+check of SE1-SE4 served from a warm response cache, against merely importing
+main_app (pandas, folium, requests and every backend module).
+
+Each measurement is a fresh interpreter; the best of --repeat runs is kept.
+Also lists which heavy modules each process ended up importing.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_cli.py [repeat]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SRC = os.path.join(ROOT, 'backend_rebuild', 'src')
+sys.path.append(SRC)
+
+from data_loader import EntsoeLoader
+from response_cache import ResponseCache
+from synthetic import generate_prices, to_entsoe_xml
+from zone_registry import DEFAULT_ZONES
+
+HEAVY = ('pandas', 'folium', 'requests', 'dotenv', 'pyarrow', 'branca')
+REPORT = "import sys; print(' '.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def warm_cache(path):
+    """Stores today's A44 document for every zone, keyed exactly as the loader will look it up."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    market = generate_prices(list(DEFAULT_ZONES), today.strftime('%Y-%m-%d'), days=1, seed=1)
+    cache = ResponseCache(path)
+    for zone, prices in zip(market.zones, market.prices):
+        eic = EntsoeLoader.ZONES[zone]
+        cache.put('A44', eic, today, today + timedelta(days=1), to_entsoe_xml(market.timestamps, prices, eic))
+    cache.close()
+
+
+def run(args, env, repeat):
+    best, out = float('inf'), ''
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run(args, env=env, cwd=ROOT, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - t0)
+        if proc.returncode not in (0, 1):
+            raise RuntimeError(proc.stderr)
+        out = proc.stdout
+    return best, out
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env = dict(os.environ, VITE_ENTSOE_API_KEY='stub')
+    report = REPORT.format(heavy=HEAVY)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, 'cache.db')
+        warm_cache(cache)
+
+        baseline, _ = run([sys.executable, '-c', 'pass'], env, repeat)
+        legacy, legacy_mods = run([sys.executable, '-c',
+                                   f"import sys; sys.path[:0] = [{os.path.join(ROOT, 'backend_rebuild')!r}, {SRC!r}]; "
+                                   f"import main_app; {report}"], env, repeat)
+        alerts, output = run([sys.executable, '-c',
+                              f"import sys; sys.path.insert(0, {SRC!r}); import cli; "
+                              f"code = cli.main(['--cache', {cache!r}, 'alerts']); {report}"], env, repeat)
+
+    print(f"Interpreter start:          {baseline * 1000:7.0f} ms")
+    print(f"import main_app:            {legacy * 1000:7.0f} ms   loads: {legacy_mods.strip().splitlines()[-1]}")
+    print(f"cli.py alerts (4 zones):    {alerts * 1000:7.0f} ms   loads: {output.strip().splitlines()[-1] or '-'}")
+    print(f"  {(legacy - baseline) / (alerts - baseline):.1f}x less start-up work than importing main_app alone")
+
+
+if __name__ == "__main__":
+    main()
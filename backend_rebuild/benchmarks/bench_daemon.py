@@ -0,0 +1,127 @@
+"""
+Ingest daemon simulation: three simulated days against a local ENTSO-E stub
+that publishes each delivery day at 12:57 local time the day before, issues
+one corrected revision per day and fails 5% of requests with HTTP 503.
+
+Compares requests and map renders with the previous cron setup (main_app.py
+every 15 minutes: every zone fetched and the map redrawn on each run).
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_daemon.py [days]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from data_loader import EntsoeLoader
+from database import DatabaseManager
+from ingest_daemon import MARKET_TZ, IngestDaemon
+from map_visualization import EllevioMapGenerator
+from response_cache import ResponseCache
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+SIM_START = datetime(2026, 3, 2, 6, 0, tzinfo=MARKET_TZ).timestamp()
+
+
+def build_document(start, revision, created):
+    rng = np.random.default_rng(int(start.timestamp()) + revision)
+    points = ''.join(f'<Point><position>{i + 1}</position><price.amount>{p:.2f}</price.amount></Point>'
+                     for i, p in enumerate(rng.normal(60, 20, 96)))
+    return (f'<?xml version="1.0" encoding="UTF-8"?><Publication_MarketDocument>'
+            f'<revisionNumber>{revision}</revisionNumber><type>A44</type>'
+            f'<createdDateTime>{created:%Y-%m-%dT%H:%M:%SZ}</createdDateTime>'
+            f'<TimeSeries><curveType>A01</curveType><Period><timeInterval><start>{start:%Y-%m-%dT%H:%MZ}</start>'
+            f'<end>{start + timedelta(days=1):%Y-%m-%dT%H:%MZ}</end></timeInterval><resolution>PT15M</resolution>'
+            f'{points}</Period></TimeSeries></Publication_MarketDocument>').encode()
+
+
+def start_stub_server(sim, counter):
+    ack = (b'<?xml version="1.0" encoding="UTF-8"?><Acknowledgement_MarketDocument>'
+           b'<createdDateTime>2026-01-01T00:00:00Z</createdDateTime><Reason><code>999</code></Reason>'
+           b'</Acknowledgement_MarketDocument>')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            counter[0] += 1
+            start = datetime.strptime(parse_qs(urlparse(self.path).query)['periodStart'][0], '%Y%m%d%H%M')
+            start = start.replace(tzinfo=timezone.utc)
+            day_before = (start.astimezone(MARKET_TZ) - timedelta(days=1)).date()
+            published = datetime(day_before.year, day_before.month, day_before.day, 12, 57, tzinfo=MARKET_TZ)
+            corrected = published + timedelta(hours=3)
+            now = sim[0]
+            if random.random() < 0.05:
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if now < published.timestamp():
+                payload = ack
+            elif now < corrected.timestamp():
+                payload = build_document(start, 1, published)
+            else:
+                payload = build_document(start, 2, corrected)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    random.seed(0)
+    sim, requests_made = [SIM_START], [0]
+    server = start_stub_server(sim, requests_made)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, 'cache.db'))
+        loader = EntsoeLoader(api_key='stub', base_url=base_url, cache=cache)
+        loader.MAX_REQUESTS_PER_MINUTE = 10**6
+        map_gen = EllevioMapGenerator(os.path.join(ROOT, 'src', 'assets', 'data', 'zones.json'))
+        with DatabaseManager(os.path.join(tmp, 'grid.db')) as db:
+            daemon = IngestDaemon(loader, db, ZONES, map_gen=map_gen, map_path=os.path.join(tmp, 'map.html'),
+                                  clock=lambda: sim[0])
+            wakeups = 0
+            cpu = time.process_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                while sim[0] < SIM_START + days * 86400:
+                    sim[0] += daemon.run_once()
+                    wakeups += 1
+            cpu = time.process_time() - cpu
+        cache.close()
+
+    cron_runs = days * 96
+    print(f"{days} simulated days, {len(ZONES)} zones")
+    print(f"  cron every 15 min:  {cron_runs * len(ZONES):6d} requests  {cron_runs:4d} map renders")
+    print(f"  IngestDaemon:       {requests_made[0]:6d} requests  {daemon.stats['renders']:4d} map renders  "
+          f"({wakeups} wakeups, {cpu:.2f} s CPU)")
+    print(f"    {daemon.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
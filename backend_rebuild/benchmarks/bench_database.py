@@ -0,0 +1,108 @@
+"""
+Backfill write benchmark: four zones of PT15M prices saved one day per call,
+with the previous connect/to_sql/close path and with DatabaseManager's
+persistent WAL connection and executemany upsert.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_database.py [days]
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from database import DatabaseManager
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+STEPS_PER_DAY = 96
+
+
+def daily_frames(days):
+    rng = np.random.default_rng(0)
+    start = np.datetime64('2022-01-01T00:00', 's')
+    step = np.timedelta64(15, 'm')
+    for day in range(days):
+        ts = start + (day * STEPS_PER_DAY + np.arange(STEPS_PER_DAY)) * step
+        for zone in ZONES:
+            yield zone, pd.DataFrame({'timestamp': ts, 'price': rng.normal(60, 20, STEPS_PER_DAY)})
+
+
+def legacy_save(db_path, zone, df):
+    """The previous DatabaseManager.save_prices: new connection and to_sql per call."""
+    conn = sqlite3.connect(db_path)
+    df = df.copy()
+    df['zone'] = zone
+    try:
+        df[['zone', 'timestamp', 'price']].to_sql('prices', conn, if_exists='append', index=False)
+    except sqlite3.IntegrityError:
+        pass
+    finally:
+        conn.close()
+
+
+def run(label, days, save):
+    t0 = time.perf_counter()
+    rows = 0
+    for zone, df in daily_frames(days):
+        save(zone, df)
+        rows += len(df)
+    secs = time.perf_counter() - t0
+    print(f"{label:>8}: {rows:>9,} rows in {secs:7.2f} s  {rows / secs:>12,.0f} rows/s")
+
+
+def time_query(label, fn, repeat=20):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    ms = (time.perf_counter() - t0) / repeat * 1000
+    print(f"  {label:<20} {ms:9.3f} ms  ({len(result)} rows)")
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        DatabaseManager(legacy_path).close()
+        run('legacy', days, lambda zone, df: legacy_save(legacy_path, zone, df))
+
+        with DatabaseManager(os.path.join(tmp, 'upsert.db')) as db:
+            def save(zone, df):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    db.save_prices(zone, df)
+            run('upsert', days, save)
+
+        # Backfills fetch long windows, so the same rows arrive as one batch per zone
+        with DatabaseManager(os.path.join(tmp, 'bulk.db')) as db:
+            frames = {}
+            for zone, df in daily_frames(days):
+                frames.setdefault(zone, []).append(df)
+            batches = [(zone, pd.concat(dfs, ignore_index=True)) for zone, dfs in frames.items()]
+
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rows = sum(db.save_prices(zone, df) for zone, df in batches)
+            secs = time.perf_counter() - t0
+            print(f"{'bulk':>8}: {rows:>9,} rows in {secs:7.2f} s  {rows / secs:>12,.0f} rows/s")
+
+            print("\nQueries (SE3):")
+            time_query('latest price', lambda: db.get_latest_prices('SE3'), repeat=1000)
+            time_query('latest 96', lambda: db.get_latest_prices('SE3', 96), repeat=1000)
+            time_query('30-day range', lambda: db.get_prices('SE3', '2022-06-01', '2022-07-01'))
+            time_query('daily aggregates', lambda: db.get_price_aggregates('SE3', 'day', percentiles=(0.1, 0.5, 0.9)))
+            time_query('monthly aggregates', lambda: db.get_price_aggregates('SE3', 'month'))
+            time_query('daily rollups', lambda: db.get_price_rollups('SE3', 'day'))
+            time_query('monthly rollups', lambda: db.get_price_rollups('SE3', 'month'), repeat=1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Change feed benchmark: PriceApi runs in one process, a writer process saves a
+day of PT15M prices for one zone every 200 ms (new day, then a revision of a
+few points), and many SSE subscribers measure commit-to-receive latency.
+One subscriber disconnects halfway and resumes with Last-Event-ID.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_feed.py [subscribers] [batches]
+"""
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from api_server import PriceApi
+from database import DatabaseManager
+
+
+def serve(path, port):
+    with DatabaseManager(path) as db, contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(PriceApi(db).serve('127.0.0.1', port))
+
+
+def write(path, batches, start_event):
+    start_event.wait()
+    rng = np.random.default_rng(0)
+    day = np.datetime64('2026-01-01', 's')
+    with DatabaseManager(path) as db, contextlib.redirect_stdout(io.StringIO()):
+        for i in range(batches):
+            ts = day + (i // 2) * 86400 + np.arange(96) * np.timedelta64(900, 's')
+            prices = rng.normal(60, 20, 96)
+            if i % 2:
+                prices[:4] += 1       # Revision of four points; the rest are unchanged
+                db.save_prices('SE3', pd.DataFrame({'timestamp': ts[:8], 'price': prices[:8]}))
+            else:
+                db.save_prices('SE3', pd.DataFrame({'timestamp': ts, 'price': prices}))
+            time.sleep(0.2)
+
+
+async def subscriber(port, expected, latencies, resume_after=None):
+    """Reads SSE events; returns the list of event ids seen."""
+    seen, last_id = [], None
+    while len(seen) < expected:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        extra = f"Last-Event-ID: {last_id}\r\n" if last_id is not None else ""
+        writer.write(f"GET /api/stream HTTP/1.1\r\nHost: bench\r\n{extra}\r\n".encode())
+        await reader.readuntil(b'\r\n\r\n')
+        event_id = None
+        while len(seen) < expected:
+            line = (await reader.readline()).rstrip(b'\n')
+            if line.startswith(b'id: '):
+                event_id = int(line[4:])
+            elif line.startswith(b'data: '):
+                latencies.append(time.time() - json.loads(line[6:])['committed'])
+                seen.append(event_id)
+                last_id = event_id
+                if resume_after is not None and len(seen) == resume_after:
+                    resume_after = None
+                    break
+        writer.close()
+        if len(seen) < expected:
+            await asyncio.sleep(0.5)      # Misses events while away; Last-Event-ID replays them
+    return seen
+
+
+async def listen(port, subscribers, batches, start_event):
+    latencies = []
+    tasks = [asyncio.create_task(subscriber(port, batches, latencies)) for _ in range(subscribers - 1)]
+    tasks.append(asyncio.create_task(subscriber(port, batches, [], resume_after=batches // 2)))
+    await asyncio.sleep(1.0)
+    start_event.set()
+    results = await asyncio.gather(*tasks)
+    return latencies, results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    batches = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'grid.db')
+        DatabaseManager(path).close()
+        port = free_port()
+        server = multiprocessing.Process(target=serve, args=(path, port), daemon=True)
+        server.start()
+        time.sleep(1.0)
+        start_event = multiprocessing.Event()
+        writer = multiprocessing.Process(target=write, args=(path, batches, start_event), daemon=True)
+        writer.start()
+
+        latencies, results = asyncio.run(listen(port, subscribers, batches, start_event))
+        writer.join()
+        server.terminate()
+
+        with DatabaseManager(path) as db:
+            sizes = [len(payload) for _, _, _, payload in db.get_changes(0)]
+        lat = np.array(latencies) * 1000
+        print(f"{subscribers} subscribers, {batches} committed batches")
+        print(f"  latency commit -> client: p50 {np.percentile(lat, 50):.1f} ms  "
+              f"p99 {np.percentile(lat, 99):.1f} ms  max {lat.max():.1f} ms")
+        print(f"  event size: new day {sizes[0]} B, revision {sizes[1]} B")
+        print(f"  all subscribers saw every event in order: "
+              f"{all(r == sorted(set(r)) and len(r) == batches for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
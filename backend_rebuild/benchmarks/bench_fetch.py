@@ -0,0 +1,79 @@
+"""
+Zone sweep benchmark against a local stub of the ENTSO-E API.
+
+The stub replays entsoe_se4.xml for every request after a fixed delay that
+stands in for network and server latency. The four Swedish zones are fetched
+one after another with fetch_day_ahead_prices and then in one fetch_many call.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_fetch.py [latency_ms]
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from data_loader import EntsoeLoader
+from zone_registry import DEFAULT_ZONES
+
+SAMPLE_XML = os.path.join(ROOT, 'entsoe_se4.xml')
+
+
+def start_stub_server(latency):
+    with open(SAMPLE_XML, 'rb') as f:
+        payload = f.read()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    latency = (int(sys.argv[1]) if len(sys.argv) > 1 else 250) / 1000
+    server = start_stub_server(latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api"
+    zones = list(DEFAULT_ZONES)
+
+    loader = EntsoeLoader(api_key='stub', base_url=base_url)
+    t0 = time.perf_counter()
+    for zone in zones:
+        assert len(loader.fetch_day_ahead_prices(zone)) == 96
+    sequential = time.perf_counter() - t0
+
+    loader = EntsoeLoader(api_key='stub', base_url=base_url)
+    t0 = time.perf_counter()
+    done = []
+    for result in loader.fetch_many(zones):
+        assert result.error is None, result.error
+        done.append((result.zone, time.perf_counter() - t0))
+    concurrent = time.perf_counter() - t0
+
+    print(f"Stub latency per request: {latency * 1000:.0f} ms, zones: {len(zones)}")
+    print(f"  sequential fetch_day_ahead_prices: {sequential * 1000:7.1f} ms")
+    print(f"  fetch_many:                        {concurrent * 1000:7.1f} ms")
+    for zone, elapsed in done:
+        print(f"    {zone} completed after {elapsed * 1000:.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Forecast benchmark and backtest. Walk-forward over two synthetic years for
+one zone: forecast the next 7 days each day, then learn the day, reporting
+MAE per horizon for the ridge model, the seasonal-naive baseline (same hour
+a week earlier) and persistence (same hour on the issue day), with and
+without load features. Then the database path for every registered zone:
+initial fit, one incremental day through the save_prices listener and a
+7-day forecast for all zones.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_forecast.py [days]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import zone_registry
+from database import DatabaseManager
+from entsoe_parser import to_frame
+from price_forecast import LOAD_SCALE, PriceForecaster, backtest
+from synthetic import generate_load, generate_prices
+
+
+def report(label, result):
+    print(f"  {label}: {result['days']} issue days, update {result['update_ms']:.2f} ms/day, "
+          f"predict {result['predict_ms']:.2f} ms/day")
+    print(f"    {'MAE €/MWh':<16}" + ''.join(f"{f'D+{h}':>8}" for h in range(1, 8)))
+    for name, mae in result['mae'].items():
+        print(f"    {name:<16}" + ''.join(f"{v:8.2f}" for v in mae))
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):       # save_prices reports every batch
+        result = fn()
+    print(f"  {label:<40} {(time.perf_counter() - t0) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    market = generate_prices(['SE3'], '2023-01-01', days=days, resolution='PT60M', seed=11)
+    load = generate_load(['SE3'], '2023-01-01', days=days, seed=11)
+    print(f"Backtest SE3, {days} days")
+    report('prices only', backtest(market.timestamps, market.prices[0]))
+    report('with load', backtest(market.timestamps, market.prices[0],
+                                 exog=[(load.timestamps, load.prices[0] / LOAD_SCALE)]))
+
+    zones = list(zone_registry.ZONES)
+    history = 180
+    market = generate_prices(zones, '2024-01-01', days=history + 1, resolution='PT60M', seed=12)
+    cut = history * 24
+    print(f"\nDatabase, {len(zones)} zones x {history} days")
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseManager(os.path.join(tmp, 'grid.db'))
+            for zone, row in zip(zones, market.prices):
+                db.save_prices(zone, to_frame(market.timestamps[:cut], row[:cut]))
+        forecaster = PriceForecaster(db)
+        timed('initial fit, all zones', lambda: [forecaster.update(zone) for zone in zones])
+        db.add_listener(forecaster.on_prices_saved)
+        timed('one new day: save_prices + update', lambda: [
+            db.save_prices(zone, to_frame(market.timestamps[cut:], row[cut:])) for zone, row in zip(zones, market.prices)])
+        forecast = timed('7-day forecast, all zones', lambda: forecaster.forecast(zones))
+        assert not np.isnan(forecast.values[:, ~np.isnat(forecast.timestamps)]).any()
+        print(f"  {forecast.values.shape[1]} hourly steps from {forecast.days[0]} "
+              f"({forecast.timestamps[0]} UTC) per zone")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Generation mix benchmark: a year of synthetic A75 documents (one TimeSeries per
+production type and day, PT15M with some types at PT60M) for SE1-SE4, parsed
+into a GenerationCube, reduced to renewable share and mix, and round-tripped
+through the generation table.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_generation.py [days]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from database import DatabaseManager
+from generation_mix import PSR_TYPES, build_cube, generation_mix, renewable_share
+
+ZONES = ['SE1', 'SE2', 'SE3', 'SE4']
+TYPES = {'B04': 'PT60M', 'B12': 'PT15M', 'B14': 'PT15M', 'B16': 'PT60M', 'B19': 'PT15M', 'B20': 'PT60M'}
+
+
+def build_document(days, seed):
+    rng = np.random.default_rng(seed)
+    first = np.datetime64('2025-01-01T00:00', 'm')
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><GL_MarketDocument><type>A75</type>']
+    for psr, resolution in TYPES.items():
+        n = 96 if resolution == 'PT15M' else 24
+        for d in range(days):
+            start = first + np.timedelta64(d, 'D')
+            points = ''.join(f'<Point><position>{i + 1}</position><quantity>{q:.0f}</quantity></Point>'
+                             for i, q in enumerate(rng.uniform(0, 2000, n)))
+            parts.append(
+                f'<TimeSeries><mRID>{d}</mRID><businessType>A01</businessType>'
+                f'<inBiddingZone_Domain.mRID codingScheme="A01">X</inBiddingZone_Domain.mRID>'
+                f'<MktPSRType><psrType>{psr}</psrType></MktPSRType>'
+                f'<Period><timeInterval><start>{start}Z</start><end>{start + np.timedelta64(1, "D")}Z</end></timeInterval>'
+                f'<resolution>{resolution}</resolution>{points}</Period></TimeSeries>'
+            )
+    parts.append('</GL_MarketDocument>')
+    return ''.join(parts).encode()
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"  {label:<34} {(time.perf_counter() - t0) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    documents = {zone: build_document(days, i) for i, zone in enumerate(ZONES)}
+    print(f"{len(ZONES)} zones x {len(TYPES)} types x {days} days, "
+          f"{sum(len(d) for d in documents.values()) / 1e6:.0f} MB XML")
+
+    cube = timed('parse into cube', lambda: build_cube(documents))
+    print(f"    cube {cube.values.shape}, {cube.values.nbytes / 1e6:.0f} MB")
+    share = timed('renewable share (all zones)', lambda: renewable_share(cube))
+    mix = timed('mix (all zones)', lambda: generation_mix(cube))
+    for zone, s, row in zip(cube.zones, np.nanmean(share, axis=1), mix):
+        top = cube.psr_types[int(np.nanargmax(row))]
+        print(f"    {zone}: renewable {s:.1%}, largest {PSR_TYPES[top]} {np.nanmax(row):.1%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        with DatabaseManager(path) as db:
+            def save():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return db.save_generation(cube)
+            timed('save_generation', save)
+            loaded = timed('get_generation (all zones)', lambda: db.get_generation())
+            rows = db.conn.execute("SELECT COUNT(*) FROM generation").fetchone()[0]
+        points = int(np.sum(~np.isnan(cube.values)))
+        print(f"    {rows} rows for {points} points, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+        assert np.allclose(loaded.values, cube.values, equal_nan=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Hot store benchmark: worker processes that each need the last week of
+prices and load for every registered zone, loading it from grid_history.db
+into DataFrames (as the workers do today) against attaching to the shared
+hot store. Reports load time and the private memory each worker adds
+(Private_* in /proc/self/smaps_rollup; the mapped store is shared), then
+the cost of keeping the store current from save_prices, and a reader
+taking snapshots while a writer rewrites the store, which must never see a
+half-written batch.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_hot_store.py [workers]
+"""
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import zone_registry
+from database import DatabaseManager
+from entsoe_parser import to_frame
+from hot_store import HotStore
+from synthetic import generate_load, generate_prices
+
+DAYS = 30
+START = '2024-01-01'
+
+
+def private_mb():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            return sum(int(line.split()[1]) for line in f if line.startswith('Private_')) / 1024
+    except OSError:
+        return float('nan')
+
+
+def from_db(db_path, zones, lo, hi):
+    with contextlib.redirect_stdout(io.StringIO()), DatabaseManager(db_path) as db:
+        frames = {zone: (db.get_prices(zone, lo, hi), db.get_load(zone, lo, hi)) for zone in zones}
+    return sum(float(p['price'].mean()) + float(l['forecast'].mean()) for p, l in frames.values()), frames
+
+
+def from_hot(hot_path, zones, lo, hi):
+    store = HotStore.open(hot_path)
+    prices, load = store.array('price'), store.array('load')
+    return float(np.nanmean(prices, axis=1).sum() + np.nanmean(load, axis=1).sum()), store
+
+
+def worker(mode, path, zones, lo, hi, out):
+    import pandas  # noqa: F401  Both kinds of worker run with pandas loaded, as the backend does
+    before = private_mb()
+    t0 = time.perf_counter()
+    # The frames / store stay referenced until memory is measured
+    total, held = (from_db if mode == 'db' else from_hot)(path, zones, np.datetime64(lo, 's'), np.datetime64(hi, 's'))
+    out.put((mode, (time.perf_counter() - t0) * 1000, private_mb() - before, total))
+
+
+def consistency(hot_path, rounds, out):
+    store = HotStore.open(hot_path)
+    torn = 0
+    for _ in range(rounds):
+        _, _, matrix = store.snapshot('price', ['SE3'])
+        values = matrix[~np.isnan(matrix)]
+        torn += len(values) > 0 and values.min() != values.max()
+    out.put(torn)
+
+
+def main():
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    zones = list(zone_registry.ZONES)
+    market = generate_prices(zones, START, days=DAYS, resolution='PT15M', seed=3)
+    load = generate_load(zones, START, days=DAYS, seed=3)
+    now = int(market.timestamps[-1].astype('datetime64[s]').astype(np.int64)) - 86400
+    ctx = mp.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, hot_path = os.path.join(tmp, 'grid.db'), os.path.join(tmp, 'hot.bin')
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseManager(db_path)
+            for z, zone in enumerate(zones):
+                db.save_prices(zone, to_frame(market.timestamps, market.prices[z]))
+                db.save_load(zone, load.timestamps, load.prices[z])
+        store = HotStore.create(hot_path, zones, now=now)
+        t0 = time.perf_counter()
+        points = store.fill(db)
+        print(f"{len(zones)} zones, {store.steps * store.step // 86400}-day window, store "
+              f"{os.path.getsize(hot_path) / 2**20:.1f} MiB, filled {points} points from the database in "
+              f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        lo, hi = store.origin, store.origin + store.steps * store.step
+        for mode, path in (('db', db_path), ('hot', hot_path)):
+            out = ctx.Queue()
+            procs = [ctx.Process(target=worker, args=(mode, path, zones, lo, hi, out)) for _ in range(n_workers)]
+            for p in procs:
+                p.start()
+            results = [out.get() for _ in procs]
+            for p in procs:
+                p.join()
+            ms = np.mean([r[1] for r in results])
+            mb = np.mean([r[2] for r in results])
+            label = 'get_prices + get_load' if mode == 'db' else 'HotStore.open (views)'
+            print(f"  {n_workers} workers, {label:<24} {ms:8.1f} ms/worker  {mb:7.1f} MiB private/worker")
+            totals = [r[3] for r in results]
+            assert np.allclose(totals, totals[0])
+            if mode == 'db':
+                expected = totals[0]
+        assert np.isclose(totals[0], expected)
+
+        # Listener cost on the ingest path: one more day for every zone
+        day = generate_prices(zones, np.datetime64(hi - 86400, 's').astype('datetime64[D]').astype(str),
+                              days=1, resolution='PT15M', seed=4)
+        for label, attach in (('save_prices, no hot store', False), ('save_prices + hot store', True)):
+            if attach:
+                store.fill(db)      # Catches up with the batches above, as a writer does when it attaches
+                store.listen(db)
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for z, zone in enumerate(zones):
+                    db.save_prices(zone, to_frame(day.timestamps, day.prices[z] + attach))
+            print(f"  {label:<34} {(time.perf_counter() - t0) * 1000:8.1f} ms  ({len(zones)} zones, 1 day)")
+        ts, values = HotStore.open(hot_path).points('price', zones[0], hi - 86400, hi)
+        assert np.allclose(values, day.prices[0] + 1)
+        db.close()
+
+        # Seqlock: the reader must only ever see whole batches
+        grid = store.timestamps()
+        store.update('price', 'SE3', grid, np.zeros(len(grid)))
+        out = ctx.Queue()
+        reader = ctx.Process(target=consistency, args=(hot_path, 20000, out))
+        reader.start()
+        writes = 0
+        while reader.is_alive() and out.empty():
+            store.update('price', 'SE3', grid, np.full(len(grid), float(writes % 1000)))
+            writes += 1
+        torn = out.get()
+        reader.join()
+        print(f"  {writes} concurrent writes, 20000 snapshots: {torn} torn reads")
+        assert torn == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Map rendering benchmark: the SE1-SE4 price map built the previous way (full
+world GeoJSON in a Choropleth plus a second tooltip GeoJson) against
+EllevioMapGenerator with pre-filtered, simplified geometry.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_map.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import folium
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import geometry
+from map_visualization import EllevioMapGenerator
+
+GEOJSON = os.path.join(ROOT, 'src', 'assets', 'data', 'zones.json')
+PRICES = {'SE1': 42.5, 'SE2': 44.1, 'SE3': 61.3, 'SE4': 78.9}
+LEGACY_KEYS = {'SE1': 'SE-SE1', 'SE2': 'SE-SE2', 'SE3': 'SE-SE3', 'SE4': 'SE-SE4'}
+
+
+def legacy_map(prices):
+    m = folium.Map(location=[62.0, 15.0], zoom_start=5, tiles='cartodbpositron')
+    with open(GEOJSON, 'r', encoding='utf-8') as f:
+        geo_data = json.load(f)
+    df = pd.DataFrame([(LEGACY_KEYS[z], p) for z, p in prices.items()], columns=['Zone', 'Price'])
+    folium.Choropleth(geo_data=geo_data, data=df, columns=['Zone', 'Price'], key_on='feature.properties.zoneName',
+                      fill_color='YlGn').add_to(m)
+    folium.features.GeoJson(geo_data, tooltip=folium.features.GeoJsonTooltip(fields=['zoneName'])).add_to(m)
+    return m
+
+
+def timed(label, build):
+    t0 = time.perf_counter()
+    html = build().get_root().render()
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"  {label:<30} {ms:8.1f} ms  {len(html) / 1024:9.1f} KiB")
+    return ms, len(html)
+
+
+def main():
+    geometry.CACHE_DIR = tempfile.mkdtemp()
+    print(f"{len(PRICES)} zones, {os.path.getsize(GEOJSON) / 1e6:.1f} MB source GeoJSON")
+    old = timed('legacy (full GeoJSON x2)', lambda: legacy_map(PRICES))
+    generator = EllevioMapGenerator(GEOJSON)
+    timed('simplified, cold cache', lambda: generator.generate_map(PRICES))
+    geometry._memory_cache.clear()
+    timed('simplified, disk cache', lambda: generator.generate_map(PRICES))
+    new = timed('simplified, in-process cache', lambda: generator.generate_map(PRICES))
+    print(f"  speedup {old[0] / new[0]:.0f}x, HTML {old[1] / new[1]:.0f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
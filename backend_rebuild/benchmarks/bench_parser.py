@@ -0,0 +1,100 @@
+"""
+Parser benchmark: the bundled entsoe_se4.xml (one day of PT15M prices) is
+scaled up to a year of daily Periods and parsed with the old
+ElementTree/dict-per-row approach and with the streaming entsoe_parser.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_parser.py [days]
+"""
+import os
+import re
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from entsoe_parser import parse_timeseries, to_frame
+
+SAMPLE_XML = os.path.join(ROOT, 'entsoe_se4.xml')
+
+
+def build_document(days):
+    """Repeats the sample TimeSeries once per day with shifted intervals."""
+    with open(SAMPLE_XML, encoding='utf-8') as f:
+        xml = f.read()
+
+    head, rest = xml.split('<TimeSeries>', 1)
+    series, tail = rest.rsplit('</TimeSeries>', 1)
+    first_day = datetime(2025, 1, 1, 23, 0)
+
+    parts = [head]
+    for d in range(days):
+        start = (first_day + timedelta(days=d)).strftime('%Y-%m-%dT%H:%MZ')
+        end = (first_day + timedelta(days=d + 1)).strftime('%Y-%m-%dT%H:%MZ')
+        body = re.sub(r'<start>[^<]+</start>', f'<start>{start}</start>', series)
+        body = re.sub(r'<end>[^<]+</end>', f'<end>{end}</end>', body)
+        parts.append('<TimeSeries>' + body + '</TimeSeries>')
+    parts.append(tail)
+    return ''.join(parts).encode('utf-8')
+
+
+def legacy_parse(xml_content):
+    """The previous EntsoeLoader.map_xml_to_df: full tree, findall, one dict per point."""
+    root = ET.fromstring(xml_content)
+    points = []
+    for period in root.findall(".//{*}Period"):
+        start_str = period.find(".//{*}timeInterval/{*}start").text
+        start_dt = datetime.strptime(start_str.rstrip('Z'), "%Y-%m-%dT%H:%M")
+        step = int(period.find(".//{*}resolution").text[2:-1])
+        for point in period.findall(".//{*}Point"):
+            pos = int(point.find(".//{*}position").text)
+            price_node = point.find(".//{*}price.amount")
+            if price_node is not None:
+                time_ = start_dt + timedelta(minutes=step * (pos - 1))
+                points.append({'timestamp': time_, 'price': float(price_node.text)})
+    return pd.DataFrame(points)
+
+
+def streaming_parse(xml_content):
+    return to_frame(*parse_timeseries(xml_content))
+
+
+def measure(fn, payload, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = fn(payload)
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, best, peak
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    payload = build_document(days)
+    print(f"Document: {days} days, {len(payload) / 1e6:.1f} MB")
+
+    results = {}
+    for name, fn in (('legacy', legacy_parse), ('streaming', streaming_parse)):
+        df, secs, peak = measure(fn, payload)
+        results[name] = df
+        print(f"{name:>10}: {len(df):>7} rows  {secs * 1000:8.1f} ms  "
+              f"{len(df) / secs:>10,.0f} rows/s  peak {peak / 1e6:6.1f} MB")
+
+    legacy, streaming = results['legacy'], results['streaming']
+    assert np.allclose(legacy['price'].to_numpy(), streaming['price'].to_numpy())
+
+
+if __name__ == "__main__":
+    main()
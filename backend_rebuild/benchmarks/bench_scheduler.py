@@ -0,0 +1,58 @@
+"""
+Scheduler latency: one day of PT15M prices (entsoe_se4.xml) and a batch of
+EV chargers, heat pumps and home batteries solved per zone in one call each.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_scheduler.py [devices]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+from entsoe_parser import parse_timeseries
+from load_scheduler import schedule_battery, schedule_shiftable
+
+
+def timed(label, fn, devices):
+    fn()
+    t0 = time.perf_counter()
+    result = fn()
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"  {label:<28} {ms:8.1f} ms  {devices / ms * 1000:>10,.0f} devices/s  "
+          f"feasible {result.feasible.mean():.0%}  mean cost {np.nanmean(result.cost):7.3f} €")
+
+
+def main():
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    _, prices = parse_timeseries(os.path.join(ROOT, 'entsoe_se4.xml'))
+    rng = np.random.default_rng(0)
+    print(f"{devices} devices per type, {len(prices)} slots")
+
+    timed('EV charging', lambda: schedule_shiftable(
+        prices,
+        power_kw=rng.choice([3.7, 7.4, 11.0], devices),
+        energy_kwh=rng.uniform(5, 40, devices),
+        release=rng.integers(0, 24, devices),
+        deadline=rng.integers(64, 97, devices),
+    ), devices)
+    timed('heat pumps (1h min run)', lambda: schedule_shiftable(
+        prices,
+        power_kw=rng.uniform(2, 6, devices),
+        energy_kwh=rng.uniform(10, 40, devices),
+        min_block=4,
+    ), devices)
+    timed('home batteries', lambda: schedule_battery(
+        prices,
+        capacity_kwh=rng.uniform(5, 15, devices),
+        power_kw=5.0,
+        soc_kwh=rng.uniform(0, 5, devices),
+    ), devices)
+
+
+if __name__ == "__main__":
+    main()
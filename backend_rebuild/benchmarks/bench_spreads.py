@@ -0,0 +1,73 @@
+"""
+Spread analytics benchmark: a year of synthetic prices for every registered
+bidding zone, with coupling statistics computed pair by pair in a Python loop
+over pandas Series (the straightforward way) and for all pairs at once with
+spread_analytics. Also times the top divergences over all pairs and over
+real borders only.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_spreads.py [days] [PT60M|PT15M]
+"""
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import zone_registry
+from spread_analytics import coupling_stats, top_divergences
+from synthetic import generate_prices
+
+
+def legacy_pairs(zones, matrix, tol=0.01):
+    series = {zone: pd.Series(row) for zone, row in zip(zones, matrix)}
+    rows = []
+    for a, b in itertools.combinations(zones, 2):
+        spread = series[a] - series[b]
+        rows.append((a, b, spread.mean(), spread.abs().mean(), spread.std(ddof=0), spread.abs().max(),
+                     (spread.abs() <= tol).mean(), series[a].corr(series[b])))
+    return rows
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    secs = time.perf_counter() - t0
+    print(f"  {label:<34} {secs * 1000:10.1f} ms")
+    return secs, result
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    resolution = sys.argv[2] if len(sys.argv) > 2 else 'PT60M'
+    zones = list(zone_registry.ZONES)
+    market = generate_prices(zones, '2024-01-01', days=days, resolution=resolution, seed=3)
+    pairs = len(zones) * (len(zones) - 1) // 2
+    print(f"{len(zones)} zones ({pairs} pairs) x {market.prices.shape[1]:,} {resolution} steps")
+
+    old, legacy = timed('pandas loop over pairs', lambda: legacy_pairs(zones, market.prices))
+    new, stats = timed('coupling_stats (all pairs)', lambda: coupling_stats(zones, market.prices))
+    timed('top 50 divergences, all pairs', lambda: top_divergences(market.prices, 50))
+    borders = zone_registry.border_index(zones)
+    _, top = timed(f'top 50 divergences, {len(borders[0])} borders',
+                   lambda: top_divergences(market.prices, 50, borders))
+    print(f"  speedup {old / new:.0f}x")
+
+    index = {zone: k for k, zone in enumerate(zones)}
+    for a, b, mean, mean_abs, std, max_abs, coupled, corr in legacy:
+        i, j = index[a], index[b]
+        assert np.allclose([mean, mean_abs, std, max_abs, coupled, corr],
+                           [stats.mean[i, j], stats.mean_abs[i, j], stats.std[i, j], stats.max_abs[i, j],
+                            stats.coupled_share[i, j], stats.correlation[i, j]])
+    a, b, t = top.a[0], top.b[0], top.time[0]
+    print(f"  largest border spread: {zones[a]}-{zones[b]} {top.spread[0]:.2f} €/MWh "
+          f"at {market.timestamps[t]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Grid stress benchmark: a year of PT15M prices and PT60M load for every
+registered zone, scored point by point the way the frontend does
+(calculateGridStress per value, load looked up per hour) and with
+grid_stress.build_stress over all zones at once. Then the stored path:
+the extra cost of keeping grid_stress up to date in save_prices/save_load,
+and reading a year of stress back against recomputing it from prices and load.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_stress.py [days]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import zone_registry
+from database import DatabaseManager
+from entsoe_parser import to_frame
+from grid_stress import build_stress
+from synthetic import generate_load, generate_prices
+
+
+def calculate_grid_stress(price, load, max_load=25000):
+    """Line-by-line port of calculateGridStress (src/utils/GridStress.ts)."""
+    price_factor = min(price / 200, 1)
+    load_factor = min(load / max_load, 1)
+    raw = (price_factor * 0.4 + load_factor * 0.6) * 100
+    level = 'LOW'
+    if raw > 80:
+        level = 'CRITICAL'
+    elif raw > 60:
+        level = 'HIGH'
+    elif raw > 40:
+        level = 'MODERATE'
+    return raw, level
+
+
+def legacy(zones, prices, load):
+    out = []
+    for z in range(len(zones)):
+        hourly = dict(zip(load.timestamps.tolist(), load.prices[z].tolist()))
+        for ts, price in zip(prices.timestamps.tolist(), prices.prices[z].tolist()):
+            hour = ts.replace(minute=0)
+            out.append(calculate_grid_stress(price, hourly[hour]))
+    return out
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    secs = time.perf_counter() - t0
+    print(f"  {label:<38} {secs * 1000:9.1f} ms")
+    return secs, result
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    zones = list(zone_registry.ZONES)
+    prices = generate_prices(zones, '2024-01-01', days=days, resolution='PT15M', seed=7)
+    load = generate_load(zones, '2024-01-01', days=days, resolution='PT60M', seed=7)
+    print(f"{len(zones)} zones x {days} days, PT15M prices, PT60M load")
+
+    old, points = timed('per point (frontend port)', lambda: legacy(zones, prices, load))
+    new, frame = timed('build_stress, all zones', lambda: build_stress(
+        {z: (prices.timestamps, row) for z, row in zip(zones, prices.prices)},
+        {z: (load.timestamps, row) for z, row in zip(zones, load.prices)}))
+    print(f"  speedup {old / new:.0f}x")
+    assert np.allclose([raw for raw, _ in points], frame.index.ravel())
+
+    sample = zone_registry.DEFAULT_ZONES
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, with_load in (('save_prices, no load stored', False), ('save_load + save_prices', True)):
+            db = DatabaseManager(os.path.join(tmp, f'{with_load}.db'), archive_path=os.path.join(tmp, 'archive'))
+            t0 = time.perf_counter()
+            for zone in sample:
+                if with_load:
+                    db.save_load(zone, load.timestamps, load.prices[zones.index(zone)])
+                db.save_prices(zone, to_frame(prices.timestamps, prices.prices[zones.index(zone)]))
+            print(f"  {label:<38} {(time.perf_counter() - t0) * 1000:9.1f} ms  ({len(sample)} zones)")
+            if not with_load:
+                db.close()
+
+        timed('get_grid_stress (stored)', lambda: db.get_grid_stress(sample))
+        _, high = timed('get_grid_stress, HIGH and above', lambda: db.get_grid_stress(sample, min_level=2))
+
+        def recompute():
+            p = {zone: (df['timestamp'].to_numpy(), df['price'].to_numpy())
+                 for zone in sample for df in [db.get_prices(zone)]}
+            l = {zone: (df['timestamp'].to_numpy(), df['forecast'].to_numpy())
+                 for zone in sample for df in [db.get_load(zone)]}
+            return build_stress(p, l)
+        _, fresh = timed('get_prices + get_load + build_stress', recompute)
+        stored = db.get_grid_stress(sample)
+        assert np.allclose(stored.index, fresh.index, equal_nan=True)
+        assert (stored.level == fresh.level).all()
+        print(f"  {int((high.level >= 2).sum())} HIGH/CRITICAL steps of {stored.index.size}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+End-to-end benchmark suite on synthetic market data: parse, store, query,
+analyze and map render for every zone at 1 day, 1 year and 10 years of PT15M
+prices. Data comes from synthetic.generate_prices with a fixed seed, so runs
+on different machines or commits see exactly the same input.
+
+Each stage reports wall time (best of --repeat), throughput in points per
+second and peak Python allocations (tracemalloc, measured in a separate run so
+it does not inflate the timings). Results are written as JSON; pass an earlier
+file to --compare to flag stages that got slower or bigger.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_suite.py [--sizes 1d,1y,10y]
+        [--save results.json] [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import geometry
+from data_loader import EntsoeLoader
+from database import DatabaseManager
+from entsoe_parser import parse_timeseries, to_frame
+from map_visualization import EllevioMapGenerator
+from price_analytics import cheapest_window, threshold_summary, top_n
+from synthetic import generate_prices, to_entsoe_xml
+from zone_registry import DEFAULT_ZONES
+
+GEOJSON = os.path.join(ROOT, 'backend_rebuild', 'src', 'assets', 'data', 'zones.json')
+RESULTS = os.path.join(ROOT, 'backend_rebuild', 'benchmarks', 'results', 'latest.json')
+SIZES = {'1d': 1, '1y': 365, '10y': 3650}
+RESOLUTION = 'PT15M'
+STEPS_PER_DAY = 96
+SEED = 2024
+
+
+def measure(fn, setup=lambda: None, repeat=3):
+    """Best wall time over `repeat` runs and peak traced allocations of one extra run."""
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    arg = setup()
+    tracemalloc.start()
+    fn(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+class Workload:
+    """One size of the suite: the synthetic market, its XML documents and a scratch database."""
+
+    def __init__(self, days, tmp):
+        self.zones = list(DEFAULT_ZONES)
+        self.market = generate_prices(self.zones, '2015-01-01', days=days, resolution=RESOLUTION, seed=SEED)
+        self.documents = [to_entsoe_xml(self.market.timestamps, row, EntsoeLoader.ZONES[zone], RESOLUTION)
+                          for zone, row in zip(self.zones, self.market.prices)]
+        self.frames = [to_frame(self.market.timestamps, row) for row in self.market.prices]
+        self.tmp = tmp
+        self.db_path = None
+        self._dbs = 0
+
+    @property
+    def points(self):
+        return self.market.prices.size
+
+    def fresh_db(self):
+        self._dbs += 1
+        self.db_path = os.path.join(self.tmp, f'bench_{self._dbs}.db')
+        return self.db_path
+
+    # --- Stages ------------------------------------------------------------
+
+    def parse(self, _):
+        for document in self.documents:
+            parse_timeseries(document, value_tag='price.amount')
+
+    def store(self, path):
+        with DatabaseManager(path) as db:
+            for zone, df in zip(self.zones, self.frames):
+                db.save_prices(zone, df)
+
+    def query(self, _):
+        with DatabaseManager(self.db_path) as db:
+            for zone in self.zones:
+                db.get_prices(zone)
+                db.get_price_aggregates(zone, 'month', percentiles=(0.1, 0.5, 0.9))
+
+    def analyze(self, _):
+        cube = self.market.prices.reshape(len(self.zones), -1, STEPS_PER_DAY)
+        top_n(cube, 5)
+        cheapest_window(cube, 3 * 4)
+        threshold_summary(cube, 100.0)
+
+    def render(self, generator):
+        means = dict(zip(self.zones, self.market.prices.mean(axis=1)))
+        generator.generate_map(means).get_root().render()
+
+
+def run_size(label, days, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        geometry.CACHE_DIR = os.path.join(tmp, 'geometry_cache')
+        t0 = time.perf_counter()
+        work = Workload(days, tmp)
+        generate = time.perf_counter() - t0
+        xml_bytes = sum(len(d) for d in work.documents)
+        print(f"\n{label}: {len(work.zones)} zones x {days} days = {work.points:,} points, "
+              f"{xml_bytes / 2**20:.1f} MiB XML (generated in {generate * 1000:.0f} ms)")
+
+        generator = EllevioMapGenerator(GEOJSON)
+        generator.generate_map({z: 0.0 for z in work.zones})     # Warm the geometry cache
+        # Storing is the slowest stage; large sizes run it once
+        store_repeat = repeat if days <= 365 else 1
+        stages = (
+            ('parse', work.parse, lambda: None, repeat),
+            ('store', work.store, work.fresh_db, store_repeat),
+            ('query', work.query, lambda: None, repeat),
+            ('analyze', work.analyze, lambda: None, repeat),
+            ('render', work.render, lambda: generator, repeat),
+        )
+        results = {}
+        for name, fn, setup, n in stages:
+            with contextlib.redirect_stdout(io.StringIO()):
+                secs, peak = measure(fn, setup, n)
+            results[name] = {'seconds': secs, 'points_per_second': work.points / secs, 'peak_bytes': peak}
+            print(f"  {name:<8} {secs * 1000:10.1f} ms  {work.points / secs:>14,.0f} points/s  "
+                  f"peak {peak / 2**20:8.1f} MiB")
+        return {'days': days, 'zones': len(work.zones), 'points': work.points, 'stages': results}
+
+
+def compare(current, baseline, threshold):
+    """Prints time and memory ratios against a saved run; returns the regressed (size, stage, metric) list."""
+    regressions = []
+    print(f"\nAgainst {baseline['created']} ({baseline.get('commit') or 'unknown commit'}):")
+    for size, result in current['sizes'].items():
+        old = baseline['sizes'].get(size)
+        if old is None:
+            continue
+        for stage, now in result['stages'].items():
+            before = old['stages'].get(stage)
+            if before is None:
+                continue
+            time_ratio = now['seconds'] / before['seconds']
+            mem_ratio = now['peak_bytes'] / max(before['peak_bytes'], 1)
+            flags = []
+            if time_ratio > 1 + threshold:
+                flags.append('SLOWER')
+                regressions.append((size, stage, 'seconds'))
+            if mem_ratio > 1 + threshold:
+                flags.append('MORE MEMORY')
+                regressions.append((size, stage, 'peak_bytes'))
+            print(f"  {size:>4} {stage:<8} time x{time_ratio:5.2f}  memory x{mem_ratio:5.2f}  {' '.join(flags)}")
+    return regressions
+
+
+def git_commit():
+    head = os.path.join(ROOT, '.git', 'HEAD')
+    try:
+        with open(head) as f:
+            ref = f.read().strip()
+        if ref.startswith('ref: '):
+            with open(os.path.join(ROOT, '.git', ref[5:])) as f:
+                return f.read().strip()[:12]
+        return ref[:12]
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GridWatch benchmark suite")
+    parser.add_argument('--sizes', default=','.join(SIZES), help=f"comma-separated subset of {list(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', default=RESULTS, help="where to write the JSON results")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    current = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'sizes': {},
+    }
+    for label in args.sizes.split(','):
+        current['sizes'][label] = run_size(label, SIZES[label], args.repeat)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+    with open(args.save, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Time map benchmark: every quarter-hour of a day for all registered zones as
+96 separate price maps (one generate_map per timestep, geometry re-embedded
+each time) against one generate_time_map file, then a week and a month in
+one file. Also compares the encoded price payload with plain JSON floats.
+
+Run from the repository root:
+    python backend_rebuild/benchmarks/bench_time_map.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'backend_rebuild', 'src'))
+
+import geometry
+import zone_registry
+from map_visualization import EllevioMapGenerator
+from synthetic import generate_prices
+from time_map import decode_frames, encode_frames
+
+GEOJSON = os.path.join(ROOT, 'src', 'assets', 'data', 'zones.json')
+
+
+def render(m):
+    return len(m.get_root().render())
+
+
+def main():
+    warnings.simplefilter('ignore')  # folium warns about CartoDB tile keys on every map
+    geometry.CACHE_DIR = tempfile.mkdtemp()
+    zones = list(zone_registry.ZONES)
+    generator = EllevioMapGenerator(GEOJSON)
+    generator.generate_map({zone: 0.0 for zone in zones})   # Warm the geometry cache for both paths
+
+    day = generate_prices(zones, '2024-01-01', days=1, resolution='PT15M', seed=5)
+    t0 = time.perf_counter()
+    size = sum(render(generator.generate_map(dict(zip(zones, day.prices[:, t])))) for t in range(len(day.timestamps)))
+    old = time.perf_counter() - t0
+    print(f"{len(zones)} zones, PT15M")
+    print(f"  {len(day.timestamps)} maps, one per step    {old * 1000:8.0f} ms  {size / 1024:9.0f} KiB")
+
+    for label, days in (('1 day', 1), ('1 week', 7), ('1 month', 30)):
+        market = day if days == 1 else generate_prices(zones, '2024-01-01', days=days, resolution='PT15M', seed=5)
+        t0 = time.perf_counter()
+        size = render(generator.generate_time_map(zones, market.timestamps, market.prices))
+        secs = time.perf_counter() - t0
+        payload = encode_frames(market.timestamps, market.prices)
+        plain = len(json.dumps(market.prices.round(2).tolist()))
+        print(f"  time map, {label:<7} ({market.prices.shape[1]:5d} steps) {secs * 1000:6.0f} ms  "
+              f"{size / 1024:9.0f} KiB   prices {len(payload['p']) / 1024:6.0f} KiB vs {plain / 1024:6.0f} KiB JSON")
+        if days == 1:
+            print(f"  speedup {old / secs:.0f}x")
+        _, decoded = decode_frames(payload)
+        assert abs(decoded - market.prices.round(2)).max() < 1e-9
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,180 @@
+import argparse
 import sys
 import os
-import pandas as pd
+from datetime import datetime, timedelta
+
+import numpy as np
 
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.data_loader import EntsoeLoader
 from src.database import DatabaseManager
+from src.alert_rules import AlertEngine, load_rules, to_records
 from src.analysis import SmartGridAnalyzer
+from src.anomaly_detector import StreamingAnomalyDetector
+from src.response_cache import ResponseCache
 from src.map_visualization import EllevioMapGenerator
+from src.ingest_daemon import IngestDaemon
+from src.metrics import Metrics, profile
+from src.grid_stress import LEVELS
+from src.hot_store import HOT_PATH, HotStore
+from src.price_forecast import PriceForecaster
+from src.zone_registry import DEFAULT_ZONES
 
 def main():
+    parser = argparse.ArgumentParser(description="GridWatch backend")
+    parser.add_argument('--daemon', action='store_true', help="poll around the day-ahead publication")
+    parser.add_argument('--metrics', metavar='PATH', help="write Prometheus text metrics to PATH")
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'], help="profile this run")
+    parser.add_argument('--profile-out', metavar='PATH', help="also dump the raw profile to PATH")
+    parser.add_argument('--rules', metavar='PATH', help="alert rules (JSON) instead of the built-in high-price rule")
+    parser.add_argument('--hot', metavar='PATH', nargs='?', const=HOT_PATH,
+                        help=f"keep recent series in a shared hot store for other workers (default {HOT_PATH})")
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    with profile(args.profile, args.profile_out):
+        run(args, metrics)
+    if args.metrics:
+        metrics.write_prometheus(args.metrics)
+        print(f"📈 Metrics sparade i '{args.metrics}'.")
+
+def run(args, metrics):
     print("\n--- ⚡️ STARTING GRIDWATCH BACKEND (Ellevio Style) ⚡️ ---\n")
 
     # 1. Init Components
     try:
-        loader = EntsoeLoader()
-        db = DatabaseManager()
+        cache = ResponseCache()
+        loader = EntsoeLoader(cache=cache, metrics=metrics)
+        db = DatabaseManager(metrics=metrics)
+        detector = StreamingAnomalyDetector(db)
+        db.add_listener(detector.on_prices_saved) # Scores every saved batch incrementally
+        forecaster = PriceForecaster(db)
+        db.add_listener(forecaster.on_prices_saved) # Learns each completed day as it is stored
+        if args.hot:
+            hot = HotStore.create(args.hot)
+            hot.fill(db)
+            hot.listen(db) # Workers attached to the hot store see every committed batch
+            print(f"🔥 Hot store: {args.hot} ({len(hot.zones)} zoner, {hot.steps * hot.step // 86400} dygn)")
         map_gen = EllevioMapGenerator("src/assets/data/zones.json") # Pointing to existing asset
+        rules = load_rules(args.rules) if args.rules else None
+        alert_engine = AlertEngine(rules)
         print("✅ System initialized.")
     except Exception as e:
         print(f"❌ Init failed: {e}")
         return
 
     # 2. Process Zones
-    zones = ['SE1', 'SE2', 'SE3', 'SE4']
+    zones = list(DEFAULT_ZONES)
+
+    if args.daemon:
+        # Resident mode: poll around the day-ahead publication instead of one full run
+        daemon = IngestDaemon(loader, db, zones, map_gen=map_gen, metrics=metrics, metrics_path=args.metrics,
+                              rules=rules)
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            daemon.stop()
+        finally:
+            db.close()
+            cache.close()
+        return
     current_prices = {}
+    series = {}  # Prices per zone, for the alert rules over all zones at once
+
+    # All zones are requested concurrently (prices and load); each is processed as soon as it arrives
+    for result in loader.fetch_many(zones, document_types=('A44', 'A65')):
+        zone = result.zone
+        if result.document_type == 'A65':
+            # Load only feeds the grid stress index, which the database keeps up to date
+            if result.error is None:
+                db.save_load(zone, *loader.map_load(result.content, zone))
+            else:
+                print(f"   ⚠️ Last för {zone} saknas ({result.error}).")
+            continue
 
-    for zone in zones:
         print(f"\n📡 Bearbetar zon {zone}...")
         
         # A. Fetch Data
-        df = loader.fetch_day_ahead_prices(zone)
+        if result.error is not None:
+            print(f"   ⚠️ Hämtning misslyckades ({result.error}). Använder mockdata.")
+            df = loader._generate_mock_data(datetime.now(), zone)
+        else:
+            df = loader.map_xml_to_df(result.content, zone)
         
         if df is not None and not df.empty:
             # B. Save History
-            db.save_prices(zone, df)
+            try:
+                db.save_prices(zone, df)
+            except Exception as e:
+                print(f"   ❌ Kunde inte spara {zone}: {e}")  # Counted as a store error
             
             # C. Capture current price (simplified: average or first for demo map)
             avg_price = df['price'].mean()
             current_prices[zone] = avg_price
+            series[zone] = (df['timestamp'].to_numpy(), df['price'].to_numpy())
             
             # D. Smart Analysis
-            cheapest = SmartGridAnalyzer.find_cheapest_hours(df)
+            with metrics.stage('analyze', zone):
+                cheapest = SmartGridAnalyzer.find_cheapest_hours(df)
+                block = SmartGridAnalyzer.find_cheapest_window(df, hours=3)
             print(f"   📉 Billigaste timmarna imorgon ({zone}):")
             for _, row in cheapest.iterrows():
                 print(f"      🕒 {row['timestamp'].strftime('%H:%M')} - {row['price']:.2f} €")
-                
-            # E. Alerts
-            alerts = SmartGridAnalyzer.check_market_alerts(df, zone, db)
-            if alerts:
-                 print(f"   🚨 {alerts[0]}")
+
+            if not block.empty:
+                print(f"   🔌 Billigaste 3h-blocket: {block['timestamp'].iloc[0].strftime('%H:%M')} "
+                      f"(snitt {block['price'].mean():.2f} €)")
         else:
             print("   ⚠️ Ingen data mottagen.")
             current_prices[zone] = 0 # Fallback
 
+    # Alerts: every rule over all zones in one pass (spread rules need them together), one batch write
+    with metrics.stage('alerts'):
+        alerts = alert_engine.evaluate_series(series)
+    if alerts:
+        db.log_alerts(to_records(alerts))
+    else:
+        print("\n✅ Inga larm.")
+
+    # Grid stress for the day, from prices and load stored above
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    stress = db.get_grid_stress(zones, today, today + timedelta(days=1))
+    for zone, index, level in zip(stress.zones, stress.index, stress.level):
+        if (level >= 0).any():
+            peak = int(np.nanargmax(index))
+            print(f"⚡ Nätbelastning {zone}: max {index[peak]:.0f} ({LEVELS[level[peak]]}) "
+                  f"kl {stress.timestamps[peak].astype(datetime).strftime('%H:%M')}")
+
+    # Week-ahead outlook from the incrementally trained forecaster
+    outlook = forecaster.forecast(zones)
+    for zone, values in zip(outlook.zones, outlook.values):
+        daily = np.nanmean(values.reshape(-1, 24), axis=1)
+        if not np.isnan(daily).all():
+            print(f"🔮 Prognos {zone} från {outlook.days[0].astype(datetime).strftime('%d/%m')}: "
+                  + " ".join(f"{p:.0f}" for p in daily) + " €/MWh (dygnssnitt)")
+
+    # Persist any buffered alerts
+    db.close()
+    stats = cache.stats()
+    print(f"\n📦 Cache: {stats['hits']} träffar, {stats['misses']} missar")
+
     # 3. Generate Map
     print("\n🗺️ Genererar interaktiv karta...")
-    m = map_gen.generate_map(current_prices)
+    output_file = "elpriser_karta.html"
+    with metrics.stage('render'):
+        m = map_gen.generate_map(current_prices)
+        if m:
+            m.save(output_file)
     
     if m:
-        output_file = "elpriser_karta.html"
-        m.save(output_file)
         print(f"✅ Karta sparad som '{output_file}'. Öppna denna i din webbläsare.")
 
+    # 4. Where the time went
+    print("\n⏱️ Tidsåtgång per steg:")
+    for line in metrics.summary():
+        print(f"   {line}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,399 @@
+"""
+Declarative price alert rules, evaluated as masks over (zones x timesteps).
+
+A rule is a plain dict, so rule sets can live in a JSON file (load_rules):
+
+    {"name": "high_price", "kind": "threshold", "above": 100,
+     "hysteresis": 5, "cooldown_minutes": 720,
+     "overrides": {"SE1": {"above": 80}, "DE": {"enabled": false}}}
+
+Kinds, each compared with "above" or "below":
+
+- threshold: the price (€/MWh)
+- negative: the price below 0 (or below "below")
+- percentile: the price against the zone's own q-th percentile over the
+  evaluated window ("above": 95 flags the top 5 %)
+- ramp: the price change in €/MWh per hour, "above": 50 for rises and
+  "below": -50 for falls
+- spread: |price[a] - price[b]| above a value, for the zone pairs in
+  "zones" (e.g. ["SE3/SE4"]) or else every border in zone_registry.BORDERS
+  between the evaluated zones
+
+Optional keys: level (stored alert level, default per kind), message (a
+format string with zone, value, threshold, time and rule), zones (only
+these zones or pairs), overrides per zone or pair ("above"/"below",
+"hysteresis", "enabled"), hysteresis (once raised, an alert only clears
+when the value is back past the threshold by this much) and
+cooldown_minutes (no new alert for the same rule and zone within this time
+of the previous one).
+
+AlertEngine groups the rules by the series they read (price, ramp rate,
+spread), stacks their per-zone thresholds into (rules x zones) arrays and
+evaluates each group with one broadcast comparison over (rules x zones x
+timesteps). Hysteresis needs no time loop: every step either raises,
+clears or keeps the state, so carrying the index of the last deciding step
+forward (np.maximum.accumulate) gives the state everywhere. Only the rising
+edges, usually a handful, are visited in Python for cooldown and the
+alert text. The engine keeps its state between calls, so windows that
+overlap or continue earlier ones do not alert twice: steps an earlier call
+already evaluated keep the state it ended in, and later steps continue
+from there. persist/restore keep that state in grid_history.db (table
+alert_state) next to the alerts, so separate runs continue each other too.
+"""
+import json
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+from grid_stress import to_grid
+from zone_registry import BORDERS
+
+KINDS = ('threshold', 'negative', 'percentile', 'ramp', 'spread')
+SIGNALS = {'threshold': 'price', 'negative': 'price', 'percentile': 'price', 'ramp': 'ramp', 'spread': 'spread'}
+
+# Default level and message per (kind, above); also the directions each kind supports.
+LEVELS = {
+    ('threshold', True): 'HIGH_PRICE',
+    ('threshold', False): 'LOW_PRICE',
+    ('negative', False): 'NEGATIVE_PRICE',
+    ('percentile', True): 'HIGH_PRICE',
+    ('percentile', False): 'LOW_PRICE',
+    ('ramp', True): 'PRICE_RAMP',
+    ('ramp', False): 'PRICE_RAMP',
+    ('spread', True): 'PRICE_SPREAD',
+}
+MESSAGES = {
+    ('threshold', True): "Högprisvarning i {zone}: {value:.2f} €/MWh",
+    ('threshold', False): "Lågprisvarning i {zone}: {value:.2f} €/MWh",
+    ('negative', False): "Negativt pris i {zone}: {value:.2f} €/MWh",
+    ('percentile', True): "Ovanligt högt pris i {zone}: {value:.2f} €/MWh (gräns {threshold:.2f})",
+    ('percentile', False): "Ovanligt lågt pris i {zone}: {value:.2f} €/MWh (gräns {threshold:.2f})",
+    ('ramp', True): "Snabb prisökning i {zone}: {value:+.2f} €/MWh per timme",
+    ('ramp', False): "Snabbt prisfall i {zone}: {value:+.2f} €/MWh per timme",
+    ('spread', True): "Prisskillnad {zone}: {value:.2f} €/MWh",
+}
+OVERRIDE_KEYS = {'above', 'below', 'hysteresis', 'enabled'}
+NEVER = np.iinfo(np.int64).min // 2   # "Last alert" of a rule and zone that never fired
+
+# value/threshold are in the rule's units (€/MWh, or €/MWh per hour for ramps); above is the direction.
+Rule = namedtuple('Rule', ['name', 'kind', 'above', 'value', 'level', 'message', 'hysteresis',
+                           'cooldown', 'zones', 'overrides'])
+
+# One raised alert; zone is "A/B" for spreads, time (datetime64[s]) the first step past the
+# threshold and value the extreme of the episode it starts.
+Alert = namedtuple('Alert', ['rule', 'zone', 'level', 'time', 'value', 'threshold', 'message'])
+
+
+def _pair(key):
+    """'SE3/SE4' or ('SE3', 'SE4') -> 'SE3/SE4' (zone codes may contain '-')."""
+    a, b = key.split('/') if isinstance(key, str) else key
+    return f"{a}/{b}"
+
+
+def parse_rule(spec):
+    """Validates a rule dict and returns a Rule. Raises ValueError naming the rule."""
+    name = spec.get('name')
+    if not name:
+        raise ValueError(f"Alert rule without a name: {spec!r}")
+    kind = spec.get('kind', 'threshold')
+    if kind not in KINDS:
+        raise ValueError(f"Alert rule {name}: unknown kind {kind!r} (expected one of {', '.join(KINDS)})")
+    if kind == 'negative' and 'above' not in spec:
+        spec = {**spec, 'below': spec.get('below', 0.0)}
+    if ('above' in spec) == ('below' in spec):
+        raise ValueError(f"Alert rule {name}: give exactly one of 'above' or 'below'")
+    above = 'above' in spec
+    if (kind, above) not in LEVELS:
+        raise ValueError(f"Alert rule {name}: {kind} rules take '{'below' if above else 'above'}'")
+    value = float(spec['above' if above else 'below'])
+    if kind == 'percentile' and not 0 <= value <= 100:
+        raise ValueError(f"Alert rule {name}: percentile must be within 0-100, got {value:g}")
+
+    key = _pair if kind == 'spread' else str
+    overrides = {}
+    for zone, override in spec.get('overrides', {}).items():
+        unknown = set(override) - OVERRIDE_KEYS
+        if unknown or ('below' if above else 'above') in override:
+            raise ValueError(f"Alert rule {name}: bad override for {zone}: {override!r}")
+        limit = float(override.get('above' if above else 'below', value))
+        if kind == 'percentile' and not 0 <= limit <= 100:
+            raise ValueError(f"Alert rule {name}: percentile for {zone} must be within 0-100, got {limit:g}")
+        overrides[key(zone)] = (
+            limit,
+            float(override.get('hysteresis', spec.get('hysteresis', 0.0))),
+            bool(override.get('enabled', True)),
+        )
+    zones = spec.get('zones')
+    return Rule(
+        name=name,
+        kind=kind,
+        above=above,
+        value=value,
+        level=spec.get('level', LEVELS[kind, above]),
+        message=spec.get('message', MESSAGES[kind, above]),
+        hysteresis=float(spec.get('hysteresis', 0.0)),
+        cooldown=int(float(spec.get('cooldown_minutes', 0)) * 60),
+        zones=None if zones is None else frozenset(key(z) for z in zones),
+        overrides=overrides,
+    )
+
+
+def default_rules(price_threshold=100.0):
+    """The built-in rule set: one high-price alert per zone and half day above price_threshold."""
+    return [{'name': 'high_price', 'kind': 'threshold', 'above': price_threshold, 'cooldown_minutes': 720}]
+
+
+def load_rules(path):
+    """Rule dicts from a JSON file holding a list of rules (or {"rules": [...]})."""
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    return rules['rules'] if isinstance(rules, dict) else rules
+
+
+def stack(series):
+    """
+    {zone: (timestamps, prices)} -> (zones, epoch-second grid, zones x
+    timesteps matrix) at the finest resolution among the series; coarser
+    series are held over the steps they cover (see grid_stress.to_grid).
+    """
+    zones = list(series)
+    stamps = [np.asarray(ts).astype('datetime64[s]').astype(np.int64) for ts, _ in series.values()]
+    present = [ts for ts in stamps if len(ts)]
+    if not present:
+        return zones, np.empty(0, dtype=np.int64), np.empty((len(zones), 0))
+    steps = [np.diff(np.unique(ts)) for ts in present]
+    step = int(min((d.min() if len(d) else 3600) for d in steps))
+    start = min(int(ts.min()) for ts in present)
+    n = (max(int(ts.max()) for ts in present) - start) // step + 1
+    matrix = np.vstack([to_grid(ts, prices, start, step, n) for ts, (_, prices) in zip(stamps, series.values())])
+    return zones, start + np.arange(n, dtype=np.int64) * step, matrix
+
+
+def to_records(alerts):
+    """(zone, message, level) tuples for DatabaseManager.log_alerts."""
+    return [(a.zone, a.message, a.level) for a in alerts]
+
+
+class AlertEngine:
+    """Evaluates a rule set over price matrices, keeping hysteresis and cooldown state between calls."""
+
+    def __init__(self, rules=None):
+        rules = default_rules() if rules is None else rules
+        self.rules = [rule if isinstance(rule, Rule) else parse_rule(rule) for rule in rules]
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate alert rule names: {sorted({n for n in names if names.count(n) > 1})}")
+        self.groups = {}
+        for rule in self.rules:
+            self.groups.setdefault(SIGNALS[rule.kind], []).append(rule)
+        self._compiled = {}   # (signal, rows) -> per-rule, per-row threshold arrays
+        self._state = {}      # (signal, row) -> last time with a value, raised flags and last alert times per rule
+
+    def _rows(self, signal, rules, zones):
+        """Row keys of a signal: zones, or the zone pairs the spread rules ask for."""
+        if signal != 'spread':
+            return tuple(zones)
+        present = set(zones)
+        wanted = set()
+        for rule in rules:
+            wanted |= rule.zones if rule.zones is not None else {_pair(b) for b in BORDERS}
+        return tuple(sorted(p for p in wanted if set(p.split('/')) <= present))
+
+    def _compile(self, signal, rules, rows):
+        """
+        (sign, value, hysteresis, percentile) arrays of shape (rules x rows):
+        comparisons become sign * x > sign * value, so below-rules share the
+        code of above-rules. Disabled rows get an infinite threshold.
+        """
+        key = (signal, rows)
+        if key not in self._compiled:
+            sign = np.array([1.0 if rule.above else -1.0 for rule in rules])[:, None]
+            value = np.repeat([[rule.value] for rule in rules], len(rows), axis=1)
+            hysteresis = np.repeat([[rule.hysteresis] for rule in rules], len(rows), axis=1)
+            enabled = np.ones(value.shape, dtype=bool)
+            column = {row: c for c, row in enumerate(rows)}
+            for r, rule in enumerate(rules):
+                if rule.zones is not None:
+                    enabled[r] = [row in rule.zones for row in rows]
+                for row, override in rule.overrides.items():
+                    if row in column:
+                        c = column[row]
+                        value[r, c], hysteresis[r, c] = override[:2]
+                        enabled[r, c] &= override[2]
+            percentile = np.array([rule.kind == 'percentile' for rule in rules])
+            value = np.where(enabled | percentile[:, None], value, np.inf * sign)
+            self._compiled[key] = (sign, value, hysteresis, enabled, percentile)
+        return self._compiled[key]
+
+    @staticmethod
+    def _signal(signal, zones, ts, matrix, rows):
+        if signal == 'price':
+            return matrix
+        if signal == 'ramp':
+            values = np.full(matrix.shape, np.nan)
+            values[:, 1:] = np.diff(matrix, axis=1) / (np.diff(ts) / 3600.0)
+            return values
+        index = {zone: i for i, zone in enumerate(zones)}
+        a = [index[row.split('/')[0]] for row in rows]
+        b = [index[row.split('/')[1]] for row in rows]
+        return np.abs(matrix[a] - matrix[b])
+
+    def evaluate(self, zones, timestamps, matrix):
+        """
+        Alerts raised by every rule over a (zones x timesteps) price matrix
+        on a regular grid (timestamps as epoch seconds or datetime64),
+        sorted by time. Steps of a zone (or pair) at or before its last value
+        in earlier calls are not alerted again, whichever zones those calls
+        covered.
+        """
+        zones = tuple(zones)
+        ts = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(len(zones), len(ts))
+        alerts = []
+        if not len(ts):
+            return alerts
+        for signal, rules in self.groups.items():
+            rows = self._rows(signal, rules, zones)
+            if rows:
+                alerts.extend(self._evaluate(signal, rules, rows, zones, ts, matrix))
+        alerts.sort(key=lambda item: item[:3])
+        return [alert for *_, alert in alerts]
+
+    def _evaluate(self, signal, rules, rows, zones, ts, matrix):
+        """(epoch time, zone, rule, Alert) for one signal group."""
+        sign, value, hysteresis, enabled, percentile = self._compile(signal, rules, rows)
+        values = self._signal(signal, zones, ts, matrix, rows)
+        if percentile.any():
+            value = value.copy()
+            q = value[percentile]
+            levels = np.unique(q)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)   # All-NaN rows
+                bounds = np.nanpercentile(values, levels, axis=1)
+            limit = bounds[np.searchsorted(levels, q), np.arange(len(rows))]
+            value[percentile] = np.where(enabled[percentile], limit, np.inf * sign[percentile])
+
+        # State is kept per row, so calls over different sets of zones continue each other
+        blank = (NEVER, np.zeros(len(rules), dtype=bool), np.full(len(rules), NEVER))
+        saved = [self._state.get((signal, row), blank) for row in rows]
+        until = np.array([state[0] for state in saved], dtype=np.int64)
+        raised = np.stack([state[1] for state in saved], axis=1)
+        fired = np.stack([state[2] for state in saved], axis=1)
+
+        # Raise where past the threshold, clear where back past threshold -/+ hysteresis (or missing).
+        # Steps earlier calls evaluated hold the state they ended in, so an episode running across
+        # the end of the last call is continued instead of starting over from the hysteresis band.
+        x = values[None] * sign[..., None]
+        bound = (value * sign)[..., None]
+        with np.errstate(invalid='ignore'):
+            up = x > bound
+            decided = up | ~(x > bound - hysteresis[..., None])
+        old = ts <= until[:, None]
+        if old.any():
+            up = np.where(old, raised[..., None], up)
+            decided |= old
+        last = np.where(decided, np.arange(len(ts), dtype=np.int32), np.int32(-1))
+        np.maximum.accumulate(last, axis=-1, out=last)
+        active = np.where(last >= 0, np.take_along_axis(up, np.maximum(last, 0), axis=-1), raised[..., None])
+        # Episode starts (one carried in at t=0 included, so starts and ends pair up) and last steps
+        starts = active.copy()
+        starts[..., 1:] &= ~active[..., :-1]
+        r, c, t = np.nonzero(starts)
+        if not len(r):
+            self._save(signal, rows, until, values, ts, active, raised, fired)
+            return []
+        # Extreme of each episode: segments between consecutive starts hold only that episode's steps
+        flat = np.where(active, x, -np.inf).reshape(-1)
+        peaks = np.maximum.reduceat(flat, np.ravel_multi_index((r, c, t), active.shape)) * sign[r, 0]
+        new = (ts[t] > until[c]) & ~(raised[r, c] & (t == 0))
+
+        keep = np.flatnonzero(new)
+        r, c, stamps = r[keep], c[keep], ts[t[keep]]
+        events = zip(r.tolist(), c.tolist(), stamps.tolist(), peaks[keep].tolist(), value[r, c].tolist())
+        alerts = []
+        last = fired.tolist()
+        for rr, cc, when, peak, threshold in events:
+            rule = rules[rr]
+            if when < last[rr][cc] + rule.cooldown:
+                continue
+            last[rr][cc] = when
+            time = np.datetime64(when, 's')
+            alerts.append((when, rows[cc], rule.name, Alert(
+                rule.name, rows[cc], rule.level, time, peak, threshold, rule.message.format(
+                    zone=rows[cc], value=peak, threshold=threshold, time=str(time)[:16], rule=rule.name))))
+        self._save(signal, rows, until, values, ts, active, raised, np.array(last, dtype=np.int64))
+        return alerts
+
+    def _save(self, signal, rows, until, values, ts, active, raised, fired):
+        """
+        Keeps each row's state: steps count as evaluated up to the row's last
+        value (NaN tails stay open) and the raised flags are those of that step.
+        Rows without any value keep their previous state.
+        """
+        valued = ~np.isnan(values)
+        seen = np.where(valued, ts, NEVER).max(axis=1)
+        final = len(ts) - 1 - np.argmax(valued[:, ::-1], axis=1)
+        raised = np.where(valued.any(axis=1), active[:, np.arange(len(rows)), final], raised)
+        until = np.maximum(until, seen).tolist()
+        for i, row in enumerate(rows):
+            self._state[signal, row] = (until[i], raised[:, i].copy(), fired[:, i].copy())
+
+    @staticmethod
+    def _create_state_table(db):
+        db.conn.execute('''
+            CREATE TABLE IF NOT EXISTS alert_state (
+                signal TEXT NOT NULL,
+                row TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                until INTEGER NOT NULL,
+                raised INTEGER NOT NULL,
+                fired INTEGER NOT NULL,
+                PRIMARY KEY (signal, row, rule)
+            ) WITHOUT ROWID
+        ''')
+
+    def restore(self, db):
+        """
+        Loads the state persist saved in a DatabaseManager, so this engine
+        continues where earlier runs stopped. State of rules no longer in the
+        rule set is ignored; new rules start clear.
+        """
+        with db.conn:
+            self._create_state_table(db)
+        saved = {}
+        for signal, row, name, until, raised, fired in db.conn.execute(
+                "SELECT signal, row, rule, until, raised, fired FROM alert_state"):
+            saved.setdefault((signal, row), []).append((name, until, raised, fired))
+        for (signal, row), entries in saved.items():
+            rules = self.groups.get(signal)
+            if not rules:
+                continue
+            index = {rule.name: i for i, rule in enumerate(rules)}
+            raised = np.zeros(len(rules), dtype=bool)
+            fired = np.full(len(rules), NEVER)
+            for name, _, flag, when in entries:
+                if name in index:
+                    raised[index[name]], fired[index[name]] = bool(flag), when
+            self._state[signal, row] = (max(until for _, until, _, _ in entries), raised, fired)
+
+    def persist(self, db, alerts=()):
+        """Saves the state and the alerts of the calls since (see to_records) in one transaction."""
+        records = to_records(alerts)
+        state = [(signal, row, rule.name, int(until), bool(raised[i]), int(fired[i]))
+                 for (signal, row), (until, raised, fired) in self._state.items()
+                 for i, rule in enumerate(self.groups[signal])]
+        with db.conn:      # State and alerts commit together, so a crash cannot log an episode twice
+            self._create_state_table(db)
+            db.conn.executemany('''
+                INSERT OR REPLACE INTO alert_state (signal, row, rule, until, raised, fired)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', state)
+            if records:
+                db.insert_alerts(records)
+        if records:
+            db.alerts_committed(records)
+
+    def evaluate_series(self, series):
+        """evaluate over {zone: (timestamps, prices)} placed on one grid (see stack)."""
+        return self.evaluate(*stack(series))
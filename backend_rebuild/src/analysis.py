@@ -1,4 +1,5 @@
-import pandas as pd
+from alert_rules import AlertEngine, default_rules, to_records
+from price_analytics import cheapest_window, steps_per_hour, top_n
 
 class SmartGridAnalyzer:
     
@@ -6,22 +7,32 @@ class SmartGridAnalyzer:
     def find_cheapest_hours(df, n=5):
         """Returns the N cheapest hours from the dataset."""
         if df.empty: return []
-        return df.sort_values(by='price').head(n)
+        return df.iloc[top_n(df['price'].to_numpy(), n)]
 
     @staticmethod
-    def check_market_alerts(df, zone, db_logger=None, price_threshold=100.0):
-        """Checks for high prices and logs alerts."""
+    def find_cheapest_window(df, hours=3):
+        """
+        Returns the cheapest contiguous block of `hours` as a DataFrame slice,
+        e.g. when to run a load that cannot be split up.
+        """
+        if df.empty: return df
+        k = int(hours * steps_per_hour(df['timestamp'].to_numpy()))
+        if k > len(df): return df.iloc[0:0]
+        start, _ = cheapest_window(df['price'].to_numpy(), k)
+        start = int(start)
+        return df.iloc[start:start + k] if start >= 0 else df.iloc[0:0]
+
+    @staticmethod
+    def check_market_alerts(df, zone, db_logger=None, price_threshold=100.0, engine=None):
+        """
+        Evaluates the alert rules for one zone's prices and logs the alerts in
+        one batch. Without an engine (which keeps hysteresis and cooldown
+        state across calls) the default rules at price_threshold are used.
+        """
         if df.empty: return []
-        
-        alerts = []
-        high_price_hours = df[df['price'] > price_threshold]
-        
-        if not high_price_hours.empty:
-            max_price = high_price_hours['price'].max()
-            msg = f"Högprisvarning i {zone}: {max_price} €/MWh"
-            alerts.append(msg)
-            
-            if db_logger:
-                db_logger.log_alert(zone, msg, "HIGH_PRICE")
-        
-        return alerts
+
+        engine = engine or AlertEngine(default_rules(price_threshold))
+        alerts = engine.evaluate_series({zone: (df['timestamp'].to_numpy(), df['price'].to_numpy())})
+        if alerts and db_logger:
+            db_logger.log_alerts(to_records(alerts))
+        return [a.message for a in alerts]
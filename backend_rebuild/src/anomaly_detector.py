@@ -0,0 +1,221 @@
+"""
+Streaming price anomaly detection.
+
+Keeps rolling statistics per zone that are updated point by point as new
+prices are saved, instead of recomputing over the full history:
+
+- Welford running mean/variance (long-run level, reported in alerts)
+- EWMA mean/variance (tracks the recent level)
+- rolling median over a fixed window (robust to the spikes it flags), kept
+  as a sorted list: a bisect and one list insert/delete per point
+- mean absolute deviation from that median, exponentially weighted with the
+  window's span, as the robust scale. An exact rolling MAD would need a
+  median over the whole window for every point (O(window)); this is O(1) and
+  tracks it closely, at the cost of letting a spike raise the scale by
+  about spike / window instead of not at all
+
+State is persisted in grid_history.db (table anomaly_state) so every batch
+from DatabaseManager.save_prices is scored against what came before it.
+Scoring only moves forward: points at or before the last one scored for a
+zone, such as older history added later by backfill, update nothing and
+are never checked. To check such history, score it with a detector on a
+database without that zone's state.
+"""
+import bisect
+from collections import deque
+
+import numpy as np
+
+
+class ZoneState:
+    """Rolling statistics for one zone."""
+
+    def __init__(self, window_size, n=0, mean=0.0, m2=0.0, ewma=None, ewvar=0.0, last_ts=None, window=(),
+                 abs_dev=None):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.ewma = ewma
+        self.ewvar = ewvar
+        self.last_ts = last_ts
+        self.window = deque(window, maxlen=window_size)
+        self.sorted_window = sorted(self.window)
+        if abs_dev is None and self.window:
+            # State saved before abs_dev existed: start from the window's exact mean deviation
+            abs_dev = float(np.mean(np.abs(np.asarray(self.window) - self.median())))
+        self.abs_dev = abs_dev
+
+    @property
+    def std(self):
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+
+    def median(self):
+        w = self.sorted_window
+        mid = len(w) // 2
+        return w[mid] if len(w) % 2 else (w[mid - 1] + w[mid]) / 2
+
+    def update(self, value, alpha):
+        # Welford
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+        # EWMA mean/variance
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            diff = value - self.ewma
+            incr = alpha * diff
+            self.ewma += incr
+            self.ewvar = (1 - alpha) * (self.ewvar + diff * incr)
+
+        # Absolute deviation from the median before this point; a plain mean until
+        # the window is full, then exponential with the window's span
+        if self.window:
+            dev = abs(value - self.median())
+            rate = 1 / min(len(self.window), self.window.maxlen)
+            self.abs_dev = dev if self.abs_dev is None else self.abs_dev + rate * (dev - self.abs_dev)
+
+        # Rolling window, kept sorted for the median
+        if len(self.window) == self.window.maxlen:
+            old = self.window[0]
+            del self.sorted_window[bisect.bisect_left(self.sorted_window, old)]
+        self.window.append(value)
+        bisect.insort(self.sorted_window, value)
+
+
+class StreamingAnomalyDetector:
+    Z_THRESHOLD = 2.5         # Same thresholds as src/utils/AnomalyDetection.ts
+    CRITICAL_Z = 3.5
+    WINDOW_SIZE = 672         # One week of PT15M prices
+    MIN_HISTORY = 96          # Points needed before anything is flagged
+    EWMA_ALPHA = 0.05
+    ABS_DEV_SCALE = 1.2533    # Mean absolute deviation -> standard deviation for normal data
+
+    def __init__(self, db):
+        self.db = db
+        self._states = {}
+        with db.conn:
+            db.conn.execute('''
+                CREATE TABLE IF NOT EXISTS anomaly_state (
+                    zone TEXT PRIMARY KEY,
+                    n INTEGER,
+                    mean REAL,
+                    m2 REAL,
+                    ewma REAL,
+                    ewvar REAL,
+                    last_ts INTEGER,
+                    window BLOB,
+                    abs_dev REAL
+                )
+            ''')
+            columns = {row[1] for row in db.conn.execute("PRAGMA table_info(anomaly_state)")}
+            if 'abs_dev' not in columns:
+                db.conn.execute("ALTER TABLE anomaly_state ADD COLUMN abs_dev REAL")
+
+    def _state(self, zone):
+        if zone not in self._states:
+            row = self.db.conn.execute(
+                "SELECT n, mean, m2, ewma, ewvar, last_ts, window, abs_dev FROM anomaly_state WHERE zone = ?", (zone,)
+            ).fetchone()
+            if row is None:
+                self._states[zone] = ZoneState(self.WINDOW_SIZE)
+            else:
+                n, mean, m2, ewma, ewvar, last_ts, window, abs_dev = row
+                self._states[zone] = ZoneState(self.WINDOW_SIZE, n, mean, m2, ewma, ewvar, last_ts,
+                                               np.frombuffer(window, dtype=np.float64).tolist(), abs_dev)
+        return self._states[zone]
+
+    def _classify(self, state, value):
+        """Returns (kind, level, robust z) for one value scored against the state before it."""
+        if value < 0:
+            return 'NEGATIVE_PRICE', 'CRITICAL', None
+        if len(state.window) < self.MIN_HISTORY:
+            return None
+
+        median = state.median()
+        spread = self.ABS_DEV_SCALE * state.abs_dev
+        ew_std = state.ewvar ** 0.5
+        if spread <= 0 or ew_std <= 0:
+            return None
+
+        robust_z = (value - median) / spread
+        ewma_z = (value - state.ewma) / ew_std
+        # Both the robust and the recent-level view must agree
+        if abs(robust_z) > self.Z_THRESHOLD and abs(ewma_z) > self.Z_THRESHOLD and robust_z * ewma_z > 0:
+            kind = 'SPIKE_HIGH' if robust_z > 0 else 'SPIKE_LOW'
+            level = 'CRITICAL' if abs(robust_z) > self.CRITICAL_Z else 'WARNING'
+            return kind, level, robust_z
+        return None
+
+    def score(self, zone, timestamps, prices):
+        """
+        Scores points newer than the last one seen for the zone (older points
+        are skipped, see the module docstring) and updates the rolling state. Consecutive anomalous points of the same kind are merged into
+        one alert. Returns a list of alert dicts (also written to the alerts table).
+        """
+        state = self._state(zone)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, prices = timestamps[order], prices[order]
+        if state.last_ts is not None:
+            new = timestamps > state.last_ts
+            timestamps, prices = timestamps[new], prices[new]
+
+        alerts = []
+        current = None
+        for ts, value in zip(timestamps.tolist(), prices.tolist()):
+            result = self._classify(state, value)
+            if result is None:
+                current = None
+            else:
+                kind, level, _ = result
+                if current is not None and current['kind'] == kind:
+                    current['end'] = ts
+                    if abs(value - state.mean) > abs(current['peak'] - state.mean):
+                        current['peak'] = value
+                    if level == 'CRITICAL':
+                        current['level'] = level
+                else:
+                    current = {'zone': zone, 'kind': kind, 'level': level, 'start': ts, 'end': ts,
+                               'peak': value, 'baseline': state.mean}
+                    alerts.append(current)
+            state.update(value, self.EWMA_ALPHA)
+            state.last_ts = ts
+
+        if len(timestamps):
+            self._persist(zone, state, alerts)
+        return alerts
+
+    def _persist(self, zone, state, alerts):
+        """Saves the zone state and its new alerts in one transaction."""
+        records = [(a['zone'], self._message(a), a['level']) for a in alerts]
+        with self.db.conn:      # The one transaction: state and alerts commit together
+            self.db.conn.execute('''
+                INSERT OR REPLACE INTO anomaly_state (zone, n, mean, m2, ewma, ewvar, last_ts, window, abs_dev)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (zone, state.n, state.mean, state.m2, state.ewma, state.ewvar, state.last_ts,
+                  np.asarray(state.window, dtype=np.float64).tobytes(), state.abs_dev))
+            if records:
+                self.db.insert_alerts(records)
+        if records:
+            self.db.alerts_committed(records)
+
+    @staticmethod
+    def _message(alert):
+        start = np.datetime64(alert['start'], 's')
+        end = np.datetime64(alert['end'], 's')
+        span = f"{start}" if start == end else f"{start} – {end}"
+        labels = {
+            'NEGATIVE_PRICE': 'Negativt pris',
+            'SPIKE_HIGH': 'Pristopp',
+            'SPIKE_LOW': 'Prisdal',
+        }
+        return (f"{labels[alert['kind']]} i {alert['zone']}: {alert['peak']:.2f} €/MWh "
+                f"({span} UTC, snitt {alert['baseline']:.2f})")
+
+    def on_prices_saved(self, zone, timestamps, prices):
+        """DatabaseManager listener: scores each committed batch."""
+        self.score(zone, timestamps, prices)
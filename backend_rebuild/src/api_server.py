@@ -0,0 +1,492 @@
+"""
+Read API over grid_history.db (asyncio, standard library only).
+
+Routes (GET/HEAD, query parameters in brackets):
+
+    /api/prices/latest   zone, [n=96], [format=json|bin]
+    /api/prices          zone, start, end, [format=json|bin]
+    /api/aggregates      zone, [granularity=day], [start], [end]
+    /api/cheapest        zone, day (YYYY-MM-DD, UTC), [hours=3]
+    /api/alerts          [zone], [limit=100]
+    /api/stream          [zone], [since]   Server-Sent Events change feed
+
+Prices are columnar: JSON {"zone", "timestamps": [epoch s], "prices": [...]},
+or with format=bin an application/octet-stream body of a little-endian
+uint32 point count, int64 epoch seconds and float64 prices.
+
+Every response carries a strong ETag (hash of the body) and answers
+If-None-Match with 304. Ranges that ended before today (UTC) and whose
+days all have a complete price grid in the database are final and are
+served with a one-year immutable Cache-Control; everything else, including
+past ranges with gaps a later backfill may fill, must be revalidated. Rendered responses are kept in an in-process LRU. Entries are
+dropped when DatabaseManager commits prices overlapping their range or new
+alerts, and the whole LRU is dropped when another process writes the
+database (PRAGMA data_version changes).
+
+With --hot, price ranges inside the hot store window (see hot_store) are
+read from the shared mapping the ingesting process keeps current instead
+of from SQLite, as long as the store reflects the database's latest price
+batch (its seq matches the change feed); otherwise, e.g. after a fetch by
+a process without the store, they come from SQLite. A new hot store
+version drops the LRU like an external write does.
+
+/api/stream pushes the DatabaseManager change feed: one SSE event per
+committed price batch ('prices': new and revised points) or alert batch
+('alerts'), with the feed seq as event id. Clients resume with Last-Event-ID
+(or ?since=); if that id has been trimmed from the feed a 'reset' event tells
+them to reload. Each event is framed once and the same bytes are written to
+every subscriber.
+"""
+import asyncio
+import hashlib
+import json
+import struct
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from price_analytics import cheapest_window, steps_per_hour
+
+DAY = 86400
+
+# body: rendered bytes; zone/lo/hi: the price range it depends on (hi None = open-ended)
+CachedResponse = namedtuple('CachedResponse', ['body', 'content_type', 'etag', 'cache_control', 'zone', 'lo', 'hi'])
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryCache:
+    """LRU of rendered responses keyed by (path, sorted query)."""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, zone, lo=None, hi=None):
+        """Drops entries for zone whose range overlaps [lo, hi] (all of the zone's entries if lo is None)."""
+        stale = [
+            key for key, e in self._entries.items()
+            if e.zone == zone and (lo is None or ((e.hi is None or e.hi > lo) and (e.lo is None or e.lo <= hi)))
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ChangeFeed:
+    """Fans the changes table out to SSE subscribers."""
+    POLL_INTERVAL = 0.05       # Seconds between PRAGMA data_version checks for other processes' commits
+    HEARTBEAT = 15.0
+    MAX_PENDING = 1 << 20      # Unsent bytes before a slow subscriber is dropped (it can resume)
+
+    def __init__(self, db):
+        self.db = db
+        self.subscribers = {}      # StreamWriter -> zone filter (None = all zones)
+        self.last_seq = db.last_change_seq()
+        self.events = 0
+        self._wake = None
+
+    @staticmethod
+    def frame(seq, kind, payload):
+        return f"id: {seq}\nevent: {kind}\ndata: {payload}\n\n".encode()
+
+    def notify(self):
+        """Wakes the pump immediately (in-process commits)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def subscribe(self, writer, zone=None, after=None):
+        """Replays events after `after` to one writer, then adds it to the fan-out (no await in between)."""
+        if after is not None and after < self.last_seq:
+            first = self.db.first_change_seq()
+            if first is None or after < first - 1:
+                writer.write(self.frame(self.last_seq, 'reset', '{}'))
+            else:
+                while after < self.last_seq:
+                    rows = self.db.get_changes(after, limit=1000)
+                    for seq, kind, event_zone, payload in rows:
+                        if seq > self.last_seq:
+                            break
+                        if zone is None or event_zone is None or event_zone == zone:
+                            writer.write(self.frame(seq, kind, payload))
+                    after = rows[-1][0] if rows else self.last_seq
+        self.subscribers[writer] = zone
+
+    def unsubscribe(self, writer):
+        self.subscribers.pop(writer, None)
+
+    def _broadcast(self, data, zone=None):
+        for writer, wanted in list(self.subscribers.items()):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > self.MAX_PENDING:
+                self.unsubscribe(writer)
+                writer.close()
+            elif wanted is None or zone is None or wanted == zone:
+                writer.write(data)
+
+    def publish_pending(self):
+        """Broadcasts every committed event newer than the last one sent."""
+        while True:
+            rows = self.db.get_changes(self.last_seq, limit=1000)
+            for seq, kind, zone, payload in rows:
+                self._broadcast(self.frame(seq, kind, payload), zone)
+                self.last_seq = seq
+                self.events += 1
+            if len(rows) < 1000:
+                return
+
+    async def pump(self):
+        self._wake = asyncio.Event()
+        idle = 0.0
+        version = None
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            woken = self._wake.is_set()
+            self._wake.clear()
+            before = self.last_seq
+            current = self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+            if woken or current != version:
+                version = current
+                self.publish_pending()
+            idle = 0.0 if self.last_seq != before else idle + self.POLL_INTERVAL
+            if idle >= self.HEARTBEAT:
+                self._broadcast(b": heartbeat\n\n")
+                idle = 0.0
+
+
+class PriceApi:
+    IMMUTABLE = "public, max-age=31536000, immutable"
+    REVALIDATE = "public, max-age=0, must-revalidate"
+    MAX_POINTS = 96 * 366 * 5            # Largest range served in one response
+
+    ROUTES = {
+        '/api/prices/latest': '_latest',
+        '/api/prices': '_range',
+        '/api/aggregates': '_aggregates',
+        '/api/cheapest': '_cheapest',
+        '/api/alerts': '_alerts',
+    }
+
+    def __init__(self, db, cache_entries=2048, hot=None):
+        self.db = db
+        self.cache = QueryCache(cache_entries)
+        self.hot = hot                       # HotStore reader for recent ranges, or None
+        self._data_version = self._read_data_version()
+        self.feed = ChangeFeed(db)
+        db.add_listener(self.on_prices_saved)
+        db.add_alert_listener(self.on_alerts_logged)
+
+    # --- Invalidation ------------------------------------------------------
+
+    def on_prices_saved(self, zone, timestamps, prices):
+        """DatabaseManager listener: drops cached responses covering the saved points."""
+        if len(timestamps):
+            self.cache.invalidate(zone, int(timestamps.min()), int(timestamps.max()))
+        self.feed.notify()
+
+    def on_alerts_logged(self, alerts):
+        self.cache.invalidate('alerts')
+        self.feed.notify()
+
+    def _read_data_version(self):
+        version = self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self.hot is not None:
+            self.hot = self.hot.refresh()
+            return version, self.hot.version
+        return version
+
+    def _check_external_writes(self):
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self.cache.clear()
+
+    # --- Helpers -----------------------------------------------------------
+
+    @staticmethod
+    def _param(query, name, default=None, cast=str):
+        value = query.get(name, default)
+        if value is None:
+            raise ApiError(400, f"Missing parameter '{name}'")
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"Invalid value for '{name}': {value}")
+
+    @staticmethod
+    def _epoch(value):
+        """Epoch seconds from an integer or an ISO date/time in UTC ('2026-01-21', '2026-01-21T23:00Z')."""
+        if value.lstrip('-').isdigit():
+            return int(value)
+        try:
+            return int(np.datetime64(value.rstrip('Z'), 's').astype(np.int64))
+        except ValueError:
+            raise ApiError(400, f"Invalid time: {value}")
+
+    @staticmethod
+    def _today():
+        now = int(time.time())
+        return now - now % DAY
+
+    def _final(self, zone, lo, hi):
+        """True when [lo, hi] (inclusive) ended before today and every UTC day in it has complete prices."""
+        if lo is None or hi is None or hi >= self._today():
+            return False
+        first, last = lo - lo % DAY, hi - hi % DAY
+        days = self.db.get_complete_days(zone, np.datetime64(first, 's'), np.datetime64(last + DAY, 's'))
+        return len(days) == (last - first) // DAY + 1
+
+    def _respond(self, payload, zone, lo=None, hi=None, fmt='json'):
+        if fmt == 'bin':
+            ts, prices = payload
+            body = struct.pack('<I', len(ts)) + ts.astype('<i8').tobytes() + prices.astype('<f8').tobytes()
+            content_type = 'application/octet-stream'
+        elif fmt == 'json':
+            body = json.dumps(payload, separators=(',', ':')).encode()
+            content_type = 'application/json'
+        else:
+            raise ApiError(400, f"Unknown format '{fmt}'")
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        final = self._final(zone, lo, hi)
+        return CachedResponse(body, content_type, etag, self.IMMUTABLE if final else self.REVALIDATE, zone, lo, hi)
+
+    def _prices(self, zone, lo, hi):
+        """(epoch-second timestamps, prices) in [lo, hi), from the hot store when it covers the range and is current."""
+        if (self.hot is not None and zone in self.hot.zones and self.hot.covers(lo, hi)
+                and self.hot.seq == self.db.last_change_seq('prices')):
+            return self.hot.points('price', zone, lo, hi)
+        df = self.db.get_prices(zone, np.datetime64(lo, 's'), np.datetime64(hi, 's'))
+        return df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64), df['price'].to_numpy()
+
+    @staticmethod
+    def _price_payload(zone, ts, prices, fmt):
+        if fmt == 'bin':
+            return ts, prices
+        return {'zone': zone, 'timestamps': ts.tolist(), 'prices': prices.tolist()}
+
+    # --- Routes ------------------------------------------------------------
+
+    def _latest(self, q):
+        zone = self._param(q, 'zone')
+        n = min(self._param(q, 'n', 96, int), self.MAX_POINTS)
+        fmt = q.get('format', 'json')
+        df = self.db.get_latest_prices(zone, n)
+        ts = df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        lo = int(ts[0]) if len(ts) else None
+        return self._respond(self._price_payload(zone, ts, df['price'].to_numpy(), fmt), zone, lo, None, fmt)
+
+    def _range(self, q):
+        zone = self._param(q, 'zone')
+        lo, hi = self._epoch(self._param(q, 'start')), self._epoch(self._param(q, 'end'))
+        if hi <= lo or hi - lo > self.MAX_POINTS * 900:
+            raise ApiError(400, "Range must be non-empty and at most five years")
+        fmt = q.get('format', 'json')
+        ts, prices = self._prices(zone, lo, hi)
+        return self._respond(self._price_payload(zone, ts, prices, fmt), zone, lo, hi - 1, fmt)
+
+    def _aggregates(self, q):
+        zone = self._param(q, 'zone')
+        granularity = q.get('granularity', 'day')
+        lo = self._epoch(q['start']) if 'start' in q else None
+        hi = self._epoch(q['end']) if 'end' in q else None
+        try:
+            df = self.db.get_price_rollups(
+                zone, granularity,
+                None if lo is None else np.datetime64(lo, 's'),
+                None if hi is None else np.datetime64(hi, 's'))
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        payload = {
+            'zone': zone,
+            'granularity': granularity,
+            'buckets': df['bucket'].to_numpy().astype(np.int64).tolist(),
+            'min': df['min'].tolist(),
+            'max': df['max'].tolist(),
+            'mean': df['mean'].tolist(),
+            'count': df['count'].tolist(),
+        }
+        return self._respond(payload, zone, lo, None if hi is None else hi - 1)
+
+    def _cheapest(self, q):
+        zone = self._param(q, 'zone')
+        lo = self._epoch(self._param(q, 'day'))
+        lo -= lo % DAY
+        hours = self._param(q, 'hours', 3, float)
+        epochs, prices = self._prices(zone, lo, lo + DAY)
+        payload = {'zone': zone, 'day': lo, 'hours': hours, 'start': None, 'end': None, 'avg_price': None}
+        if len(epochs) > 1:
+            k = int(hours * steps_per_hour(epochs.astype('datetime64[s]')))
+            if 0 < k <= len(epochs):
+                start, mean = cheapest_window(prices, k)
+                start = int(start)
+                if start >= 0:
+                    step = int(epochs[1] - epochs[0])
+                    payload.update(start=int(epochs[start]), end=int(epochs[start + k - 1]) + step,
+                                   avg_price=float(mean))
+        return self._respond(payload, zone, lo, lo + DAY - 1)
+
+    def _alerts(self, q):
+        zone = q.get('zone')
+        limit = min(self._param(q, 'limit', 100, int), 1000)
+        df = self.db.get_alerts(zone, limit)
+        return self._respond({'alerts': df.to_dict('records')}, 'alerts')
+
+    # --- HTTP --------------------------------------------------------------
+
+    def handle(self, method, target, headers):
+        """Returns (status, extra headers, body) for one request."""
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        url = urlsplit(target)
+        route = self.ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            return 404, {'Content-Type': 'application/json'}, b'{"error":"not found"}'
+
+        query = dict(parse_qsl(url.query))
+        key = (url.path, tuple(sorted(query.items())))
+        self._check_external_writes()
+        entry = self.cache.get(key)
+        if entry is None:
+            try:
+                entry = getattr(self, route)(query)
+            except ApiError as e:
+                body = json.dumps({'error': str(e)}).encode()
+                return e.status, {'Content-Type': 'application/json'}, body
+            self.cache.put(key, entry)
+
+        out = {'ETag': entry.etag, 'Cache-Control': entry.cache_control, 'Content-Type': entry.content_type}
+        if headers.get('if-none-match') == entry.etag:
+            return 304, out, b''
+        return 200, out, entry.body
+
+    REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+    async def _connection(self, reader, writer):
+        """Serves one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                url = urlsplit(target)
+                if url.path.rstrip('/') == '/api/stream' and method == 'GET':
+                    await self._stream(reader, writer, dict(parse_qsl(url.query)), headers)
+                    break
+
+                try:
+                    status, out, body = self.handle(method, target, headers)
+                except Exception as e:
+                    print(f"API Error: {e}")
+                    status, out, body = 500, {'Content-Type': 'application/json'}, b'{"error":"internal"}'
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.strip() == 'HTTP/1.1')
+                response = [f"HTTP/1.1 {status} {self.REASONS.get(status, '')}",
+                            f"Content-Length: {len(body)}",
+                            "Access-Control-Allow-Origin: *",
+                            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                response += [f"{k}: {v}" for k, v in out.items()]
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _stream(self, reader, writer, query, headers):
+        """Holds an SSE connection open until the client disconnects."""
+        after = headers.get('last-event-id') or query.get('since')
+        after = int(after) if after is not None and after.isdigit() else None
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\nretry: 2000\n\n")
+        self.feed.subscribe(writer, query.get('zone'), after)
+        try:
+            await writer.drain()
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.feed.unsubscribe(writer)
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        server = await asyncio.start_server(self._connection, host, port, backlog=1024)
+        pump = asyncio.create_task(self.feed.pump())
+        print(f"🌐 GridWatch API listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            pump.cancel()
+
+
+def main(argv=None):
+    import argparse
+    from database import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="GridWatch read API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--db', default=DatabaseManager.DB_PATH)
+    parser.add_argument('--cache-entries', type=int, default=2048)
+    parser.add_argument('--hot', metavar='PATH', help="serve recent prices from this hot store (see hot_store)")
+    args = parser.parse_args(argv)
+
+    hot = None
+    if args.hot:
+        from hot_store import HotStore
+        hot = HotStore.open(args.hot)
+    with DatabaseManager(args.db) as db:
+        api = PriceApi(db, args.cache_entries, hot)
+        try:
+            asyncio.run(api.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Columnar archive for cold data in grid_history.db.
+
+DatabaseManager.archive_cold moves whole months out of SQLite into Arrow IPC
+files, one per zone and UTC month:
+
+    <root>/prices/zone=SE3/month=2023-01.arrow       timestamp (timestamp[s, UTC]), price (float64)
+    <root>/generation/zone=SE3/month=2023-01.arrow   psr_type, day, resolution, data (float32 blob)
+
+Files are uncompressed and read through memory maps, so columns come back as
+zero-copy NumPy views of the page cache. Scans prune partitions by zone and
+month from the paths alone and slice the rest with a binary search on the
+sorted timestamps. The files also open directly with pandas.read_feather.
+
+pyarrow is optional: without it the archive is disabled and everything stays
+in SQLite.
+"""
+import glob
+import os
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # Optional dependency
+    pa = None
+
+ARCHIVE_AVAILABLE = pa is not None
+
+
+def month_bounds(month):
+    """[start, end) epoch seconds of a 'YYYY-MM' month (UTC)."""
+    start = np.datetime64(month, 'M')
+    return (int(start.astype('datetime64[s]').astype(np.int64)),
+            int((start + 1).astype('datetime64[s]').astype(np.int64)))
+
+
+def _write_table(path, table):
+    """Atomically writes one uncompressed Arrow IPC file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with pa.OSFile(tmp, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table.combine_chunks())
+    os.replace(tmp, path)
+
+
+def _read_table(path):
+    """Memory-maps an Arrow IPC file; buffers stay valid while any array references them."""
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _column(table, name):
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy()
+
+
+class PriceArchive:
+    PRICE_SCHEMA = None if pa is None else pa.schema([
+        ('timestamp', pa.timestamp('s', tz='UTC')),
+        ('price', pa.float64()),
+    ])
+    GENERATION_SCHEMA = None if pa is None else pa.schema([
+        ('psr_type', pa.string()),
+        ('day', pa.int64()),
+        ('resolution', pa.int64()),
+        ('data', pa.binary()),
+    ])
+
+    def __init__(self, root):
+        if pa is None:
+            raise ImportError("pyarrow is required for the archive (pip install pyarrow)")
+        self.root = root
+
+    def _path(self, kind, zone, month):
+        return os.path.join(self.root, kind, f"zone={zone}", f"month={month}.arrow")
+
+    def partitions(self, kind, zone, start=None, end=None):
+        """(month, path) of the zone's files overlapping [start, end) epoch seconds, oldest first."""
+        found = []
+        for path in glob.glob(self._path(kind, zone, '*')):
+            month = os.path.basename(path)[len('month='):-len('.arrow')]
+            lo, hi = month_bounds(month)
+            if (start is None or hi > start) and (end is None or lo < end):
+                found.append((month, path))
+        return sorted(found)
+
+    def zones(self, kind='prices'):
+        return sorted(os.path.basename(p)[len('zone='):] for p in glob.glob(os.path.join(self.root, kind, 'zone=*')))
+
+    def has_month(self, kind, zone, month):
+        return os.path.exists(self._path(kind, zone, month))
+
+    def remove(self, kind, zone, month):
+        path = self._path(kind, zone, month)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # --- Prices ------------------------------------------------------------
+
+    def write_prices(self, zone, month, timestamps, prices):
+        """Writes one month of prices, merged over what is already archived (new values win)."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        path = self._path('prices', zone, month)
+        if os.path.exists(path):
+            old_ts, old_prices = self.read_month(zone, month)
+            keep = ~np.isin(old_ts, timestamps)
+            timestamps = np.concatenate([old_ts[keep], timestamps])
+            prices = np.concatenate([old_prices[keep], prices])
+        order = np.argsort(timestamps, kind='stable')
+        table = pa.table({
+            'timestamp': pa.array(timestamps[order].astype('datetime64[s]'), type=pa.timestamp('s', tz='UTC')),
+            'price': pa.array(prices[order]),
+        }, schema=self.PRICE_SCHEMA)
+        _write_table(path, table)
+
+    def read_month(self, zone, month):
+        """(epoch seconds, prices) of one partition as zero-copy views."""
+        table = _read_table(self._path('prices', zone, month))
+        return _column(table, 'timestamp').view(np.int64), _column(table, 'price')
+
+    def scan(self, zone, start=None, end=None):
+        """Yields (epoch seconds, prices) views per partition, trimmed to [start, end)."""
+        for month, _ in self.partitions('prices', zone, start, end):
+            ts, prices = self.read_month(zone, month)
+            lo = 0 if start is None else np.searchsorted(ts, start)
+            hi = len(ts) if end is None else np.searchsorted(ts, end)
+            if hi > lo:
+                yield ts[lo:hi], prices[lo:hi]
+
+    def read_prices(self, zone, start=None, end=None):
+        """All archived (epoch seconds, prices) for the zone in [start, end)."""
+        parts = list(self.scan(zone, start, end))
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def latest(self, zone, n):
+        """The n most recent archived points, oldest first."""
+        parts = []
+        for month, _ in reversed(self.partitions('prices', zone)):
+            parts.insert(0, self.read_month(zone, month))
+            if sum(len(p[0]) for p in parts) >= n:
+                break
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        ts = np.concatenate([p[0] for p in parts])[-n:]
+        prices = np.concatenate([p[1] for p in parts])[-n:]
+        return ts, prices
+
+    # --- Generation --------------------------------------------------------
+
+    def write_generation(self, zone, month, rows):
+        """
+        Writes one month of generation rows (psr_type, day, resolution, float32 bytes).
+        Rows for a (psr_type, day) already archived are merged point by point.
+        """
+        merged = {(psr, day): (resolution, np.frombuffer(data, dtype=np.float32))
+                  for psr, day, resolution, data in self.read_generation(zone, month=month)}
+        for psr, day, resolution, data in rows:
+            values = np.frombuffer(data, dtype=np.float32)
+            old = merged.get((psr, day))
+            if old is not None and old[0] == resolution:
+                values = np.where(np.isnan(values), old[1], values)
+            merged[(psr, day)] = (resolution, values)
+        keys = sorted(merged, key=lambda k: (k[1], k[0]))
+        table = pa.table({
+            'psr_type': [k[0] for k in keys],
+            'day': [k[1] for k in keys],
+            'resolution': [merged[k][0] for k in keys],
+            'data': [merged[k][1].tobytes() for k in keys],
+        }, schema=self.GENERATION_SCHEMA)
+        _write_table(self._path('generation', zone, month), table)
+
+    def read_generation(self, zone, start=None, end=None, month=None):
+        """Archived (psr_type, day, resolution, bytes) rows for the zone, by day range or single month."""
+        if month is not None:
+            path = self._path('generation', zone, month)
+            partitions = [(month, path)] if os.path.exists(path) else []
+        else:
+            partitions = self.partitions('generation', zone, start, end)
+        rows = []
+        for _, path in partitions:
+            table = _read_table(path).to_pydict()
+            for psr, day, resolution, data in zip(table['psr_type'], table['day'], table['resolution'], table['data']):
+                if (start is None or day + 86400 > start) and (end is None or day < end):
+                    rows.append((psr, day, resolution, data))
+        return rows
+
+    # --- Analytics ---------------------------------------------------------
+
+    def percentile_curve(self, zone, percentiles=None, start=None, end=None, tick=0.01):
+        """
+        Price percentiles over the archive, streamed one partition at a time.
+        Prices are counted in a histogram of `tick` €/MWh bins; ENTSO-E publishes
+        prices to 0.01 €/MWh, so the default is exact. Nearest-rank, like
+        DatabaseManager.get_price_aggregates. Returns an array matching percentiles
+        (default 0, 0.01, ..., 1), or None without data.
+        """
+        percentiles = np.linspace(0, 1, 101) if percentiles is None else np.asarray(percentiles, dtype=np.float64)
+        lo = hi = None
+        for _, prices in self.scan(zone, start, end):
+            ticks = np.round(prices / tick).astype(np.int64)
+            lo = ticks.min() if lo is None else min(lo, ticks.min())
+            hi = ticks.max() if hi is None else max(hi, ticks.max())
+        if lo is None:
+            return None
+
+        counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        for _, prices in self.scan(zone, start, end):
+            counts += np.bincount(np.round(prices / tick).astype(np.int64) - lo, minlength=len(counts))
+        cumulative = np.cumsum(counts)
+        ranks = np.maximum(np.ceil(percentiles * cumulative[-1] - 1e-9), 1)
+        return (lo + np.searchsorted(cumulative, ranks)) * tick
+
+    def seasonal_profile(self, zone, start=None, end=None):
+        """
+        Mean price by (month of year, hour of day), UTC, streamed per partition.
+        Returns (means 12 x 24 with NaN where empty, point counts 12 x 24).
+        """
+        sums = np.zeros(12 * 24)
+        counts = np.zeros(12 * 24, dtype=np.int64)
+        for ts, prices in self.scan(zone, start, end):
+            month = ts.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64) % 12
+            hour = (ts // 3600) % 24
+            cell = month * 24 + hour
+            sums += np.bincount(cell, weights=prices, minlength=12 * 24)
+            counts += np.bincount(cell, minlength=12 * 24)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        return means.reshape(12, 24), counts.reshape(12, 24)
@@ -0,0 +1,187 @@
+"""
+Historical backfill of day-ahead prices into grid_history.db.
+
+backfill(zones, start, end) only requests what is missing: UTC days that
+already have a complete price grid in `prices`, or that lie inside a window a
+previous run finished (table backfill_checkpoints), are skipped. The remaining
+days are merged into contiguous ranges and split into the largest windows
+ENTSO-E accepts per request.
+
+Windows run as a pipeline: worker threads fetch and parse documents while the
+calling thread writes finished windows to the database and checkpoints them,
+so network, parsing and SQLite writes overlap. An interrupted run resumes from
+the checkpoints and the gap check on the next call.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+
+from entsoe_parser import parse_timeseries, to_frame
+
+DAY = 86400
+
+# One request: zone and [start, end) as naive UTC datetimes
+BackfillWindow = namedtuple('BackfillWindow', ['zone', 'start', 'end'])
+
+
+def _day_epoch(value):
+    """UTC midnight (epoch seconds) of a date string, date or naive UTC datetime."""
+    return int(np.datetime64(value, 'D').astype('datetime64[s]').astype(np.int64))
+
+
+def _to_datetime(epoch):
+    return np.datetime64(int(epoch), 's').astype(datetime)
+
+
+def _runs(days):
+    """Groups sorted day epochs into contiguous [start, end) ranges."""
+    if not len(days):
+        return []
+    breaks = np.flatnonzero(np.diff(days) != DAY) + 1
+    return [(int(run[0]), int(run[-1]) + DAY) for run in np.split(days, breaks)]
+
+
+class Backfiller:
+    DOCUMENT_TYPE = 'A44'
+    MAX_WINDOW_DAYS = 365     # ENTSO-E rejects A44 requests spanning more than one year
+
+    def __init__(self, loader, db, max_in_flight=None):
+        self.loader = loader
+        self.db = db
+        # Fetched-but-unwritten windows are bounded so a multi-year run keeps memory flat
+        self.max_in_flight = max_in_flight or 2 * loader.max_workers
+        with db.conn:
+            db.conn.execute('''
+                CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+                    zone TEXT NOT NULL,
+                    document_type TEXT NOT NULL,
+                    window_start INTEGER NOT NULL,
+                    window_end INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    points INTEGER,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (zone, document_type, window_start, window_end)
+                ) WITHOUT ROWID
+            ''')
+
+    def _checkpointed_days(self, zone, lo, hi):
+        """Day epochs in [lo, hi) inside windows a previous run completed."""
+        rows = self.db.conn.execute('''
+            SELECT window_start, window_end FROM backfill_checkpoints
+            WHERE zone = ? AND document_type = ? AND status = 'done' AND window_end > ? AND window_start < ?
+        ''', (zone, self.DOCUMENT_TYPE, lo, hi)).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(max(a, lo), min(b, hi), DAY, dtype=np.int64) for a, b in rows])
+
+    def find_gaps(self, zone, start, end):
+        """[start, end) epoch ranges of whole UTC days that still need fetching."""
+        lo, hi = _day_epoch(start), _day_epoch(end)
+        days = np.arange(lo, hi, DAY, dtype=np.int64)
+        have = np.union1d(self.db.get_complete_days(zone, _to_datetime(lo), _to_datetime(hi)),
+                          self._checkpointed_days(zone, lo, hi))
+        return _runs(days[~np.isin(days, have)])
+
+    def plan(self, zones, start, end):
+        """BackfillWindows covering every gap, at most MAX_WINDOW_DAYS each, oldest first."""
+        span = self.MAX_WINDOW_DAYS * DAY
+        windows = [
+            BackfillWindow(zone, _to_datetime(a), _to_datetime(min(a + span, gap_end)))
+            for zone in zones
+            for gap_start, gap_end in self.find_gaps(zone, start, end)
+            for a in range(gap_start, gap_end, span)
+        ]
+        return sorted(windows, key=lambda w: (w.start, w.zone))
+
+    def _fetch_and_parse(self, window):
+        """Worker stage: download and parse one window into a prices DataFrame."""
+        content = self.loader.fetch_document(window.zone, self.DOCUMENT_TYPE, window.start, window.end)
+        timestamps, prices = parse_timeseries(content, value_tag='price.amount')
+        return to_frame(timestamps, prices)
+
+    def _checkpoint(self, window, status, points=None, error=None):
+        with self.db.conn:
+            self.db.conn.execute('''
+                INSERT OR REPLACE INTO backfill_checkpoints
+                    (zone, document_type, window_start, window_end, status, points, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (window.zone, self.DOCUMENT_TYPE, _day_epoch(window.start), _day_epoch(window.end),
+                  status, points, error, time.time()))
+
+    def run(self, zones, start, end):
+        """
+        Backfills prices for zones over [start, end) and returns a summary dict
+        (windows, points, failed, empty). Failed windows are checkpointed as
+        'failed' and retried on the next run. Windows that returned no points are
+        checkpointed the same way, since an empty acknowledgement usually means
+        the data is not published yet. Windows reaching into the future are not
+        marked done, since ENTSO-E may still publish data for them.
+        """
+        windows = self.plan(zones, start, end)
+        print(f"📅 Backfill: {len(windows)} windows to fetch for {len(zones)} zones.")
+        now = time.time()
+        summary = {'windows': len(windows), 'points': 0, 'failed': 0, 'empty': 0}
+
+        pending = iter(windows)
+        with ThreadPoolExecutor(max_workers=self.loader.max_workers) as pool:
+            in_flight = {}
+            while True:
+                while len(in_flight) < self.max_in_flight:
+                    window = next(pending, None)
+                    if window is None:
+                        break
+                    in_flight[pool.submit(self._fetch_and_parse, window)] = window
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = in_flight.pop(future)
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        print(f"⚠️ Backfill {window.zone} {window.start:%Y-%m-%d}–{window.end:%Y-%m-%d} failed: {e}")
+                        self._checkpoint(window, 'failed', error=str(e))
+                        summary['failed'] += 1
+                        continue
+
+                    if df.empty:
+                        self._checkpoint(window, 'failed', 0, error='no data published')
+                        summary['empty'] += 1
+                        continue
+
+                    points = self.db.save_prices(window.zone, df)
+                    summary['points'] += points
+                    if _day_epoch(window.end) <= now:
+                        self._checkpoint(window, 'done', points)
+
+        print(f"✅ Backfill finished: {summary['points']} points, {summary['failed']} failed windows, "
+              f"{summary['empty']} empty windows.")
+        return summary
+
+
+def backfill(zones, start, end, loader=None, db=None):
+    """Entry point: backfills day-ahead prices for zones over [start, end) with default components."""
+    if loader is None:
+        from data_loader import EntsoeLoader
+        loader = EntsoeLoader()
+    if db is None:
+        from database import DatabaseManager
+        with DatabaseManager() as db:
+            return Backfiller(loader, db).run(zones, start, end)
+    return Backfiller(loader, db).run(zones, start, end)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill ENTSO-E day-ahead prices")
+    parser.add_argument('zones', nargs='+')
+    parser.add_argument('--start', required=True, help="First UTC day, e.g. 2023-01-01")
+    parser.add_argument('--end', required=True, help="UTC day after the last one to load")
+    args = parser.parse_args()
+    backfill(args.zones, args.start, args.end)
@@ -0,0 +1,249 @@
+"""
+GridWatch command line, built for fast starts from schedulers.
+
+    python backend_rebuild/src/cli.py fetch    [ZONE ...] [--date YYYY-MM-DD] [--load]
+    python backend_rebuild/src/cli.py cheapest ZONE [--date] [--n 5] [--hours 3]
+    python backend_rebuild/src/cli.py alerts   [ZONE ...] [--date] [--threshold 100 | --rules rules.json] [--log]
+    python backend_rebuild/src/cli.py map      [ZONE ...] [--date] [--out elpriser_karta.html] [--animate [--days 7]]
+    python backend_rebuild/src/cli.py backfill ZONE ... --start YYYY-MM-DD --end YYYY-MM-DD
+    python backend_rebuild/src/cli.py forecast [ZONE ...] [--days 7]
+
+Each subcommand imports only what it needs. cheapest and alerts run on
+NumPy arrays straight from the parser (no pandas) and read the day from the
+response cache when it holds a fresh copy, so a cached alerts check does not
+import requests either. Only fetch, backfill, forecast, alerts --log and
+map --animate --days open the database, and only map imports folium.
+forecast works from stored history alone, learning any new days first.
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from response_cache import ResponseCache
+from zone_registry import DEFAULT_ZONES
+
+GEOJSON = "backend_rebuild/src/assets/data/zones.json"
+
+
+def _day(text):
+    return datetime.strptime(text, '%Y-%m-%d')
+
+
+def _loader(args):
+    from data_loader import EntsoeLoader
+    return EntsoeLoader(cache=ResponseCache(args.cache))
+
+
+def _day_arrays(loader, zones, date):
+    """Yields (zone, timestamps, prices) per zone; failed zones are reported and skipped."""
+    for zone in zones:
+        try:
+            timestamps, prices = loader.fetch_day_ahead_arrays(zone, date)
+        except Exception as e:
+            print(f"⚠️ {zone}: fetch failed ({e})", file=sys.stderr)
+            continue
+        yield zone, timestamps, prices
+
+
+def _hhmm(timestamp):
+    return str(timestamp)[11:16]
+
+
+def cmd_fetch(args):
+    from datetime import timedelta
+    from database import DatabaseManager
+
+    loader = _loader(args)
+    start = (args.date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    document_types = ('A44', 'A65') if args.load else ('A44',)
+    failed = 0
+    with DatabaseManager(args.db) as db:
+        for result in loader.fetch_many(args.zones, document_types, date_range=(start, start + timedelta(days=1))):
+            if result.error is not None:
+                print(f"⚠️ {result.zone}: {result.document_type} fetch failed ({result.error})", file=sys.stderr)
+                failed += 1
+                continue
+            if result.document_type == 'A65':
+                db.save_load(result.zone, *loader.map_load(result.content, result.zone))
+            else:
+                db.save_prices(result.zone, loader.map_xml_to_df(result.content, result.zone))
+    return 1 if failed else 0
+
+
+def cmd_cheapest(args):
+    from price_analytics import cheapest_window, steps_per_hour, top_n
+
+    found = False
+    for zone, timestamps, prices in _day_arrays(_loader(args), [args.zone], args.date):
+        if not len(prices):
+            print(f"⚠️ {zone}: no prices published")
+            continue
+        found = True
+        print(f"📉 Cheapest slots ({zone}, UTC):")
+        for i in top_n(prices, args.n):
+            print(f"   🕒 {_hhmm(timestamps[i])} - {prices[i]:.2f} €")
+        k = int(args.hours * steps_per_hour(timestamps))
+        if 0 < k <= len(prices):
+            start, mean = cheapest_window(prices, k)
+            if start >= 0:
+                print(f"   🔌 Cheapest {args.hours:g}h block: {_hhmm(timestamps[start])} (avg {mean:.2f} €)")
+    return 0 if found else 1
+
+
+def cmd_alerts(args):
+    from alert_rules import AlertEngine, default_rules, load_rules
+
+    engine = AlertEngine(load_rules(args.rules) if args.rules else default_rules(args.threshold))
+    series = {zone: (timestamps, prices) for zone, timestamps, prices in _day_arrays(_loader(args), args.zones, args.date)}
+    if args.log:
+        # Continue from earlier logged runs so an episode is only logged once
+        from database import DatabaseManager
+        with DatabaseManager(args.db) as db:
+            engine.restore(db)
+            alerts = engine.evaluate_series(series) if series else []
+            engine.persist(db, alerts)
+    else:
+        alerts = engine.evaluate_series(series) if series else []
+
+    for alert in alerts:
+        print(f"🚨 {alert.message}")
+    if not alerts and series:
+        rules = f"{len(engine.rules)} rules" if args.rules else f"no prices above {args.threshold:g} €/MWh"
+        print(f"✅ No alerts ({rules}) in {len(series)} zones.")
+    return 0 if len(series) == len(args.zones) else 1
+
+
+def _history(args):
+    """(zone, timestamps, prices) for the --days days up to and including --date, from the database."""
+    from datetime import timedelta
+    from database import DatabaseManager
+
+    end = (args.date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    with DatabaseManager(args.db) as db:
+        for zone in args.zones:
+            df = db.get_prices(zone, end - timedelta(days=args.days), end)
+            yield zone, df['timestamp'].to_numpy(), df['price'].to_numpy()
+
+
+def cmd_map(args):
+    from map_visualization import EllevioMapGenerator
+
+    if args.animate:
+        from time_map import align
+        days = _history(args) if args.days > 1 else _day_arrays(_loader(args), args.zones, args.date)
+        series = {zone: (timestamps, prices) for zone, timestamps, prices in days if len(prices)}
+        if not series:
+            return 1
+        m = EllevioMapGenerator(args.geojson).generate_time_map(*align(series))
+        if m is None:
+            return 1
+        m.save(args.out)
+        print(f"✅ Animated map saved as '{args.out}'.")
+        return 0
+
+    means = {zone: float(prices.mean()) for zone, _, prices in _day_arrays(_loader(args), args.zones, args.date)
+             if len(prices)}
+    if not means:
+        return 1
+    m = EllevioMapGenerator(args.geojson).generate_map(means)
+    if m is None:
+        return 1
+    m.save(args.out)
+    print(f"✅ Map saved as '{args.out}'.")
+    return 0
+
+
+def cmd_backfill(args):
+    from backfill import backfill
+    from data_loader import EntsoeLoader
+    from database import DatabaseManager
+
+    with DatabaseManager(args.db) as db:
+        summary = backfill(args.zones, args.start, args.end, loader=EntsoeLoader(), db=db)
+    return 1 if summary['failed'] else 0
+
+
+def cmd_forecast(args):
+    import numpy as np
+    from database import DatabaseManager
+    from price_forecast import PriceForecaster
+
+    with DatabaseManager(args.db) as db:
+        forecaster = PriceForecaster(db)
+        for zone in args.zones:
+            forecaster.update(zone)
+        result = forecaster.forecast(args.zones, args.days)
+
+    found = 0
+    for zone, issued, values in zip(result.zones, result.issued, result.values):
+        if np.isnat(issued):
+            print(f"⚠️ {zone}: no stored prices", file=sys.stderr)
+            continue
+        found += 1
+        daily = values.reshape(-1, 24)
+        print(f"🔮 {zone} (data through {issued}):")
+        for day, hours in enumerate(daily):
+            if np.isnan(hours).all():
+                continue
+            low = int(np.nanargmin(hours))
+            print(f"   {result.days[day]}  avg {np.nanmean(hours):7.2f} €  "
+                  f"min {hours[low]:7.2f} € at {low:02d}:00  max {np.nanmax(hours):7.2f} €")
+    return 0 if found == len(result.zones) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='gridwatch', description="GridWatch backend commands")
+    parser.add_argument('--cache', default=ResponseCache.CACHE_PATH, help="response cache file")
+    parser.add_argument('--db', default="backend_rebuild/db/grid_history.db", help="history database")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('fetch', help="fetch a day of prices and store them")
+    p.add_argument('zones', nargs='*', default=list(DEFAULT_ZONES))
+    p.add_argument('--date', type=_day, help="delivery day (default today)")
+    p.add_argument('--load', action='store_true', help="also fetch total load (A65) for the grid stress index")
+    p.set_defaults(run=cmd_fetch)
+
+    p = sub.add_parser('cheapest', help="cheapest slots and block of a day")
+    p.add_argument('zone')
+    p.add_argument('--date', type=_day)
+    p.add_argument('--n', type=int, default=5)
+    p.add_argument('--hours', type=float, default=3)
+    p.set_defaults(run=cmd_cheapest)
+
+    p = sub.add_parser('alerts', help="check a day's prices against the alert rules")
+    p.add_argument('zones', nargs='*', default=list(DEFAULT_ZONES))
+    p.add_argument('--date', type=_day)
+    p.add_argument('--threshold', type=float, default=100.0, help="high-price threshold of the built-in rule")
+    p.add_argument('--rules', metavar='PATH', help="alert rules (JSON) to evaluate instead")
+    p.add_argument('--log', action='store_true', help="write alerts to the database, continuing from earlier logged runs")
+    p.set_defaults(run=cmd_alerts)
+
+    p = sub.add_parser('map', help="render the day's mean price map")
+    p.add_argument('zones', nargs='*', default=list(DEFAULT_ZONES))
+    p.add_argument('--date', type=_day)
+    p.add_argument('--geojson', default=GEOJSON)
+    p.add_argument('--out', default="elpriser_karta.html")
+    p.add_argument('--animate', action='store_true', help="one map with a time slider over every timestep")
+    p.add_argument('--days', type=int, default=1, help="with --animate: days up to --date, read from the database")
+    p.set_defaults(run=cmd_map)
+
+    p = sub.add_parser('backfill', help="load a historical date range")
+    p.add_argument('zones', nargs='+')
+    p.add_argument('--start', required=True, help="First UTC day, e.g. 2023-01-01")
+    p.add_argument('--end', required=True, help="UTC day after the last one to load")
+    p.set_defaults(run=cmd_backfill)
+
+    p = sub.add_parser('forecast', help="hourly price forecast for the days after the stored history")
+    p.add_argument('zones', nargs='*', default=list(DEFAULT_ZONES))
+    p.add_argument('--days', type=int, default=7, help="days ahead (1-7 from the model, further is NaN)")
+    p.set_defaults(run=cmd_forecast)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,94 +1,263 @@
 import os
-import requests
-import pandas as pd
-import xml.etree.ElementTree as ET
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from urllib.parse import urlparse
+
+import numpy as np
+
+from entsoe_parser import parse_timeseries, to_frame
+from metrics import Metrics
+from zone_registry import eic_codes
+
+# requests, pandas and dotenv are imported on first use: a run served from the
+# response cache (e.g. cli.py alerts) never pays for them.
+
+# One completed request from EntsoeLoader.fetch_many. Exactly one of
+# `content` (raw XML bytes) and `error` is set.
+FetchResult = namedtuple('FetchResult', ['zone', 'document_type', 'content', 'error'])
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter: at most max_calls per period seconds."""
+
+    def __init__(self, max_calls, period=60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
 
-load_dotenv()
 
 class EntsoeLoader:
     BASE_URL = "https://web-api.transparency.entsoe.eu/api"
     
-    # EIC Codes for Swedish Zones
-    ZONES = {
-        'SE1': '10Y1001A1001A44P',
-        'SE2': '10Y1001A1001A45N',
-        'SE3': '10Y1001A1001A46L',
-        'SE4': '10Y1001A1001A47J'
-    }
-
-    def __init__(self):
-        self.api_key = os.getenv('VITE_ENTSOE_API_KEY')
+    # EIC codes for every bidding zone in the registry
+    ZONES = eic_codes()
+
+    # ENTSO-E allows 400 requests per minute per token; stay below that.
+    MAX_REQUESTS_PER_MINUTE = 300
+
+    def __init__(self, api_key=None, base_url=None, max_workers=4, cache=None, metrics=None):
+        if api_key is None:
+            from dotenv import load_dotenv
+            load_dotenv()
+        self.api_key = api_key or os.getenv('VITE_ENTSOE_API_KEY')
         if not self.api_key:
             raise ValueError("❌ API Key missing. Set VITE_ENTSOE_API_KEY in .env")
+        self.base_url = base_url or self.BASE_URL
+        self.max_workers = max_workers
+        self.cache = cache  # Optional ResponseCache in front of the API
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """One pooled requests session for all requests so zones share TLS connections (created on first use)."""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def _limiter_for(self, url):
+        host = urlparse(url).netloc
+        with self._limiters_lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.MAX_REQUESTS_PER_MINUTE)
+            return self._limiters[host]
+
+    def _document_params(self, document_type, zone):
+        """Query parameters identifying a document type for one bidding zone."""
+        eic = self.ZONES[zone]
+        if document_type == 'A44':    # Day-ahead prices
+            return {'documentType': 'A44', 'in_Domain': eic, 'out_Domain': eic}
+        if document_type == 'A65':    # Total load, day-ahead forecast
+            return {'documentType': 'A65', 'processType': 'A01', 'outBiddingZone_Domain': eic}
+        if document_type == 'A65-actual':    # Total load, realised
+            return {'documentType': 'A65', 'processType': 'A16', 'outBiddingZone_Domain': eic}
+        if document_type == 'A75':    # Actual generation per production type
+            return {'documentType': 'A75', 'processType': 'A16', 'in_Domain': eic}
+        raise ValueError(f"Unsupported document type: {document_type}")
+
+    def _request(self, zone, document_type, start, end):
+        """Rate-limited GET of one document; raises requests.HTTPError on non-200 responses."""
+        params = {
+            'securityToken': self.api_key,
+            'periodStart': start.strftime("%Y%m%d%H%M"),
+            'periodEnd': end.strftime("%Y%m%d%H%M"),
+        }
+        params.update(self._document_params(document_type, zone))
+
+        self._limiter_for(self.base_url).acquire()
+        try:
+            with self.metrics.stage('fetch', zone):
+                response = self.session.get(self.base_url, params=params, timeout=10)
+                response.raise_for_status()
+        except Exception:
+            self.metrics.inc('gridwatch_api_errors_total', zone=zone, document=document_type)
+            raise
+        self.metrics.inc('gridwatch_download_bytes_total', len(response.content), zone=zone, document=document_type)
+        return response
 
-    def map_xml_to_df(self, xml_content):
-        """Parses ENTSO-E XML TimeSeries into a DataFrame."""
+    def fetch_document(self, zone, document_type, start, end):
+        """
+        Fetches one raw ENTSO-E document through the pooled session, or from the
+        response cache when it holds a fresh copy.
+        Raises requests.HTTPError on non-200 responses.
+        """
+        eic = self.ZONES[zone]
+        if self.cache is not None:
+            cached = self.cache.get(document_type, eic, start, end)
+            self.metrics.inc('gridwatch_cache_requests_total', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+
+        response = self._request(zone, document_type, start, end)
+        if self.cache is not None:
+            self.cache.put(document_type, eic, start, end, response.content)
+        return response.content
+
+    def poll_document(self, zone, document_type, start, end):
+        """
+        Fetches a document from the API even if the cache holds a fresh copy, and
+        reports whether it changed: returns (content, changed). With a cache,
+        changed compares revisionNumber/createdDateTime against the cached copy;
+        without one every successful fetch counts as changed.
+        Raises requests.HTTPError on non-200 responses.
+        """
+        response = self._request(zone, document_type, start, end)
+        if self.cache is None:
+            return response.content, True
+        return response.content, self.cache.put(document_type, self.ZONES[zone], start, end, response.content)
+
+    def fetch_many(self, zones, document_types=('A44',), date_range=None):
+        """
+        Fetches every (zone, document type) combination concurrently and yields a
+        FetchResult as each request completes. date_range is a (start, end) pair of
+        datetimes and defaults to today.
+        """
+        if date_range is None:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            date_range = (today, today + timedelta(days=1))
+        start, end = date_range
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self.fetch_document, zone, doc_type, start, end): (zone, doc_type)
+                for zone in zones
+                for doc_type in document_types
+            }
+            for future in as_completed(futures):
+                zone, doc_type = futures[future]
+                try:
+                    yield FetchResult(zone, doc_type, future.result(), None)
+                except Exception as e:
+                    yield FetchResult(zone, doc_type, None, e)
+
+    def map_xml_to_df(self, xml_content, zone=None):
+        """Parses ENTSO-E XML TimeSeries into a DataFrame (empty on parse errors, which are counted)."""
         try:
-            root = ET.fromstring(xml_content)
-            # Namespace cleanup usually needed, simple generic parse here
-            points = []
-            
-            for period in root.findall(".//{*}Period"):
-                # Extract Start Time
-                start_str = period.find(".//{*}timeInterval/{*}start").text
-                start_dt = datetime.strptime(start_str, "%Y-%m-%dT%H:%M%Z")
-                resolution = period.find(".//{*}resolution").text # PT60M usually
-                
-                for point in period.findall(".//{*}Point"):
-                    pos = int(point.find(".//{*}position").text)
-                    price_node = point.find(".//{*}price.amount")
-                    
-                    if price_node is not None:
-                        val = float(price_node.text)
-                        # Add hour offset based on position
-                        time = start_dt + timedelta(hours=pos-1)
-                        points.append({'timestamp': time, 'price': val})
-            
-            return pd.DataFrame(points)
+            with self.metrics.stage('parse', zone):
+                timestamps, prices = parse_timeseries(xml_content, value_tag='price.amount')
         except Exception as e:
             print(f"XML Parse Error: {e}")
+            import pandas as pd
             return pd.DataFrame()
+        self.metrics.inc('gridwatch_rows_parsed_total', len(prices), zone=zone)
+        return to_frame(timestamps, prices)
 
-    def fetch_day_ahead_prices(self, zone):
-        """Fetches Day-ahead Prices for a specific zone. Falls back to mock data on connection failure."""
-        now = datetime.now()
-        start = now.strftime("%Y%m%d0000")
-        end = (now + timedelta(days=1)).strftime("%Y%m%d0000")
-        
-        params = {
-            'securityToken': self.api_key,
-            'documentType': 'A44',
-            'in_Domain': self.ZONES[zone],
-            'out_Domain': self.ZONES[zone],
-            'periodStart': start,
-            'periodEnd': end
-        }
-        
+    def map_load(self, xml_content, zone=None):
+        """Parses an A65 document into (timestamps as datetime64[s] UTC, load in MW); empty on parse errors."""
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
-            if response.status_code == 200:
-                return self.map_xml_to_df(response.content)
-            else:
-                print(f"⚠️ API Error {response.status_code}: {response.text}")
-                return self._generate_mock_data(now)
+            with self.metrics.stage('parse', zone):
+                timestamps, load = parse_timeseries(xml_content, value_tag='quantity')
+        except Exception as e:
+            print(f"XML Parse Error: {e}")
+            return np.empty(0, dtype='datetime64[s]'), np.empty(0)
+        self.metrics.inc('gridwatch_rows_parsed_total', len(load), zone=zone)
+        return timestamps, load
+
+    def map_generation_cube(self, results):
+        """Parses the A75 FetchResults from fetch_many into one GenerationCube (None if none succeeded)."""
+        from generation_mix import build_cube
+        documents = [(r.zone, r.content) for r in results if r.document_type == 'A75' and r.content is not None]
+        try:
+            with self.metrics.stage('parse'):
+                return build_cube(documents)
+        except Exception as e:
+            print(f"XML Parse Error: {e}")
+            return None
+
+    def fetch_day_ahead_prices(self, zone, date=None):
+        """
+        Fetches Day-ahead Prices for a specific zone and day (default today).
+        Falls back to mock data on connection failure. For date ranges use backfill.backfill.
+        """
+        import requests
+
+        now = date or datetime.now()
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        try:
+            content = self.fetch_document(zone, 'A44', start, start + timedelta(days=1))
+            return self.map_xml_to_df(content, zone)
+        except requests.HTTPError as e:
+            print(f"⚠️ API Error {e.response.status_code}: {e.response.text}")
+            return self._generate_mock_data(now, zone)
         except Exception as e:
             print(f"⚠️ Connection failed ({e}). Using Mock Data for demonstration.")
-            return self._generate_mock_data(now)
-
-    def _generate_mock_data(self, date_obj):
-        """Generates realistic mock pricing data for demo purposes."""
-        data = []
-        base_price = 45.0
-        import random
-        start_of_day = date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        for i in range(24):
-            time = start_of_day + timedelta(hours=i)
-            # Create a simplified price curve (higher in morning/evening)
-            hour_factor = 1.5 if 7 <= i <= 9 or 17 <= i <= 19 else 1.0
-            price = base_price * hour_factor + random.uniform(-5, 5)
-            data.append({'timestamp': time, 'price': round(price, 2)})
-            
-        return pd.DataFrame(data)
+            return self._generate_mock_data(now, zone)
+
+    def fetch_day_ahead_arrays(self, zone, date=None):
+        """
+        Pandas-free fetch_day_ahead_prices for small series: (timestamps as
+        datetime64[s] UTC, prices) of one day, via the response cache when set.
+        There is no mock fallback; API and connection errors are raised.
+        """
+        start = (date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        content = self.fetch_document(zone, 'A44', start, start + timedelta(days=1))
+        with self.metrics.stage('parse', zone):
+            timestamps, prices = parse_timeseries(content, value_tag='price.amount')
+        self.metrics.inc('gridwatch_rows_parsed_total', len(prices), zone=zone)
+        return timestamps, prices
+
+    def fetch_load_arrays(self, zone, date=None, actual=False):
+        """
+        Total load (A65) of one day as (timestamps, MW): the day-ahead forecast,
+        or the realised load with actual=True. Errors are raised.
+        """
+        start = (date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        content = self.fetch_document(zone, 'A65-actual' if actual else 'A65', start, start + timedelta(days=1))
+        return self.map_load(content, zone)
+
+    def _generate_mock_data(self, date_obj, zone='SE3'):
+        """Generates realistic mock pricing data for demo purposes (the same zone and day always give the same prices)."""
+        from synthetic import generate_prices
+        day = date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
+        market = generate_prices([zone], day, days=1, resolution='PT60M', seed=int(day.strftime('%Y%m%d')) ^ zlib.crc32(zone.encode()))
+        return to_frame(market.timestamps, market.prices[0])
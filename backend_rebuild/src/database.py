@@ -1,26 +1,97 @@
 import pandas as pd
+import numpy as np
 import sqlite3
+import json
 import os
+import time
+
+from archive import ARCHIVE_AVAILABLE, PriceArchive, month_bounds
+from generation_mix import GenerationSeries, assemble_cube, total_generation
+from grid_stress import NO_LEVEL, StressFrame, align, stress_index, stress_levels
+from metrics import Metrics
 
 class DatabaseManager:
     DB_PATH = "backend_rebuild/db/grid_history.db"
 
-    def __init__(self):
+    # Alerts are buffered and written in one transaction once this many are pending
+    ALERT_BATCH_SIZE = 100
+
+    # Change feed rows kept for resuming subscribers (see get_changes)
+    CHANGE_RETENTION = 50000
+
+    # Whole months older than this are moved to the Arrow archive by archive_cold
+    COLD_MONTHS = 3
+
+    # Coarsest price/load resolution (s): a point can affect grid stress this far after it
+    STRESS_REACH = 3600
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",   # Safe with WAL; fsync only at checkpoints
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-65536",    # 64 MiB page cache
+        "PRAGMA mmap_size=268435456",  # 256 MiB memory-mapped reads
+    )
+
+    def __init__(self, db_path=None, archive_path=None, metrics=None):
+        self.db_path = db_path or self.DB_PATH
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.conn = sqlite3.connect(self.db_path)
+        # Cold months live next to the database (grid_history_archive/) when pyarrow is installed
+        if archive_path is None and self.db_path != ':memory:':
+            archive_path = os.path.splitext(self.db_path)[0] + '_archive'
+        self.archive = PriceArchive(archive_path) if ARCHIVE_AVAILABLE and archive_path else None
+        for pragma in self.PRAGMAS:
+            self.conn.execute(pragma)
+        self._pending_alerts = []
+        self.saved_seq = None       # Change feed seq of the last save_prices here (None if it changed nothing)
+        self._listeners = {'prices': [], 'load': [], 'generation': []}
+        self._alert_listeners = []
         self._init_db()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Flushes buffered alerts and closes the connection."""
+        if self.conn is None:
+            return
+        self.flush_alerts()
+        self.conn.close()
+        self.conn = None
+
+    def add_listener(self, callback, kind='prices'):
+        """
+        Registers callback(zone, timestamps, values), called after each committed
+        batch with epoch-second timestamps and values as NumPy arrays: prices from
+        save_prices, MW from save_load (kind='load'; the stored load, realised
+        where known, else forecast, so a late forecast never hides actual load)
+        or total MW over the production types of a save_generation batch
+        (kind='generation').
+        """
+        self._listeners[kind].append(callback)
+
+    def add_alert_listener(self, callback):
+        """Registers callback(alerts), called with the (zone, message, level) tuples of each committed alert batch."""
+        self._alert_listeners.append(callback)
+
     def _init_db(self):
         """Initialize SQLite database with required tables."""
-        conn = sqlite3.connect(self.DB_PATH)
-        c = conn.cursor()
+        c = self.conn.cursor()
         
-        # Table: Historical Prices
+        # Table: Historical Prices. Timestamps are UTC epoch seconds; WITHOUT ROWID
+        # clusters rows on (zone, timestamp) so the primary key covers range scans,
+        # latest-N lookups and aggregates without touching a separate table.
         c.execute('''
             CREATE TABLE IF NOT EXISTS prices (
-                zone TEXT,
-                timestamp DATETIME,
+                zone TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
                 price REAL,
                 PRIMARY KEY (zone, timestamp)
-            )
+            ) WITHOUT ROWID
         ''')
         
         # Table: Alerts (Market Monitoring)
@@ -33,33 +104,840 @@ class DatabaseManager:
                 level TEXT
             )
         ''')
-        
-        conn.commit()
-        conn.close()
+        c.execute("CREATE INDEX IF NOT EXISTS idx_alerts_zone_time ON alerts (zone, timestamp)")
+
+        # Table: Change feed. One row per committed price or alert batch holding only
+        # the delta as JSON; seq is the monotonically increasing event id subscribers
+        # resume from. Written in the same transaction as the data it describes.
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                zone TEXT,
+                payload TEXT NOT NULL
+            )
+        ''')
+
+        # Table: Price rollups per zone and hour/day/month bucket, maintained by save_prices.
+        # Stores sum and count rather than the mean so buckets can be merged exactly.
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS price_rollups (
+                zone TEXT NOT NULL,
+                granularity TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                PRIMARY KEY (zone, granularity, bucket)
+            ) WITHOUT ROWID
+        ''')
+
+        # Table: Generation per production type (A75). One row per zone, psrType and
+        # UTC day holding that day's values as a float32 array (NaN = not reported),
+        # instead of one row per point.
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS generation (
+                zone TEXT NOT NULL,
+                psr_type TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                resolution INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (zone, psr_type, day)
+            ) WITHOUT ROWID
+        ''')
+
+        # Table: Total load (A65) per zone in MW, day-ahead forecast and realised
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS load (
+                zone TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                forecast REAL,
+                actual REAL,
+                PRIMARY KEY (zone, timestamp)
+            ) WITHOUT ROWID
+        ''')
+
+        # Table: Grid stress index and level (grid_stress.LEVELS code) on the common
+        # price/load grid, maintained by save_prices and save_load.
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS grid_stress (
+                zone TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                stress REAL NOT NULL,
+                level INTEGER NOT NULL,
+                PRIMARY KEY (zone, timestamp)
+            ) WITHOUT ROWID
+        ''')
+
+        self.conn.commit()
+        self._migrate()
+
+    def _migrate(self):
+        """Upgrades databases created by earlier versions (tracked in PRAGMA user_version)."""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+        if version < 1:
+            # v1: prices.timestamp moved from DATETIME text to integer epoch seconds
+            columns = {row[1]: row[2] for row in self.conn.execute("PRAGMA table_info(prices)")}
+            if columns.get('timestamp', '').upper() == 'DATETIME':
+                with self.conn:
+                    self.conn.execute("ALTER TABLE prices RENAME TO prices_v0")
+                    self.conn.execute('''
+                        CREATE TABLE prices (
+                            zone TEXT NOT NULL,
+                            timestamp INTEGER NOT NULL,
+                            price REAL,
+                            PRIMARY KEY (zone, timestamp)
+                        ) WITHOUT ROWID
+                    ''')
+                    self.conn.execute('''
+                        INSERT OR REPLACE INTO prices (zone, timestamp, price)
+                        SELECT zone, CAST(strftime('%s', timestamp) AS INTEGER), price FROM prices_v0
+                    ''')
+                    self.conn.execute("DROP TABLE prices_v0")
+            self.conn.execute("PRAGMA user_version = 1")
+
+        if version < 2:
+            # v2: price_rollups introduced; populate it from existing raw prices
+            self.rebuild_rollups()
+            self.conn.execute("PRAGMA user_version = 2")
+
+    @staticmethod
+    def _to_epoch(value):
+        """Converts a datetime-like value to UTC epoch seconds (naive values are taken as UTC)."""
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert('UTC').tz_localize(None)
+        return int(ts.value // 10**9)
+
+    @staticmethod
+    def _frame(rows, columns, dtypes):
+        """Builds a NumPy-backed DataFrame from fetched rows; 'timestamp'-like int columns become datetime64."""
+        arr = np.array(rows, dtype=[(name, 'i8' if dtype == 'datetime64' else dtype)
+                                    for name, dtype in zip(columns, dtypes)])
+        data = {}
+        for name, dtype in zip(columns, dtypes):
+            col = arr[name]
+            data[name] = col.astype('datetime64[s]') if dtype == 'datetime64' else col
+        return pd.DataFrame(data)
 
     def save_prices(self, zone, df):
-        """Saves a DataFrame of prices to the database."""
-        if df.empty: return
-        
-        conn = sqlite3.connect(self.DB_PATH)
-        # Ensure correct column names for mapping
-        df['zone'] = zone
-        df = df[['zone', 'timestamp', 'price']] # Reorder if needed
-        
+        """
+        Upserts a DataFrame of prices (timestamp, price) in one transaction.
+        Rows that already exist for (zone, timestamp) are updated, so overlapping
+        batches never drop new data. Returns the number of rows written.
+        """
+        if df.empty: return 0
+
+        timestamps = df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        prices = df['price'].to_numpy(dtype=np.float64)
+        # Missing points (NaN) are not stored rather than written as NULL prices
+        valid = ~np.isnan(prices)
+        timestamps, prices = timestamps[valid], prices[valid]
+        rows = zip([zone] * len(prices), timestamps.tolist(), prices.tolist())
+
+        thawed = []
+        self.saved_seq = None
         try:
-            df.to_sql('prices', conn, if_exists='append', index=False)
-            print(f"💾 Saved {len(df)} rows for {zone} to DB.")
-        except sqlite3.IntegrityError:
-            print(f"⚠️ Data for {zone} already exists, skipping duplicates.")
-        except Exception as e:
-            print(f"DB Error: {e}")
-        finally:
-            conn.close()
+            with self.metrics.stage('store', zone), self.conn:
+                if len(timestamps):
+                    thawed = self._thaw(zone, int(timestamps.min()), int(timestamps.max()))
+                delta = self._price_delta(zone, timestamps, prices) if len(timestamps) else None
+                self.conn.executemany('''
+                    INSERT INTO prices (zone, timestamp, price) VALUES (?, ?, ?)
+                    ON CONFLICT(zone, timestamp) DO UPDATE SET price = excluded.price
+                ''', rows)
+                if len(timestamps):
+                    self._update_rollups(zone, int(timestamps.min()), int(timestamps.max()))
+                    self._update_stress(zone, int(timestamps.min()), int(timestamps.max()))
+                if delta is not None:
+                    self.saved_seq = self._record_change('prices', zone, delta)
+        except sqlite3.Error as e:
+            print(f"DB Error while saving {zone}: {e}")
+            raise
+        for month in thawed:
+            self.archive.remove('prices', zone, month)
+
+        self.metrics.inc('gridwatch_rows_written_total', len(prices), zone=zone)
+        print(f"💾 Saved {len(prices)} rows for {zone} to DB.")
+        for callback in self._listeners['prices']:
+            callback(zone, timestamps, prices)
+        return len(prices)
+
+    # --- Generation ------------------------------------------------------
+
+    def save_generation(self, cube):
+        """
+        Stores a GenerationCube as one float32 blob per (zone, psrType, UTC day).
+        Days already stored at the same resolution are merged, so partial days
+        only overwrite the points they report. Returns the number of day rows written.
+        """
+        if cube is None or not len(cube.timestamps):
+            return 0
+        step = int((cube.timestamps[1] - cube.timestamps[0]).astype(np.int64)) if len(cube.timestamps) > 1 else 3600
+        per_day = 86400 // step
+        first = int(cube.timestamps[0].astype(np.int64))
+        lead = (first % 86400) // step
+        day0 = first - first % 86400
+
+        # Pad the time axis to whole days: (zones x types x days x steps per day)
+        values = cube.values
+        tail = -(lead + values.shape[2]) % per_day
+        values = np.pad(values, ((0, 0), (0, 0), (lead, tail)), constant_values=np.nan)
+        values = values.reshape(values.shape[0], values.shape[1], -1, per_day).astype(np.float32)
+        days = day0 + 86400 * np.arange(values.shape[2])
+
+        rows = []
+        for zi, zone in enumerate(cube.zones):
+            existing = {
+                (psr, day): np.frombuffer(data, dtype=np.float32)
+                for psr, day, data in self.conn.execute(
+                    "SELECT psr_type, day, data FROM generation WHERE zone = ? AND day >= ? AND day <= ? AND resolution = ?",
+                    (zone, int(days[0]), int(days[-1]), step)
+                )
+            }
+            reported = ~np.isnan(values[zi]).all(axis=2)
+            for pi, di in zip(*np.nonzero(reported)):
+                psr, day = cube.psr_types[pi], int(days[di])
+                data = values[zi, pi, di]
+                old = existing.get((psr, day))
+                if old is not None:
+                    data = np.where(np.isnan(data), old, data)
+                rows.append((zone, psr, day, step, data.tobytes()))
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO generation (zone, psr_type, day, resolution, data) VALUES (?, ?, ?, ?, ?)
+            """, rows)
+        print(f"💾 Saved {len(rows)} generation day rows for {len(cube.zones)} zones to DB.")
+        if self._listeners['generation']:
+            timestamps = cube.timestamps.astype('datetime64[s]').astype(np.int64)
+            totals = total_generation(cube)
+            for callback in self._listeners['generation']:
+                for zone, total in zip(cube.zones, totals):
+                    callback(zone, timestamps, total)
+        return len(rows)
+
+    def get_generation(self, zones=None, start=None, end=None):
+        """GenerationCube for the given zones (default all) in [start, end), or None if nothing is stored."""
+        clause, params = [], []
+        if zones is not None:
+            zones = list(zones)
+            clause.append(f"zone IN ({','.join('?' * len(zones))})")
+            params += zones
+        lo = self._to_epoch(start) if start is not None else None
+        hi = self._to_epoch(end) if end is not None else None
+        if lo is not None:
+            clause.append("day > ?")
+            params.append(lo - 86400)
+        if hi is not None:
+            clause.append("day < ?")
+            params.append(hi)
+        where = f" WHERE {' AND '.join(clause)}" if clause else ""
+
+        rows = self.conn.execute(
+            f"SELECT zone, psr_type, day, resolution, data FROM generation{where} ORDER BY zone, day", params
+        ).fetchall()
+        if self.archive is not None:
+            # Archived rows first: assemble_cube lets later (SQLite) values win
+            archived = [
+                (zone,) + row
+                for zone in (zones if zones is not None else self.archive.zones('generation'))
+                for row in self.archive.read_generation(zone, lo, hi)
+            ]
+            rows = archived + rows
+        series = [
+            GenerationSeries(zone, psr, np.datetime64(day, 's').astype('datetime64[m]'),
+                             np.timedelta64(resolution // 60, 'm'), np.frombuffer(data, dtype=np.float32))
+            for zone, psr, day, resolution, data in rows
+        ]
+        if zones is not None:
+            series.sort(key=lambda s: zones.index(s.zone))
+        return assemble_cube(
+            series,
+            start=None if lo is None else np.datetime64(lo, 's'),
+            end=None if hi is None else np.datetime64(hi, 's'),
+        )
+
+    # --- Load and grid stress ------------------------------------------------
+
+    def save_load(self, zone, timestamps, load, actual=False):
+        """
+        Upserts total load (MW) for a zone as the day-ahead forecast or, with
+        actual=True, the realised value, and refreshes the grid stress of the
+        affected range. Returns the number of rows written.
+        """
+        timestamps = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+        load = np.asarray(load, dtype=np.float64)
+        valid = ~np.isnan(load)
+        timestamps, load = timestamps[valid], load[valid]
+        if not len(load):
+            return 0
+        column = 'actual' if actual else 'forecast'
+        with self.conn:
+            self.conn.executemany(f'''
+                INSERT INTO load (zone, timestamp, {column}) VALUES (?, ?, ?)
+                ON CONFLICT(zone, timestamp) DO UPDATE SET {column} = excluded.{column}
+            ''', zip([zone] * len(load), timestamps.tolist(), load.tolist()))
+            self._update_stress(zone, int(timestamps.min()), int(timestamps.max()))
+        print(f"💾 Saved {len(load)} load rows for {zone} to DB.")
+        if self._listeners['load']:
+            if not actual:
+                # Steps that already hold realised load keep it, as get_load and the stress index do
+                known = np.array(self.conn.execute('''
+                    SELECT timestamp, actual FROM load
+                    WHERE zone = ? AND timestamp >= ? AND timestamp <= ? AND actual IS NOT NULL ORDER BY timestamp
+                ''', (zone, int(timestamps.min()), int(timestamps.max()))).fetchall(), dtype=np.float64).reshape(-1, 2)
+                if len(known):
+                    idx = np.minimum(np.searchsorted(known[:, 0], timestamps), len(known) - 1)
+                    load = np.where(known[idx, 0] == timestamps, known[idx, 1], load)
+            for callback in self._listeners['load']:
+                callback(zone, timestamps, load)
+        return len(load)
+
+    def _update_stress(self, zone, lo, hi):
+        """
+        Recomputes grid stress around [lo, hi] from stored prices and load
+        (realised where known, else forecast), inside the caller's transaction.
+        Returns the number of stress rows written.
+        """
+        window = (zone, lo - self.STRESS_REACH, hi + self.STRESS_REACH)
+        load = np.array(self.conn.execute('''
+            SELECT timestamp, COALESCE(actual, forecast) FROM load
+            WHERE zone = ? AND timestamp >= ? AND timestamp <= ? AND COALESCE(actual, forecast) IS NOT NULL
+        ''', window).fetchall(), dtype=np.float64).reshape(-1, 2)
+        if not len(load):
+            return 0
+        prices = np.array(self.conn.execute(
+            "SELECT timestamp, price FROM prices WHERE zone = ? AND timestamp >= ? AND timestamp <= ?", window
+        ).fetchall(), dtype=np.float64).reshape(-1, 2)
+        if not len(prices):
+            return 0
+
+        _, grid, p, l = align({zone: (prices[:, 0].astype(np.int64), prices[:, 1])},
+                              {zone: (load[:, 0].astype(np.int64), load[:, 1])})
+        index = stress_index(p[0], l[0])
+        known = ~np.isnan(index)
+        self.conn.executemany('''
+            INSERT INTO grid_stress (zone, timestamp, stress, level) VALUES (?, ?, ?, ?)
+            ON CONFLICT(zone, timestamp) DO UPDATE SET stress = excluded.stress, level = excluded.level
+        ''', zip([zone] * int(known.sum()), grid[known].tolist(), index[known].tolist(),
+                 stress_levels(index[known]).tolist()))
+        return int(known.sum())
+
+    def get_load(self, zone, start=None, end=None):
+        """Total load for a zone in [start, end): timestamp, forecast and actual MW (NaN where not published)."""
+        clause, params = self._range_clause(zone, start, end)
+        rows = self.conn.execute(
+            f"SELECT timestamp, forecast, actual FROM load WHERE {clause} ORDER BY timestamp", params
+        ).fetchall()
+        rows = [(ts, np.nan if f is None else f, np.nan if a is None else a) for ts, f, a in rows]
+        return self._frame(rows, ['timestamp', 'forecast', 'actual'], ['datetime64', 'f8', 'f8'])
+
+    def get_grid_stress(self, zones, start=None, end=None, min_level=None):
+        """
+        Stored grid stress for the given zones in [start, end) as a StressFrame
+        on the union of their timestamps (index NaN and level NO_LEVEL where a
+        zone has none). min_level (a grid_stress.LEVELS code) keeps only steps
+        at or above it, e.g. 2 for HIGH and CRITICAL. Prices and load are not
+        part of the result (None).
+        """
+        zones = tuple(zones)
+        parts = []
+        for zone in zones:
+            clause, params = self._range_clause(zone, start, end)
+            if min_level is not None:
+                clause += " AND level >= ?"
+                params.append(int(min_level))
+            parts.append(np.array(self.conn.execute(
+                f"SELECT timestamp, stress, level FROM grid_stress WHERE {clause} ORDER BY timestamp", params
+            ).fetchall(), dtype=[('timestamp', 'i8'), ('stress', 'f8'), ('level', 'i1')]))
+        grid = np.unique(np.concatenate([part['timestamp'] for part in parts])) if parts else \
+            np.empty(0, dtype=np.int64)
+        index = np.full((len(zones), len(grid)), np.nan)
+        level = np.full((len(zones), len(grid)), NO_LEVEL, dtype=np.int8)
+        for row, part in enumerate(parts):
+            cols = np.searchsorted(grid, part['timestamp'])
+            index[row, cols] = part['stress']
+            level[row, cols] = part['level']
+        return StressFrame(zones, grid.astype('datetime64[s]'), None, None, index, level)
+
+    # --- Archive -----------------------------------------------------------
+
+    def archive_cold(self, before=None):
+        """
+        Moves whole UTC months older than `before` (default: start of the month
+        COLD_MONTHS ago) from the prices and generation tables to the Arrow
+        archive. Rollups stay in SQLite. Returns the number of partitions written.
+        """
+        if self.archive is None:
+            print("⚠️ Archive disabled (pyarrow not installed).")
+            return 0
+        if before is None:
+            before = np.datetime64('today', 'M') - self.COLD_MONTHS
+        cutoff = month_bounds(str(np.datetime64(before, 'M')))[0]
+
+        written = 0
+        spans = self.conn.execute(
+            "SELECT zone, MIN(timestamp) FROM prices WHERE timestamp < ? GROUP BY zone", (cutoff,)
+        ).fetchall()
+        for zone, first in spans:
+            month = np.datetime64(first, 's').astype('datetime64[M]')
+            while month_bounds(str(month))[0] < cutoff:
+                lo, hi = month_bounds(str(month))
+                rows = self.conn.execute(
+                    "SELECT timestamp, price FROM prices WHERE zone = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                    (zone, lo, hi)
+                ).fetchall()
+                if rows:
+                    data = np.array(rows, dtype=np.float64)
+                    self.archive.write_prices(zone, str(month), data[:, 0].astype(np.int64), data[:, 1])
+                    with self.conn:
+                        self.conn.execute("DELETE FROM prices WHERE zone = ? AND timestamp >= ? AND timestamp < ?",
+                                          (zone, lo, hi))
+                    written += 1
+                month += 1
+
+        spans = self.conn.execute(
+            "SELECT zone, MIN(day) FROM generation WHERE day < ? GROUP BY zone", (cutoff,)
+        ).fetchall()
+        for zone, first in spans:
+            month = np.datetime64(first, 's').astype('datetime64[M]')
+            while month_bounds(str(month))[0] < cutoff:
+                lo, hi = month_bounds(str(month))
+                rows = self.conn.execute(
+                    "SELECT psr_type, day, resolution, data FROM generation WHERE zone = ? AND day >= ? AND day < ?",
+                    (zone, lo, hi)
+                ).fetchall()
+                if rows:
+                    self.archive.write_generation(zone, str(month), rows)
+                    with self.conn:
+                        self.conn.execute("DELETE FROM generation WHERE zone = ? AND day >= ? AND day < ?",
+                                          (zone, lo, hi))
+                    written += 1
+                month += 1
+
+        print(f"🗄️ Archived {written} zone/month partitions older than {np.datetime64(cutoff, 's')}.")
+        return written
+
+    def _thaw(self, zone, ts_min, ts_max):
+        """
+        Copies archived months touched by a write back into prices (inside the
+        caller's transaction) so upserts and rollups see the full month.
+        Returns the months whose files should be removed after commit.
+        """
+        if self.archive is None:
+            return []
+        months = []
+        for month, _ in self.archive.partitions('prices', zone, ts_min, ts_max + 1):
+            ts, prices = self.archive.read_month(zone, month)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO prices (zone, timestamp, price) VALUES (?, ?, ?)",
+                zip([zone] * len(ts), ts.tolist(), prices.tolist())
+            )
+            months.append(month)
+        return months
+
+    def _merge_archive(self, zone, ts, prices, start, end):
+        """Adds archived points in [start, end) to SQLite results (SQLite wins on duplicates)."""
+        if self.archive is None:
+            return ts, prices
+        a_ts, a_prices = self.archive.read_prices(zone, start, end)
+        if not len(a_ts):
+            return ts, prices
+        if not len(ts):
+            return a_ts, a_prices
+        keep = ~np.isin(a_ts, ts)
+        ts = np.concatenate([a_ts[keep], ts])
+        prices = np.concatenate([a_prices[keep], prices])
+        order = np.argsort(ts, kind='stable')
+        return ts[order], prices[order]
+
+    # --- Change feed -----------------------------------------------------
+
+    def _price_delta(self, zone, timestamps, prices):
+        """
+        Splits a batch into points that are new and points whose stored price
+        changes (read before the upsert). Returns None if nothing changes.
+        """
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, prices = timestamps[order], prices[order]
+        existing = np.array(self.conn.execute(
+            "SELECT timestamp, price FROM prices WHERE zone = ? AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+            (zone, int(timestamps[0]), int(timestamps[-1]))
+        ).fetchall(), dtype=np.float64).reshape(-1, 2)
+        old_ts = existing[:, 0].astype(np.int64)
+
+        idx = np.minimum(np.searchsorted(old_ts, timestamps), max(len(old_ts) - 1, 0))
+        found = (old_ts[idx] == timestamps) if len(old_ts) else np.zeros(len(timestamps), dtype=bool)
+        new = ~found
+        revised = found & (existing[idx, 1] != prices) if len(old_ts) else found
+        if not new.any() and not revised.any():
+            return None
+        return {
+            'zone': zone,
+            'new': {'timestamps': timestamps[new].tolist(), 'prices': prices[new].tolist()},
+            'revised': {'timestamps': timestamps[revised].tolist(), 'prices': prices[revised].tolist()},
+        }
+
+    def _record_change(self, kind, zone, payload):
+        """Appends a change feed event (inside the caller's transaction) and trims old events."""
+        payload['committed'] = time.time()
+        seq = self.conn.execute(
+            "INSERT INTO changes (kind, zone, payload) VALUES (?, ?, ?)",
+            (kind, zone, json.dumps(payload, separators=(',', ':')))
+        ).lastrowid
+        if seq % 1000 == 0:
+            self.conn.execute("DELETE FROM changes WHERE seq <= ?", (seq - self.CHANGE_RETENTION,))
+        return seq
+
+    def get_changes(self, after=0, limit=1000):
+        """Change feed events with seq > after, oldest first, as (seq, kind, zone, payload JSON text) rows."""
+        return self.conn.execute(
+            "SELECT seq, kind, zone, payload FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (after, limit)
+        ).fetchall()
+
+    def first_change_seq(self):
+        """Oldest retained change seq (None if the feed is empty); older ids can no longer be resumed."""
+        return self.conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+
+    def last_change_seq(self, kind=None, before=None):
+        """Newest change seq (0 if none), optionally only of one kind and/or older than `before`."""
+        if kind is None and before is None:
+            return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        row = self.conn.execute(
+            "SELECT seq FROM changes WHERE (? IS NULL OR kind = ?) AND seq < ? ORDER BY seq DESC LIMIT 1",
+            (kind, kind, before if before is not None else 2 ** 62)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _alert_change(self, alerts):
+        self._record_change('alerts', None, {
+            'alerts': [{'zone': zone, 'message': message, 'level': level} for zone, message, level in alerts]
+        })
+
+    # --- Rollups -----------------------------------------------------------
+
+    # Each granularity is built from the one below it, so raw prices are only
+    # scanned for the hourly level: (granularity, source granularity, bucket expr, numpy unit)
+    ROLLUP_LEVELS = (
+        ('hour', None, "(timestamp / 3600) * 3600", 'h'),
+        ('day', 'hour', "(bucket / 86400) * 86400", 'D'),
+        ('month', 'day', "CAST(strftime('%s', bucket, 'unixepoch', 'start of month') AS INTEGER)", 'M'),
+    )
+
+    def _rollup_level(self, granularity, source, bucket_expr, zone=None, lo=None, hi=None):
+        """Recomputes one rollup level, optionally for a zone and [lo, hi) bucket range."""
+        conditions, params = [], [granularity]
+        if source is None:
+            select = f"SELECT zone, ?, {bucket_expr}, COUNT(*), SUM(price), MIN(price), MAX(price) FROM prices"
+            time_col = 'timestamp'
+        else:
+            select = f"SELECT zone, ?, {bucket_expr}, SUM(count), SUM(sum), MIN(min), MAX(max) FROM price_rollups"
+            time_col = 'bucket'
+            conditions.append("granularity = ?")
+            params.append(source)
+
+        if zone is not None:
+            conditions.append("zone = ?")
+            params.append(zone)
+        if lo is not None:
+            conditions.append(f"{time_col} >= ? AND {time_col} < ?")
+            params += [lo, hi]
+            self.conn.execute(
+                "DELETE FROM price_rollups WHERE zone = ? AND granularity = ? AND bucket >= ? AND bucket < ?",
+                (zone, granularity, lo, hi)
+            )
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.conn.execute(f"INSERT OR REPLACE INTO price_rollups {select}{where} GROUP BY 1, 3", params)
+
+    def _update_rollups(self, zone, ts_min, ts_max):
+        """Refreshes only the rollup buckets covering [ts_min, ts_max] (called inside save_prices' transaction)."""
+        first = np.datetime64(ts_min, 's')
+        last = np.datetime64(ts_max, 's')
+        for granularity, source, bucket_expr, unit in self.ROLLUP_LEVELS:
+            lo = first.astype(f'datetime64[{unit}]')
+            hi = last.astype(f'datetime64[{unit}]') + 1
+            self._rollup_level(granularity, source, bucket_expr, zone,
+                               int(lo.astype('datetime64[s]').astype(np.int64)),
+                               int(hi.astype('datetime64[s]').astype(np.int64)))
+
+    def rebuild_rollups(self):
+        """Regenerates all rollups from raw prices (SQLite and archive) in a single pass."""
+        with self.conn:
+            self.conn.execute("DELETE FROM price_rollups")
+            if self.archive is not None:
+                for zone in self.archive.zones('prices'):
+                    for ts, prices in self.archive.scan(zone):
+                        self._insert_hour_rollups(zone, ts, prices)
+            for granularity, source, bucket_expr, _ in self.ROLLUP_LEVELS:
+                self._rollup_level(granularity, source, bucket_expr)
+
+    def _insert_hour_rollups(self, zone, ts, prices):
+        """Hourly rollup rows for archived points (the SQL hour level only sees the prices table)."""
+        hour = ts - ts % 3600
+        order = np.lexsort((prices, hour))
+        hour, prices = hour[order], prices[order]
+        starts = np.flatnonzero(np.r_[True, hour[1:] != hour[:-1]])
+        ends = np.r_[starts[1:], len(hour)]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO price_rollups VALUES (?, 'hour', ?, ?, ?, ?, ?)",
+            zip([zone] * len(starts), hour[starts].tolist(), (ends - starts).tolist(),
+                np.add.reduceat(prices, starts).tolist(), prices[starts].tolist(), prices[ends - 1].tolist())
+        )
 
     def log_alert(self, zone, message, level="WARNING"):
-        conn = sqlite3.connect(self.DB_PATH)
-        c = conn.cursor()
-        c.execute("INSERT INTO alerts (zone, message, level) VALUES (?, ?, ?)", (zone, message, level))
-        conn.commit()
-        conn.close()
+        """Buffers an alert; alerts are written in batches (see flush_alerts)."""
+        self._pending_alerts.append((zone, message, level))
         print(f"🚨 ALERT LOGGED: {message}")
+        if len(self._pending_alerts) >= self.ALERT_BATCH_SIZE:
+            self.flush_alerts()
+
+    def log_alerts(self, alerts):
+        """Writes a batch of (zone, message, level) alerts immediately, in one transaction."""
+        alerts = list(alerts)
+        if not alerts:
+            return
+        with self.conn:
+            self.insert_alerts(alerts)
+        self.alerts_committed(alerts)
+
+    def insert_alerts(self, alerts):
+        """
+        Writes (zone, message, level) alerts inside the caller's transaction, for
+        callers committing them together with their own rows. Call
+        alerts_committed(alerts) once that transaction has committed.
+        """
+        self.conn.executemany("INSERT INTO alerts (zone, message, level) VALUES (?, ?, ?)", alerts)
+        self._alert_change(alerts)
+
+    def alerts_committed(self, alerts):
+        """Reports a committed alert batch and notifies the alert listeners."""
+        for _, message, _ in alerts:
+            print(f"🚨 ALERT LOGGED: {message}")
+        for callback in self._alert_listeners:
+            callback(alerts)
+
+    def flush_alerts(self):
+        """Writes all buffered alerts in a single transaction."""
+        if not self._pending_alerts:
+            return
+        alerts, self._pending_alerts = self._pending_alerts, []
+        with self.conn:
+            self.insert_alerts(alerts)
+        for callback in self._alert_listeners:
+            callback(alerts)
+
+    # --- Queries -----------------------------------------------------------
+
+    # SQL expressions mapping an epoch timestamp to the start of its UTC bucket.
+    # Weeks start on Monday (1970-01-01 was a Thursday, hence the 3-day shift).
+    BUCKETS = {
+        'hour': "(timestamp / 3600) * 3600",
+        'day': "(timestamp / 86400) * 86400",
+        'week': "((timestamp + 259200) / 604800) * 604800 - 259200",
+        'month': "CAST(strftime('%s', timestamp, 'unixepoch', 'start of month') AS INTEGER)",
+    }
+
+    def _range_clause(self, zone, start, end):
+        clause, params = "zone = ?", [zone]
+        if start is not None:
+            clause += " AND timestamp >= ?"
+            params.append(self._to_epoch(start))
+        if end is not None:
+            clause += " AND timestamp < ?"
+            params.append(self._to_epoch(end))
+        return clause, params
+
+    def _bounds(self, start, end):
+        return (None if start is None else self._to_epoch(start),
+                None if end is None else self._to_epoch(end))
+
+    @staticmethod
+    def _price_frame(ts, prices):
+        """DataFrame over epoch/price arrays without copying (archive reads stay memory-mapped)."""
+        return pd.DataFrame({'timestamp': ts.view('datetime64[s]'), 'price': prices}, copy=False)
+
+    def get_prices(self, zone, start=None, end=None):
+        """Prices for a zone in [start, end), ordered by time, including archived months."""
+        clause, params = self._range_clause(zone, start, end)
+        rows = self.conn.execute(
+            f"SELECT timestamp, price FROM prices WHERE {clause} ORDER BY timestamp", params
+        ).fetchall()
+        if self.archive is None:
+            return self._frame(rows, ['timestamp', 'price'], ['datetime64', 'f8'])
+        arr = np.array(rows, dtype=[('timestamp', 'i8'), ('price', 'f8')])
+        ts, prices = self._merge_archive(zone, arr['timestamp'], arr['price'], *self._bounds(start, end))
+        return self._price_frame(ts, prices)
+
+    def get_latest_prices(self, zone, n=1):
+        """The n most recent prices for a zone, oldest first."""
+        rows = self.conn.execute(
+            "SELECT timestamp, price FROM prices WHERE zone = ? ORDER BY timestamp DESC LIMIT ?",
+            (zone, n)
+        ).fetchall()
+        if self.archive is None or len(rows) >= n:
+            return self._frame(rows[::-1], ['timestamp', 'price'], ['datetime64', 'f8'])
+        arr = np.array(rows[::-1], dtype=[('timestamp', 'i8'), ('price', 'f8')])
+        a_ts, a_prices = self.archive.latest(zone, n)
+        if len(arr):
+            older = a_ts < arr['timestamp'][0]
+            a_ts, a_prices = a_ts[older], a_prices[older]
+        ts = np.concatenate([a_ts, arr['timestamp']])[-n:]
+        prices = np.concatenate([a_prices, arr['price']])[-n:]
+        return self._price_frame(ts, prices)
+
+    def get_complete_days(self, zone, start=None, end=None):
+        """
+        Epoch seconds of the UTC days in [start, end) whose prices cover the whole
+        day on a regular grid (any resolution): the first point is at midnight
+        and count points are evenly spread, i.e. (last - midnight) * count ==
+        86400 * (count - 1).
+        """
+        clause, params = self._range_clause(zone, start, end)
+        rows = self.conn.execute(f'''
+            SELECT (timestamp / 86400) * 86400 AS day FROM prices WHERE {clause}
+            GROUP BY day
+            HAVING MIN(timestamp) = day AND COUNT(*) > 1
+               AND (MAX(timestamp) - day) * COUNT(*) = 86400 * (COUNT(*) - 1)
+            ORDER BY day
+        ''', params).fetchall()
+        days = np.array([r[0] for r in rows], dtype=np.int64)
+        if self.archive is not None:
+            for ts, _ in self.archive.scan(zone, *self._bounds(start, end)):
+                days = np.union1d(days, self._complete_days(ts))
+        return days
+
+    @staticmethod
+    def _complete_days(ts):
+        """NumPy version of get_complete_days' rule for sorted epoch timestamps."""
+        day = ts - ts % 86400
+        starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        count = np.diff(np.r_[starts, len(ts)])
+        first, last = ts[starts], ts[np.r_[starts[1:], len(ts)] - 1]
+        d = day[starts]
+        ok = (first == d) & (count > 1) & ((last - d) * count == 86400 * (count - 1))
+        return d[ok]
+
+    def get_alerts(self, zone=None, limit=100):
+        """Most recent alerts, newest first, optionally for one zone. timestamp is the UTC logging time."""
+        clause, params = ("WHERE zone = ? ", [zone]) if zone is not None else ("", [])
+        rows = self.conn.execute(
+            f"SELECT id, timestamp, zone, message, level FROM alerts {clause}ORDER BY id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return self._frame(rows, ['id', 'timestamp', 'zone', 'message', 'level'], ['i8', 'O', 'O', 'O', 'O'])
+
+    def get_price_aggregates(self, zone, freq='day', start=None, end=None, percentiles=(0.5,)):
+        """
+        Per-bucket min/max/mean/count and nearest-rank percentiles computed in SQL.
+        freq is one of 'hour', 'day', 'week', 'month' (UTC buckets). Percentile
+        columns are named p50, p90, p99.5, ... for percentiles 0.5, 0.9, 0.995, ...
+        This scans raw prices; use get_price_rollups when percentiles are not needed.
+        """
+        if freq not in self.BUCKETS:
+            raise ValueError(f"Unknown frequency '{freq}', expected one of {list(self.BUCKETS)}")
+        if self.archive is not None and self.archive.partitions('prices', zone, *self._bounds(start, end)):
+            return self._aggregate_arrays(self.get_prices(zone, start, end), freq, percentiles)
+        clause, params = self._range_clause(zone, start, end)
+
+        pct_names = self._percentile_names(percentiles)
+        pct_sql = "".join(f', MIN(CASE WHEN rn >= ? * cnt THEN price END) AS "{name}"' for name in pct_names)
+
+        rows = self.conn.execute(f'''
+            WITH ranked AS (
+                SELECT {self.BUCKETS[freq]} AS bucket, price,
+                       ROW_NUMBER() OVER (PARTITION BY {self.BUCKETS[freq]} ORDER BY price) AS rn,
+                       COUNT(*) OVER (PARTITION BY {self.BUCKETS[freq]}) AS cnt
+                FROM prices WHERE {clause}
+            )
+            SELECT bucket, MIN(price), MAX(price), AVG(price), COUNT(*){pct_sql}
+            FROM ranked GROUP BY bucket ORDER BY bucket
+        ''', params + list(percentiles)).fetchall()
+
+        columns = ['bucket', 'min', 'max', 'mean', 'count'] + pct_names
+        dtypes = ['datetime64', 'f8', 'f8', 'f8', 'i8'] + ['f8'] * len(pct_names)
+        return self._frame(rows, columns, dtypes)
+
+    @staticmethod
+    def _percentile_names(percentiles):
+        """Column names p50, p99.5, ...; percentiles that would share a column are rejected."""
+        names = [f"p{p * 100:g}" for p in percentiles]
+        if len(set(names)) < len(names):
+            raise ValueError(f"Percentiles {list(percentiles)} give duplicate columns {names}")
+        return names
+
+    @staticmethod
+    def _buckets(ts, freq):
+        """NumPy equivalent of BUCKETS for epoch-second arrays."""
+        if freq == 'hour':
+            return ts - ts % 3600
+        if freq == 'day':
+            return ts - ts % 86400
+        if freq == 'week':
+            return ((ts + 259200) // 604800) * 604800 - 259200
+        return ts.astype('datetime64[s]').astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+
+    def _aggregate_arrays(self, df, freq, percentiles):
+        """get_price_aggregates over a frame that includes archived months (same nearest-rank rule)."""
+        ts = df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        prices = df['price'].to_numpy()
+        bucket = self._buckets(ts, freq)
+        order = np.lexsort((prices, bucket))
+        bucket, prices = bucket[order], prices[order]
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]]) if len(bucket) else np.empty(0, dtype=np.int64)
+        count = np.diff(np.r_[starts, len(bucket)])
+
+        data = {
+            'bucket': bucket[starts].astype('datetime64[s]'),
+            'min': prices[starts] if len(starts) else np.empty(0),
+            'max': prices[np.r_[starts[1:], len(prices)] - 1] if len(starts) else np.empty(0),
+            'mean': np.add.reduceat(prices, starts) / count if len(starts) else np.empty(0),
+            'count': count,
+        }
+        for p, name in zip(percentiles, self._percentile_names(percentiles)):
+            rank = np.maximum(np.ceil(p * count - 1e-9), 1).astype(np.int64)
+            data[name] = prices[starts + rank - 1] if len(starts) else np.empty(0)
+        return pd.DataFrame(data)
+
+    def get_price_rollups(self, zone, granularity='day', start=None, end=None):
+        """
+        Pre-aggregated min/max/mean/count per 'hour', 'day' or 'month' bucket.
+        Reads one row per bucket, e.g. ~60 rows for five years of monthly data.
+        """
+        if granularity not in [level[0] for level in self.ROLLUP_LEVELS]:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        params = [zone, granularity]
+        clause = "zone = ? AND granularity = ?"
+        if start is not None:
+            clause += " AND bucket >= ?"
+            params.append(self._to_epoch(start))
+        if end is not None:
+            clause += " AND bucket < ?"
+            params.append(self._to_epoch(end))
+
+        rows = self.conn.execute(f"""
+            SELECT bucket, min, max, sum / count, count FROM price_rollups
+            WHERE {clause} ORDER BY bucket
+        """, params).fetchall()
+        return self._frame(rows, ['bucket', 'min', 'max', 'mean', 'count'],
+                           ['datetime64', 'f8', 'f8', 'f8', 'i8'])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GridWatch database maintenance")
+    parser.add_argument('command', choices=['rebuild-rollups', 'archive'])
+    parser.add_argument('--db', default=DatabaseManager.DB_PATH)
+    args = parser.parse_args()
+
+    with DatabaseManager(args.db) as db:
+        if args.command == 'rebuild-rollups':
+            db.rebuild_rollups()
+            count = db.conn.execute("SELECT COUNT(*) FROM price_rollups").fetchone()[0]
+            print(f"✅ Rebuilt {count} rollup rows.")
+        elif args.command == 'archive':
+            db.archive_cold()
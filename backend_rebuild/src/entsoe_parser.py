@@ -0,0 +1,186 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+
+# ISO 8601 durations used by ENTSO-E, in minutes
+RESOLUTIONS = {
+    'PT15M': 15,
+    'PT30M': 30,
+    'PT60M': 60,
+    'P1D': 1440,
+}
+
+# One <Period> of a <TimeSeries>. `meta` holds the TimeSeries header fields
+# (mRID, businessType, in_Domain.mRID, psrType, curveType, ...).
+SeriesBlock = namedtuple('SeriesBlock', ['meta', 'start', 'resolution', 'values'])
+
+CHUNK_SIZE = 1 << 20
+
+_SERIES_OPEN = b'<TimeSeries>'
+_SERIES_CLOSE = b'</TimeSeries>'
+_LEAF = re.compile(rb'<([A-Za-z_][\w.]*)(?:\s[^>]*)?>([^<]*)</\1>')
+_PERIOD = re.compile(rb'<Period>(.*?)</Period>', re.S)
+_INTERVAL = re.compile(rb'<timeInterval>\s*<start>([^<]+)</start>\s*<end>([^<]+)</end>')
+_RESOLUTION = re.compile(rb'<resolution>\s*([^<\s]+)\s*</resolution>')
+_POINT_CACHE = {}
+
+
+def _point_pattern(value_tag):
+    pattern = _POINT_CACHE.get(value_tag)
+    if pattern is None:
+        tag = re.escape(value_tag.encode())
+        pattern = re.compile(
+            rb'<position>\s*(\d+)\s*</position>\s*<' + tag + rb'>\s*([^<\s]+)\s*</' + tag + rb'>'
+        )
+        _POINT_CACHE[value_tag] = pattern
+    return pattern
+
+
+def _parse_time(text):
+    """ENTSO-E timestamps are UTC, e.g. '2026-01-21T23:00Z'."""
+    return np.datetime64(text.strip().rstrip(b'Z').decode(), 'm')
+
+
+def _iter_chunks(source):
+    """Yields the raw bytes of each <TimeSeries> element, reading files in fixed-size chunks."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+        pos = 0
+        while True:
+            start = data.find(_SERIES_OPEN, pos)
+            if start < 0:
+                return
+            end = data.find(_SERIES_CLOSE, start)
+            if end < 0:
+                raise ValueError("Truncated TimeSeries element")
+            yield data[start:end + len(_SERIES_CLOSE)]
+            pos = end + len(_SERIES_CLOSE)
+
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from _iter_chunks(f)
+        return
+
+    buf = b''
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        buf += chunk
+        pos = 0
+        while True:
+            start = buf.find(_SERIES_OPEN, pos)
+            end = buf.find(_SERIES_CLOSE, start) if start >= 0 else -1
+            if end < 0:
+                break
+            yield buf[start:end + len(_SERIES_CLOSE)]
+            pos = end + len(_SERIES_CLOSE)
+        # Keep only what may still belong to an unfinished TimeSeries
+        start = buf.find(_SERIES_OPEN, pos)
+        buf = buf[start:] if start >= 0 else buf[-len(_SERIES_OPEN):]
+        if not chunk:
+            if start >= 0:
+                raise ValueError("Truncated TimeSeries element")
+            return
+
+
+def _series_meta(series):
+    """Leaf fields of the TimeSeries header (everything before the first Period)."""
+    head = series[:series.find(b'<Period>')]
+    return {name.decode(): text.strip().decode() for name, text in _LEAF.findall(head)}
+
+
+def iter_series(source, value_tag='price.amount'):
+    """
+    Streams an ENTSO-E TimeSeries document and yields one SeriesBlock per Period.
+    source may be raw bytes, a file path or a binary file object; files are read
+    in CHUNK_SIZE pieces so memory stays bounded by the largest TimeSeries.
+
+    Values are scattered into a NaN-initialised array sized from the period's
+    timeInterval and resolution. A03 curves omit points that repeat the previous
+    value, so those gaps are forward-filled; missing points in other curve types
+    stay NaN.
+    """
+    point_re = _point_pattern(value_tag)
+
+    for series in _iter_chunks(source):
+        meta = _series_meta(series)
+        for period in _PERIOD.finditer(series):
+            body = period.group(1)
+            interval = _INTERVAL.search(body)
+            resolution = _RESOLUTION.search(body)
+            if interval is None or resolution is None:
+                raise ValueError("Period without timeInterval/resolution")
+
+            step = RESOLUTIONS.get(resolution.group(1).decode())
+            if step is None:
+                raise ValueError(f"Unsupported resolution: {resolution.group(1).decode()}")
+            step = np.timedelta64(step, 'm')
+            start = _parse_time(interval.group(1))
+            n = int((_parse_time(interval.group(2)) - start) // step)
+
+            values = np.full(n, np.nan)
+            points = point_re.findall(body)
+            if points:
+                positions, amounts = zip(*points)
+                idx = np.array(positions, dtype=np.int64) - 1
+                amounts = np.array(amounts, dtype=np.float64)
+                valid = (idx >= 0) & (idx < n)
+                values[idx[valid]] = amounts[valid]
+
+            if meta.get('curveType') == 'A03':
+                _forward_fill(values)
+            yield SeriesBlock(meta, start, step, values)
+
+
+def _forward_fill(values):
+    """In-place forward fill of NaN gaps (A03 curve semantics)."""
+    missing = np.isnan(values)
+    if not missing.any() or missing.all():
+        return
+    idx = np.where(missing, 0, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    values[:] = values[idx]
+
+
+def parse_header(source):
+    """Returns the document-level fields (type, revisionNumber, createdDateTime, ...)."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            head = f.read(CHUNK_SIZE)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        head = bytes(source[:CHUNK_SIZE])
+    else:
+        head = source.read(CHUNK_SIZE)
+
+    cut = head.find(_SERIES_OPEN)
+    if cut >= 0:
+        head = head[:cut]
+    header = {}
+    for name, text in _LEAF.findall(head):
+        header.setdefault(name.decode(), text.strip().decode())
+    return header
+
+
+def parse_timeseries(source, value_tag='price.amount'):
+    """
+    Parses every Period in the document into flat NumPy arrays.
+    Returns (timestamps as datetime64[s] in UTC, values as float64).
+    """
+    blocks = list(iter_series(source, value_tag))
+    total = sum(len(b.values) for b in blocks)
+    timestamps = np.empty(total, dtype='datetime64[s]')
+    values = np.empty(total, dtype=np.float64)
+
+    offset = 0
+    for b in blocks:
+        n = len(b.values)
+        timestamps[offset:offset + n] = b.start + np.arange(n) * b.resolution
+        values[offset:offset + n] = b.values
+        offset += n
+    return timestamps, values
+
+
+def to_frame(timestamps, values, time_col='timestamp', value_col='price'):
+    """Wraps parsed arrays in a DataFrame without copying per row."""
+    import pandas as pd
+    return pd.DataFrame({time_col: timestamps, value_col: values})
@@ -0,0 +1,150 @@
+"""
+Generation mix (A75, Actual Generation per Production Type) as a dense cube.
+
+Every A75 TimeSeries carries one production type (MktPSRType/psrType) for one
+bidding zone, with its own start and resolution. Series are placed on a common
+time grid in a (zones x PSR types x timesteps) float64 array of MW, NaN where
+nothing was reported, so mix and renewable share for any number of zones and
+days are plain array reductions.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from entsoe_parser import iter_series
+
+# ENTSO-E production types (MktPSRType psrType codes)
+PSR_TYPES = {
+    'B01': 'Biomass',
+    'B02': 'Fossil Brown coal/Lignite',
+    'B03': 'Fossil Coal-derived gas',
+    'B04': 'Fossil Gas',
+    'B05': 'Fossil Hard coal',
+    'B06': 'Fossil Oil',
+    'B07': 'Fossil Oil shale',
+    'B08': 'Fossil Peat',
+    'B09': 'Geothermal',
+    'B10': 'Hydro Pumped Storage',
+    'B11': 'Hydro Run-of-river and poundage',
+    'B12': 'Hydro Water Reservoir',
+    'B13': 'Marine',
+    'B14': 'Nuclear',
+    'B15': 'Other renewable',
+    'B16': 'Solar',
+    'B17': 'Waste',
+    'B18': 'Wind Offshore',
+    'B19': 'Wind Onshore',
+    'B20': 'Other',
+    'B25': 'Energy storage',
+}
+
+# Pumped storage and batteries move energy rather than produce it, so they are not counted
+RENEWABLE_TYPES = ('B01', 'B09', 'B11', 'B12', 'B13', 'B15', 'B16', 'B18', 'B19')
+
+# values is (zones x psr_types x timestamps) MW; zones and psr_types are tuples
+# giving the index of each axis, timestamps is datetime64[s] UTC on a fixed step.
+GenerationCube = namedtuple('GenerationCube', ['zones', 'psr_types', 'timestamps', 'values'])
+
+# One series on its own grid: start datetime64, resolution timedelta64, values array
+GenerationSeries = namedtuple('GenerationSeries', ['zone', 'psr_type', 'start', 'resolution', 'values'])
+
+
+def iter_generation(source, zone):
+    """
+    Yields a GenerationSeries per Period of an A75 document.
+    Series that only have an outBiddingZone_Domain are consumption (e.g. pumping)
+    and are skipped.
+    """
+    for block in iter_series(source, value_tag='quantity'):
+        meta = block.meta
+        if 'outBiddingZone_Domain.mRID' in meta and 'inBiddingZone_Domain.mRID' not in meta:
+            continue
+        yield GenerationSeries(zone, meta.get('psrType', 'B20'), block.start, block.resolution, block.values)
+
+
+def assemble_cube(series, step=None, start=None, end=None):
+    """
+    Places GenerationSeries on one grid. step (timedelta64) defaults to the finest
+    resolution present; coarser series are repeated (MW is a rate), finer ones
+    averaged. start/end (datetime64) trim the grid, otherwise it spans all series.
+    Returns None when there is nothing to place.
+    """
+    series = [s for s in series if len(s.values)]
+    if not series:
+        return None
+    if step is None:
+        step = min(s.resolution for s in series)
+    step = np.timedelta64(step, 'm')
+    if start is None:
+        start = min(s.start for s in series)
+    if end is None:
+        end = max(s.start + len(s.values) * s.resolution for s in series)
+    start = np.datetime64(start, 'm')
+    end = np.datetime64(end, 'm')
+
+    zones = tuple(dict.fromkeys(s.zone for s in series))
+    psr_types = tuple(sorted({s.psr_type for s in series}))
+    zone_idx = {z: i for i, z in enumerate(zones)}
+    psr_idx = {p: i for i, p in enumerate(psr_types)}
+    n = int(-(-(end - start) // step))
+
+    values = np.full((len(zones), len(psr_types), n), np.nan)
+    for s in series:
+        data = np.asarray(s.values, dtype=np.float64)
+        if s.resolution > step:
+            data = np.repeat(data, int(s.resolution // step))
+        elif s.resolution < step:
+            factor = int(step // s.resolution)
+            pad = -len(data) % factor
+            data = np.concatenate([data, np.full(pad, np.nan)]).reshape(-1, factor)
+            with np.errstate(all='ignore'):
+                counts = np.sum(~np.isnan(data), axis=1)
+                data = np.where(counts > 0, np.nansum(data, axis=1) / np.maximum(counts, 1), np.nan)
+
+        offset = int((s.start - start) // step)
+        lo, hi = max(offset, 0), min(offset + len(data), n)
+        if lo >= hi:
+            continue
+        chunk = data[lo - offset:hi - offset]
+        target = values[zone_idx[s.zone], psr_idx[s.psr_type], lo:hi]
+        np.copyto(target, chunk, where=~np.isnan(chunk))
+
+    timestamps = (start + np.arange(n) * step).astype('datetime64[s]')
+    return GenerationCube(zones, psr_types, timestamps, values)
+
+
+def build_cube(documents, step=None):
+    """
+    Parses A75 documents into one cube. documents maps zone -> source (raw bytes,
+    a path or a file object) or is an iterable of (zone, source) pairs.
+    """
+    pairs = documents.items() if isinstance(documents, dict) else documents
+    return assemble_cube([s for zone, source in pairs for s in iter_generation(source, zone)], step)
+
+
+def type_mask(cube, psr_types):
+    """Boolean mask over the cube's PSR axis for the given codes."""
+    wanted = set(psr_types)
+    return np.array([p in wanted for p in cube.psr_types], dtype=bool)
+
+
+def total_generation(cube):
+    """(zones x timestamps) MW summed over production types; NaN where nothing was reported."""
+    reported = ~np.isnan(cube.values).all(axis=1)
+    return np.where(reported, np.nansum(cube.values, axis=1), np.nan)
+
+
+def renewable_share(cube, renewable_types=RENEWABLE_TYPES):
+    """(zones x timestamps) fraction of generation from renewable types."""
+    total = total_generation(cube)
+    renewable = np.nansum(cube.values[:, type_mask(cube, renewable_types)], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, renewable / total, np.nan)
+
+
+def generation_mix(cube):
+    """(zones x psr_types) share of energy per production type over the whole cube period."""
+    energy = np.nansum(cube.values, axis=2)
+    total = energy.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, energy / total, np.nan)
@@ -0,0 +1,182 @@
+"""
+Zone geometry preprocessing for map rendering.
+
+The source GeoJSON (src/assets/data/zones.json) covers 364 zones worldwide at
+full resolution. Maps only need the zones that have prices, at the detail the
+zoom level can show, so geometry is:
+
+1. filtered to the requested bidding zones,
+2. simplified with Douglas-Peucker at one screen pixel for the zoom level,
+3. quantized to an integer grid and delta-encoded (TopoJSON-style),
+
+and the encoded result is cached on disk and in memory, keyed by source file,
+zones and zoom. Repeated map renders in one process decode it once.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'geometry_cache')
+QUANTIZATION = 1e4          # grid steps per degree (~11 m at the equator)
+TILE_SIZE = 256
+
+_memory_cache = {}
+
+
+def zone_id(feature):
+    """
+    Bidding-zone id of a feature: its 'id', else properties.zoneName with a
+    repeated country prefix dropped ('SE-SE4' -> 'SE4', 'IT-NO' stays 'IT-NO').
+    """
+    if feature.get('id'):
+        return feature['id']
+    name = feature.get('properties', {}).get('zoneName', '')
+    country, _, rest = name.partition('-')
+    return rest if rest.startswith(country) and rest != country else name
+
+
+def tolerance_for_zoom(zoom):
+    """Degrees covered by one pixel at a Web Mercator zoom level."""
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def simplify_ring(points, tolerance):
+    """Douglas-Peucker on an (n x 2) array; iterative, vectorized distance per segment."""
+    n = len(points)
+    if n <= 4:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        seg = points[first + 1:last]
+        a, b = points[first], points[last]
+        d = b - a
+        length = np.hypot(d[0], d[1])
+        if length == 0:
+            dist = np.hypot(seg[:, 0] - a[0], seg[:, 1] - a[1])
+        else:
+            dist = np.abs(d[0] * (seg[:, 1] - a[1]) - d[1] * (seg[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = first + 1 + i
+            keep[mid] = True
+            stack.append((first, mid))
+            stack.append((mid, last))
+    return points[keep]
+
+
+def _ring_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+
+
+def _polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def encode_zones(geojson, zones, zoom):
+    """
+    Filters, simplifies and quantizes features for the given zone ids.
+    Returns a compact dict: {'scale', 'features': [{'id', 'name', 'polygons'}]}
+    where each ring is a flat list of delta-encoded integer coordinates.
+    """
+    tolerance = tolerance_for_zoom(zoom)
+    wanted = set(zones)
+    features = []
+    for feature in geojson['features']:
+        zid = zone_id(feature)
+        if zid not in wanted:
+            continue
+        polygons = []
+        for polygon in _polygons(feature['geometry']):
+            rings = []
+            for i, ring in enumerate(polygon):
+                pts = np.asarray(ring, dtype=np.float64)[:, :2]
+                # Drop islands and holes smaller than a pixel at this zoom
+                if _ring_area(pts) < tolerance ** 2:
+                    if i == 0:
+                        break
+                    continue
+                pts = simplify_ring(pts, tolerance)
+                q = np.round(pts * QUANTIZATION).astype(np.int64)
+                q = q[np.r_[True, np.any(np.diff(q, axis=0) != 0, axis=1)]]
+                if len(q) < 4:
+                    if i == 0:
+                        break
+                    continue
+                deltas = np.vstack([q[:1], np.diff(q, axis=0)])
+                rings.append(deltas.ravel().tolist())
+            if rings:
+                polygons.append(rings)
+        if polygons:
+            props = feature.get('properties', {})
+            features.append({
+                'id': zid,
+                'name': props.get('name') or props.get('zoneName') or zid,
+                'polygons': polygons,
+            })
+    return {'scale': QUANTIZATION, 'features': features}
+
+
+def decode_zones(encoded):
+    """Turns the compact encoding back into a GeoJSON FeatureCollection."""
+    scale = encoded['scale']
+    features = []
+    for f in encoded['features']:
+        polygons = []
+        for rings in f['polygons']:
+            decoded = []
+            for ring in rings:
+                coords = np.cumsum(np.asarray(ring, dtype=np.int64).reshape(-1, 2), axis=0) / scale
+                decoded.append(coords.tolist())
+            polygons.append(decoded)
+        geometry = ({'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                    else {'type': 'MultiPolygon', 'coordinates': polygons})
+        features.append({
+            'type': 'Feature',
+            'id': f['id'],
+            'properties': {'id': f['id'], 'name': f['name']},
+            'geometry': geometry,
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def load_zone_geometry(geojson_path, zones, zoom=5, cache_dir=None):
+    """
+    GeoJSON FeatureCollection with only `zones`, simplified for `zoom`.
+    Encoded artifacts are cached in cache_dir; decoded results are memoized per process.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    stat = os.stat(geojson_path)
+    zones = sorted(set(zones))
+    ident = f"{os.path.abspath(geojson_path)}|{stat.st_mtime_ns}|{stat.st_size}|{','.join(zones)}|{zoom}"
+    if ident in _memory_cache:
+        return _memory_cache[ident]
+
+    digest = hashlib.sha1(ident.encode()).hexdigest()[:16]
+    artifact = os.path.join(cache_dir, f"zones_{digest}.json")
+    if os.path.exists(artifact):
+        with open(artifact, 'r', encoding='utf-8') as f:
+            encoded = json.load(f)
+    else:
+        with open(geojson_path, 'r', encoding='utf-8') as f:
+            encoded = encode_zones(json.load(f), zones, zoom)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = artifact + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(encoded, f, separators=(',', ':'))
+        os.replace(tmp, artifact)
+
+    geo = decode_zones(encoded)
+    _memory_cache[ident] = geo
+    return geo
@@ -0,0 +1,141 @@
+"""
+Grid stress index from day-ahead prices (A44) and total load (A65).
+
+Port of calculateGridStress in src/utils/GridStress.ts, over whole
+(zones x timesteps) arrays instead of one point at a time:
+
+    index = (0.4 * min(price / 200, 1) + 0.6 * min(load / max_load, 1)) * 100
+
+with levels LOW, MODERATE (> 40), HIGH (> 60) and CRITICAL (> 80). Prices
+and load are published at their own resolutions (PT15M/PT60M), so both are
+first placed on a common grid: finer series are averaged per step, coarser
+ones held over the steps they cover (prices and MW are both rates).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+PRICE_CAP = 200.0           # €/MWh counted as fully stressed
+DEFAULT_MAX_LOAD = 25000.0  # MW, as in the frontend
+PRICE_WEIGHT = 0.4
+LOAD_WEIGHT = 0.6           # Load is slightly more critical for physical stress
+
+LEVELS = ('LOW', 'MODERATE', 'HIGH', 'CRITICAL')
+LEVEL_THRESHOLDS = (40, 60, 80)
+NO_LEVEL = -1               # Level code where price or load is missing
+
+# (zones x timestamps) arrays on one grid; timestamps is datetime64[s] UTC.
+# index is float64 (NaN where price or load is missing), level int8 codes into LEVELS.
+StressFrame = namedtuple('StressFrame', ['zones', 'timestamps', 'prices', 'load', 'index', 'level'])
+
+
+def stress_index(prices, load, max_load=DEFAULT_MAX_LOAD):
+    """
+    Unrounded stress index for broadcastable price and load arrays. max_load
+    is a scalar or one value per zone (row).
+    """
+    max_load = np.asarray(max_load, dtype=np.float64)
+    if max_load.ndim == 1:
+        max_load = max_load[:, None]
+    price_factor = np.minimum(np.asarray(prices, dtype=np.float64) / PRICE_CAP, 1.0)
+    load_factor = np.minimum(np.asarray(load, dtype=np.float64) / max_load, 1.0)
+    return (price_factor * PRICE_WEIGHT + load_factor * LOAD_WEIGHT) * 100
+
+
+def stress_levels(index):
+    """int8 level codes (0 = LOW .. 3 = CRITICAL, NO_LEVEL for NaN) of a stress index array."""
+    index = np.asarray(index, dtype=np.float64)
+    levels = np.zeros(index.shape, dtype=np.int8)
+    for threshold in LEVEL_THRESHOLDS:
+        levels += index > threshold
+    levels[np.isnan(index)] = NO_LEVEL
+    return levels
+
+
+def level_names(levels):
+    """Level codes -> names (None for NO_LEVEL) as an object array."""
+    names = np.array(LEVELS + (None,), dtype=object)
+    return names[np.asarray(levels)]
+
+
+def _step(ts):
+    """Resolution of an epoch-second series: its smallest positive spacing (an hour for single points)."""
+    diffs = np.diff(ts)
+    if (diffs < 0).any():
+        diffs = np.diff(np.sort(ts))
+    diffs = diffs[diffs > 0]
+    return int(diffs.min()) if len(diffs) else 3600
+
+
+def to_grid(timestamps, values, start, step, n):
+    """
+    Places a series on the grid start + k * step (epoch seconds, k < n).
+    Points falling in a grid step are averaged; steps with no point take the
+    value of a coarser point whose interval covers them, else NaN.
+    """
+    ts = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    keep = ~np.isnan(values)
+    ts, values = ts[keep], values[keep]
+    out = np.full(n, np.nan)
+    if not len(ts) or n <= 0:
+        return out
+
+    bucket = (ts - start) // step
+    inside = (bucket >= 0) & (bucket < n)
+    counts = np.bincount(bucket[inside], minlength=n)
+    sums = np.bincount(bucket[inside], weights=values[inside], minlength=n)
+    filled = counts > 0
+    out[filled] = sums[filled] / counts[filled]
+
+    if (np.diff(ts) < 0).any():
+        order = np.argsort(ts, kind='stable')
+        ts, values = ts[order], values[order]
+    grid = start + np.arange(n, dtype=np.int64) * step
+    k = np.searchsorted(ts, grid, side='right') - 1
+    covered = ~filled & (k >= 0)
+    covered[covered] &= grid[covered] < ts[k[covered]] + _step(ts)
+    out[covered] = values[k[covered]]
+    return out
+
+
+def align(price_series, load_series, step=None, start=None, end=None):
+    """
+    Puts {zone: (timestamps, prices)} and {zone: (timestamps, load)} on one
+    grid for the zones present in both. step (seconds) defaults to the finest
+    resolution of any series; start/end (epoch seconds, end exclusive) default
+    to the span of all series. Returns (zones, grid as epoch seconds,
+    prices matrix, load matrix).
+    """
+    zones = [z for z in price_series if z in load_series]
+    stamps = [np.asarray(ts).astype('datetime64[s]').astype(np.int64)
+              for z in zones for ts in (price_series[z][0], load_series[z][0])]
+    stamps = [ts for ts in stamps if len(ts)]
+    if not stamps:
+        empty = np.empty((len(zones), 0))
+        return zones, np.empty(0, dtype=np.int64), empty, empty.copy()
+    if step is None:
+        step = min(_step(ts) for ts in stamps)
+    if start is None:
+        start = min(int(ts.min()) for ts in stamps)
+        start -= start % step
+    if end is None:
+        end = max(int(ts.max()) + _step(ts) for ts in stamps)
+    n = max(0, -(-(end - start) // step))
+
+    prices = np.vstack([to_grid(*price_series[z], start, step, n) for z in zones]) if zones else np.empty((0, n))
+    load = np.vstack([to_grid(*load_series[z], start, step, n) for z in zones]) if zones else np.empty((0, n))
+    return zones, start + np.arange(n, dtype=np.int64) * step, prices, load
+
+
+def build_stress(price_series, load_series, step=None, max_load=DEFAULT_MAX_LOAD):
+    """
+    StressFrame for every zone with both prices and load, computed in one
+    pass over the aligned matrices. max_load is a scalar or {zone: MW}
+    (zones not listed use DEFAULT_MAX_LOAD).
+    """
+    zones, grid, prices, load = align(price_series, load_series, step)
+    if isinstance(max_load, dict):
+        max_load = [max_load.get(zone, DEFAULT_MAX_LOAD) for zone in zones]
+    index = stress_index(prices, load, max_load)
+    return StressFrame(tuple(zones), grid.astype('datetime64[s]'), prices, load, index, stress_levels(index))
@@ -0,0 +1,347 @@
+"""
+Shared hot store of recent price, load and generation series.
+
+Worker processes (API, analytics, map rendering) otherwise each read and
+parse the same recent days from grid_history.db into their own DataFrames.
+HotStore keeps the last HOT_DAYS of every zone in one memory-mapped file
+(on /dev/shm by default, so it never touches the disk) with a fixed layout:
+
+    header   magic, version, zone count, kind count, steps, step (s),
+             origin (epoch s of step 0), last update time, seq
+    zones    zone codes, ZONE_WIDTH bytes each
+    data     float64 (kinds x zones x steps), kinds as in KINDS, NaN = no point
+
+Points are stored at their own timestamps on the STEP grid (PT60M series
+fill every fourth PT15M slot), so dropping the NaNs gives back exactly the
+stored points. The window ends at the end of the latest day written and
+moves forward a day at a time as new days arrive.
+
+One process writes: HotStore.create(...).listen(db) updates the store from
+the DatabaseManager listeners of save_prices, save_load and
+save_generation, and fill(db) warms it from the database. Any number of
+readers HotStore.open(path) the file read-only and get NumPy views of the
+shared pages (array, view) without copying or parsing anything. The
+version counter is a seqlock: odd while a write is in progress, bumped
+twice per write. Readers that need a consistent copy use snapshot/points,
+which retry until the version is even and unchanged around the copy;
+readers holding views can compare `version` before and after use.
+
+Other processes can write the database without a hot store attached (cli
+fetch, backfill, a writer that has exited), so seq records the database
+state the prices reflect: the change feed seq of the last price batch
+(DatabaseManager.last_change_seq('prices')), -1 while unknown. Readers
+serving prices should use the store only while it equals the database's
+(api_server does). A writer that finds a batch it did not see reloads the
+window. Load and generation are not in the change feed and carry no such
+check.
+"""
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from generation_mix import total_generation
+from zone_registry import ZONES
+
+KINDS = ('price', 'load', 'generation')
+HOT_DAYS = 7
+STEP = 900                  # s; the finest resolution published (PT15M)
+DAY = 86400
+ZONE_WIDTH = 16
+MAGIC = b'GWHOT001'
+RETRIES = 1000
+
+_SHM = '/dev/shm'
+HOT_PATH = os.path.join(_SHM if os.path.isdir(_SHM) else tempfile.gettempdir(), 'gridwatch_hot.bin')
+
+HEADER = np.dtype([
+    ('magic', 'S8'), ('version', '<u8'), ('zones', '<u4'), ('kinds', '<u4'),
+    ('steps', '<u4'), ('step', '<u4'), ('origin', '<i8'), ('updated', '<f8'), ('seq', '<i8'),
+])
+HEADER_SIZE = 64
+
+
+def _layout(n_zones, steps):
+    """(zone table offset, data offset, file size) in bytes."""
+    data = -(-(HEADER_SIZE + n_zones * ZONE_WIDTH) // 64) * 64
+    return HEADER_SIZE, data, data + len(KINDS) * n_zones * steps * 8
+
+
+class HotStore:
+    """A mapped hot store file; create() for the writer, open() for readers."""
+
+    def __init__(self, path, writable):
+        self.path = path
+        self.writable = writable
+        with open(path, 'r+b' if writable else 'rb') as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        self._header = np.frombuffer(self._mm, HEADER, count=1)
+        head = self._header[0]
+        if head['magic'] != MAGIC or head['kinds'] != len(KINDS):
+            self.close()
+            raise ValueError(f"{path} is not a GridWatch hot store")
+        n_zones, self.steps, self.step = int(head['zones']), int(head['steps']), int(head['step'])
+        zone_offset, data_offset, size = _layout(n_zones, self.steps)
+        if len(self._mm) < size:
+            self.close()
+            raise ValueError(f"{path} is truncated ({len(self._mm)} of {size} bytes)")
+        codes = np.frombuffer(self._mm, f'S{ZONE_WIDTH}', count=n_zones, offset=zone_offset)
+        self.zones = tuple(code.decode() for code in codes)
+        self._db = None
+        self._rows = {zone: i for i, zone in enumerate(self.zones)}
+        self._data = np.frombuffer(self._mm, np.float64, count=len(KINDS) * n_zones * self.steps,
+                                   offset=data_offset).reshape(len(KINDS), n_zones, self.steps)
+
+    @classmethod
+    def create(cls, path=HOT_PATH, zones=None, days=HOT_DAYS, step=STEP, now=None):
+        """
+        Writer side: maps the store at path, reusing an existing file with the
+        same layout (and its data, moved forward to end with tomorrow like a
+        new file; fill() brings it up to date) or replacing it with an empty
+        one. Readers of a replaced file notice through refresh().
+        """
+        zones = tuple(zones if zones is not None else ZONES)
+        steps = days * DAY // step
+        now = time.time() if now is None else now
+        end = (int(now) // DAY + 2) * DAY       # Through tomorrow, the latest day-ahead day
+        try:
+            store = cls(path, writable=True)
+            if store.zones == zones and store.steps == steps and store.step == step:
+                # A writer that died mid-write left the version odd, which readers would wait on forever
+                store._header['version'] += store.version % 2
+                store._header['seq'] = -1           # Until fill() has compared it with the database
+                with store._writing():
+                    store._advance(end - 1)         # A file left from days ago would fill a stale window
+                return store
+            store.close()
+        except (OSError, ValueError):
+            pass
+
+        zone_offset, data_offset, size = _layout(len(zones), steps)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.truncate(size)
+            header = np.zeros(1, HEADER)
+            header[0] = (MAGIC, 0, len(zones), len(KINDS), steps, step, end - steps * step, now, -1)
+            f.write(header.tobytes())
+            f.seek(zone_offset)
+            f.write(np.array(zones, dtype=f'S{ZONE_WIDTH}').tobytes())
+            f.seek(data_offset)
+            f.write(np.full(len(KINDS) * len(zones) * steps, np.nan).tobytes())
+        os.replace(tmp, path)
+        return cls(path, writable=True)
+
+    @classmethod
+    def open(cls, path=HOT_PATH):
+        """Reader side: maps the store read-only."""
+        return cls(path, writable=False)
+
+    def close(self):
+        self._header = self._data = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass    # Views handed out are still alive; the mapping goes with the last of them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def refresh(self):
+        """This store, or a newly opened one if the writer replaced the file (new layout)."""
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                return self
+        except OSError:
+            return self
+        self.close()
+        return type(self)(self.path, self.writable)
+
+    # --- Reading -------------------------------------------------------------
+
+    @property
+    def version(self):
+        return int(self._header['version'][0])
+
+    @property
+    def origin(self):
+        return int(self._header['origin'][0])
+
+    @property
+    def updated(self):
+        return float(self._header['updated'][0])
+
+    @property
+    def seq(self):
+        """Change feed seq of the last price batch reflected, -1 if unknown."""
+        return int(self._header['seq'][0])
+
+    def timestamps(self):
+        """Epoch seconds of the steps, for the current origin."""
+        return self.origin + np.arange(self.steps, dtype=np.int64) * self.step
+
+    def array(self, kind):
+        """(zones x steps) view of one kind in the shared pages; changes as the writer writes."""
+        return self._data[KINDS.index(kind)]
+
+    def _span(self, start, end):
+        """Step slice for [start, end) epoch seconds, clipped to the window."""
+        origin = self.origin
+        lo = 0 if start is None else min(max(-(-(int(start) - origin) // self.step), 0), self.steps)
+        hi = self.steps if end is None else min(max(-(-(int(end) - origin) // self.step), lo), self.steps)
+        return lo, hi
+
+    def covers(self, start, end=None):
+        """True if [start, end) lies inside the current window."""
+        return start >= self.origin and (end if end is not None else start) <= self.origin + self.steps * self.step
+
+    def view(self, kind, zone, start=None, end=None):
+        """(timestamps, values view) of one zone in [start, end); NaN where no point is stored."""
+        lo, hi = self._span(start, end)
+        return self.timestamps()[lo:hi], self._data[KINDS.index(kind), self._rows[zone], lo:hi]
+
+    def _consistent(self, read):
+        for attempt in range(RETRIES):
+            before = self.version
+            if not before % 2:
+                result = read()
+                if self.version == before:
+                    return result
+            if attempt:
+                time.sleep(0.0001)
+        raise RuntimeError(f"Hot store {self.path} kept changing while reading")
+
+    def snapshot(self, kind, zones=None, start=None, end=None):
+        """Consistent copy: (zones, timestamps, zones x steps matrix) in [start, end)."""
+        zones = self.zones if zones is None else tuple(zones)
+        rows = [self._rows[zone] for zone in zones]
+
+        def read():
+            lo, hi = self._span(start, end)
+            return zones, self.timestamps()[lo:hi], self._data[KINDS.index(kind)][rows, lo:hi]
+        return self._consistent(read)
+
+    def points(self, kind, zone, start=None, end=None):
+        """Consistent (timestamps, values) of the points stored for a zone in [start, end), NaNs dropped."""
+        def read():
+            ts, values = self.view(kind, zone, start, end)
+            known = ~np.isnan(values)
+            return ts[known], values[known]
+        return self._consistent(read)
+
+    # --- Writing -------------------------------------------------------------
+
+    @contextmanager
+    def _writing(self):
+        header = self._header
+        header['version'] += 1
+        try:
+            yield
+        finally:
+            header['updated'] = time.time()
+            header['version'] += 1
+
+    def _advance(self, last):
+        """Moves the window forward whole days until it covers the epoch second `last`."""
+        end = self.origin + self.steps * self.step
+        if last < end:
+            return
+        shift = ((last - end) // DAY + 1) * DAY // self.step
+        if shift < self.steps:
+            self._data[..., :-shift] = self._data[..., shift:]
+            self._data[..., -shift:] = np.nan
+        else:
+            self._data[...] = np.nan
+        self._header['origin'] += shift * self.step
+
+    def write(self, kind, series):
+        """
+        Stores {zone: (timestamps, values)} of one kind in one write; NaN
+        values and zones outside the store are skipped, points older than
+        the window dropped. Returns the number of points stored.
+        """
+        if not self.writable:
+            raise PermissionError(f"Hot store {self.path} is open read-only")
+        k = KINDS.index(kind)
+        prepared = []
+        for zone, (timestamps, values) in series.items():
+            row = self._rows.get(zone)
+            ts = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+            values = np.asarray(values, dtype=np.float64)
+            known = ~np.isnan(values)
+            if row is not None and known.any():
+                prepared.append((row, ts[known], values[known]))
+        if not prepared:
+            return 0
+
+        written = 0
+        with self._writing():
+            self._advance(max(int(ts.max()) for _, ts, _ in prepared))
+            origin = self.origin
+            for row, ts, values in prepared:
+                slot = (ts - origin) // self.step
+                inside = (slot >= 0) & (slot < self.steps)
+                self._data[k, row, slot[inside]] = values[inside]
+                written += int(inside.sum())
+        return written
+
+    def update(self, kind, zone, timestamps, values):
+        return self.write(kind, {zone: (timestamps, values)})
+
+    def on_prices_saved(self, zone, timestamps, prices):
+        self.update('price', zone, timestamps, prices)
+        seq = self._db.saved_seq if self._db is not None else None
+        if seq is None:
+            return
+        if self.seq == self._db.last_change_seq('prices', before=seq):
+            self._header['seq'] = seq
+        else:
+            self.fill(self._db)     # Another process saved prices in between
+
+    def on_load_saved(self, zone, timestamps, load):
+        self.update('load', zone, timestamps, load)
+
+    def on_generation_saved(self, zone, timestamps, generation):
+        self.update('generation', zone, timestamps, generation)
+
+    def listen(self, db):
+        """Keeps the store current with every batch the DatabaseManager commits. Returns self."""
+        self._db = db
+        db.add_listener(self.on_prices_saved)
+        db.add_listener(self.on_load_saved, kind='load')
+        db.add_listener(self.on_generation_saved, kind='generation')
+        return self
+
+    def fill(self, db, zones=None):
+        """
+        Loads the current window from the database (e.g. after a restart).
+        Returns points stored. Filling every zone marks the store as
+        reflecting the database's prices as of the start of the fill.
+        """
+        seq = db.last_change_seq('prices') if zones is None else None
+        zones = [zone for zone in (zones if zones is not None else self.zones) if zone in self._rows]
+        start = np.datetime64(self.origin, 's')
+        end = np.datetime64(self.origin + self.steps * self.step, 's')
+        written = 0
+        prices = {}
+        load = {}
+        for zone in zones:
+            df = db.get_prices(zone, start, end)
+            prices[zone] = (df['timestamp'].to_numpy(), df['price'].to_numpy())
+            df = db.get_load(zone, start, end)
+            load[zone] = (df['timestamp'].to_numpy(), df['actual'].fillna(df['forecast']).to_numpy())
+        written += self.write('price', prices)
+        written += self.write('load', load)
+        cube = db.get_generation(zones, start, end)
+        if cube is not None:
+            ts = cube.timestamps.astype('datetime64[s]')
+            written += self.write('generation', dict(zip(cube.zones, ((ts, total) for total in total_generation(cube)))))
+        if seq is not None:
+            self._header['seq'] = seq
+        return written
@@ -0,0 +1,222 @@
+"""
+Resident ingestion service for day-ahead prices.
+
+Instead of a cron job that refetches every zone and redraws the map on each
+run, IngestDaemon keeps the loader, database and map generator alive and
+polls on a schedule built around the SDAC day-ahead publication (results for
+tomorrow appear shortly after 12:45 CET):
+
+- before the publication window it sleeps until the window opens,
+- inside the window each zone is polled every POLL_INTERVAL until tomorrow's
+  prices are in, then left alone until the next window,
+- outside the window documents are only rechecked every REVISION_INTERVAL
+  to pick up corrections.
+
+Documents whose revisionNumber/createdDateTime match the cached copy are
+skipped, and analysis plus map rendering run only when a zone changed.
+API errors back off exponentially with full jitter per zone; there is no
+fallback to mock data.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from alert_rules import AlertEngine, default_rules, to_records
+from analysis import SmartGridAnalyzer
+from entsoe_parser import parse_timeseries, to_frame
+from metrics import Metrics
+
+MARKET_TZ = ZoneInfo('Europe/Stockholm')   # Delivery days follow CET/CEST
+
+
+class ZoneSchedule:
+    """Polling state for one zone."""
+
+    def __init__(self):
+        self.next_poll = 0.0
+        self.failures = 0
+        self.latest_day = None     # Latest delivery day (date) stored for the zone
+
+
+class IngestDaemon:
+    PUBLICATION_OPEN = (12, 40)            # Local time the first poll for tomorrow is made
+    PUBLICATION_LATE = (14, 0)             # After this, missing results are polled less often
+    POLL_INTERVAL = 120                    # Seconds between polls inside the window
+    LATE_POLL_INTERVAL = 900
+    REVISION_INTERVAL = 6 * 3600           # Recheck of the latest day for corrections
+    BACKOFF_BASE = 30
+    BACKOFF_CAP = 1800
+
+    def __init__(self, loader, db, zones, map_gen=None, map_path="elpriser_karta.html",
+                 clock=time.time, price_threshold=100.0, metrics=None, metrics_path=None, rules=None):
+        self.loader = loader
+        self.db = db
+        self.zones = list(zones)
+        self.map_gen = map_gen
+        self.map_path = map_path
+        self.clock = clock
+        self.price_threshold = price_threshold
+        # Kept for the daemon's lifetime so a revised day does not repeat its alerts
+        self.alerts = AlertEngine(rules if rules is not None else default_rules(price_threshold))
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics_path = metrics_path      # Prometheus text file rewritten after every cycle
+        self.schedules = {zone: ZoneSchedule() for zone in self.zones}
+        self.current_prices = {}
+        self.series = {}        # zone -> (timestamps, prices) of its latest day, for the alert rules
+        self.stats = {'polls': 0, 'changed': 0, 'unchanged': 0, 'errors': 0, 'renders': 0}
+        self._stop = threading.Event()
+
+    # --- Schedule ----------------------------------------------------------
+
+    def _local(self, now):
+        return datetime.fromtimestamp(now, MARKET_TZ)
+
+    def _at(self, day, hm):
+        """Epoch seconds of local time hm=(hour, minute) on a given date."""
+        return datetime(day.year, day.month, day.day, *hm, tzinfo=MARKET_TZ).timestamp()
+
+    def target_day(self, now):
+        """Latest delivery day that should be available: tomorrow once the window has opened."""
+        local = self._local(now)
+        today = local.date()
+        return today + timedelta(days=1) if now >= self._at(today, self.PUBLICATION_OPEN) else today
+
+    def _next_poll(self, schedule, now):
+        today = self._local(now).date()
+        target = self.target_day(now)
+        if schedule.latest_day is None or schedule.latest_day < target:
+            late = now >= self._at(today, self.PUBLICATION_LATE)
+            return now + (self.LATE_POLL_INTERVAL if late else self.POLL_INTERVAL)
+
+        next_open = self._at(today, self.PUBLICATION_OPEN)
+        if next_open <= now:
+            next_open = self._at(today + timedelta(days=1), self.PUBLICATION_OPEN)
+        return min(next_open, now + self.REVISION_INTERVAL)
+
+    def _backoff(self, failures):
+        """Full-jitter exponential backoff in seconds."""
+        return random.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** failures))
+
+    @staticmethod
+    def _utc_range(day):
+        """[start, end) of a local delivery day as naive UTC datetimes."""
+        start = datetime(day.year, day.month, day.day, tzinfo=MARKET_TZ)
+        end = start + timedelta(days=1)
+        return (start.astimezone(timezone.utc).replace(tzinfo=None),
+                end.astimezone(timezone.utc).replace(tzinfo=None))
+
+    # --- Work --------------------------------------------------------------
+
+    def poll_zone(self, zone, now):
+        """Polls the target day for one zone; returns True if new data was stored."""
+        schedule = self.schedules[zone]
+        day = self.target_day(now)
+        if schedule.latest_day is not None and schedule.latest_day >= day:
+            day = schedule.latest_day      # Revision check of what we already have
+        start, end = self._utc_range(day)
+
+        self.stats['polls'] += 1
+        try:
+            content, changed = self.loader.poll_document(zone, 'A44', start, end)
+        except Exception as e:
+            self.stats['errors'] += 1
+            delay = self._backoff(schedule.failures)
+            schedule.failures += 1
+            schedule.next_poll = now + delay
+            print(f"⚠️ {zone}: poll failed ({e}), retrying in {delay:.0f} s")
+            return False
+
+        schedule.failures = 0
+        published = b'<TimeSeries>' in content
+        if published and (schedule.latest_day is None or day > schedule.latest_day):
+            schedule.latest_day = day
+        if published and not changed and zone not in self.current_prices:
+            # After a restart the response cache already holds the day: map it from the database
+            stored = self.db.get_prices(zone, start, end)
+            if not stored.empty:
+                self.current_prices[zone] = stored['price'].mean()
+                self.series[zone] = (stored['timestamp'].to_numpy(), stored['price'].to_numpy())
+        if not published or not changed:
+            self.stats['unchanged'] += 1
+            schedule.next_poll = self._next_poll(schedule, now)
+            return False
+
+        self.stats['changed'] += 1
+        with self.metrics.stage('parse', zone):
+            timestamps, prices = parse_timeseries(content, value_tag='price.amount')
+        self.metrics.inc('gridwatch_rows_parsed_total', len(prices), zone=zone)
+        self.process(zone, to_frame(timestamps, prices))
+        schedule.next_poll = self._next_poll(schedule, now)
+        return True
+
+    def process(self, zone, df):
+        """Stores and analyses one changed zone."""
+        if df.empty:
+            return
+        self.db.save_prices(zone, df)
+        self.current_prices[zone] = df['price'].mean()
+        self.series[zone] = (df['timestamp'].to_numpy(), df['price'].to_numpy())
+
+        with self.metrics.stage('analyze', zone):
+            cheapest = SmartGridAnalyzer.find_cheapest_hours(df)
+            block = SmartGridAnalyzer.find_cheapest_window(df, hours=3)
+        print(f"   📉 Cheapest slots ({zone}): " +
+              ", ".join(f"{row['timestamp']:%H:%M} {row['price']:.2f} €" for _, row in cheapest.iterrows()))
+        if not block.empty:
+            print(f"   🔌 Cheapest 3h block: {block['timestamp'].iloc[0]:%H:%M} (avg {block['price'].mean():.2f} €)")
+
+    def check_alerts(self):
+        """
+        Evaluates the rules over every zone's latest day in one pass (spread
+        rules need both zones of a pair) and logs the alerts in one batch.
+        """
+        with self.metrics.stage('alerts'):
+            alerts = self.alerts.evaluate_series(self.series)
+        if alerts:
+            self.db.log_alerts(to_records(alerts))
+        return alerts
+
+    def render_map(self):
+        if self.map_gen is None or not self.current_prices:
+            return
+        with self.metrics.stage('render'):
+            m = self.map_gen.generate_map(self.current_prices)
+            if m:
+                m.save(self.map_path)
+        if m:
+            self.stats['renders'] += 1
+            print(f"🗺️ Map updated: {self.map_path}")
+
+    def run_once(self):
+        """Polls every zone that is due; returns seconds until the next zone is due."""
+        now = self.clock()
+        due = [z for z in self.zones if self.schedules[z].next_poll <= now]
+        known = set(self.series)
+        changed = [z for z in due if self.poll_zone(z, now)]
+        seeded = [z for z in self.series if z not in known and z not in changed]
+        if seeded:
+            # Read back after a restart and alerted before it: only the engine's state carries over
+            self.alerts.evaluate_series({zone: self.series[zone] for zone in seeded})
+        if changed:
+            self.check_alerts()
+            self.db.flush_alerts()
+        if changed or seeded:
+            self.render_map()
+        if self.metrics_path and due:
+            self.metrics.write_prometheus(self.metrics_path)
+        return max(0.0, min(s.next_poll for s in self.schedules.values()) - self.clock())
+
+    def run(self, sleep=None):
+        """Runs until stop() is called. sleep(seconds) defaults to an interruptible wait."""
+        sleep = sleep or self._stop.wait
+        print(f"🛰️ Ingest daemon started for {', '.join(self.zones)}")
+        while not self._stop.is_set():
+            wait = self.run_once()
+            if wait > 0:
+                sleep(wait)
+        print("🛑 Ingest daemon stopped.")
+
+    def stop(self):
+        self._stop.set()
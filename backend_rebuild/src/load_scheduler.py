@@ -0,0 +1,188 @@
+"""
+Load scheduling on day-ahead prices for flexible consumers.
+
+All solvers take one price vector (€/MWh, one value per slot) and a batch of
+devices given as arrays (scalars broadcast), and solve every device in the
+same vectorized pass:
+
+- schedule_shiftable: loads that need a fixed amount of energy between a
+  release slot and a deadline, optionally in minimum run blocks
+  (EV charging, dishwashers, heat pumps).
+- schedule_battery: storage with state-of-charge limits that may charge and
+  discharge to arbitrage prices and must end at a target SOC.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from price_analytics import window_sums
+
+# plan is (devices x slots): bool on/off for shiftable loads, kW for batteries
+# (positive = charging). cost is € per device; infeasible devices get NaN cost
+# and an empty plan.
+SchedulePlan = namedtuple('SchedulePlan', ['plan', 'cost', 'feasible'])
+
+
+def _device_arrays(*arrays):
+    """Broadcasts per-device parameters to 1-D arrays of equal length."""
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(a)) for a in arrays])
+    return [a.astype(np.float64).copy() for a in arrays]
+
+
+def _masked_prices(prices, release, deadline):
+    """(devices x slots) prices with inf outside each device's [release, deadline) window."""
+    slots = np.arange(len(prices))
+    allowed = (slots >= release[:, None]) & (slots < deadline[:, None])
+    return np.where(allowed, prices, np.inf)
+
+
+def schedule_shiftable(prices, power_kw, energy_kwh, release=0, deadline=None, min_block=1, step_hours=0.25):
+    """
+    Cheapest on/off plan for each device.
+
+    Each device runs at power_kw until energy_kwh is delivered, only in slots
+    release <= t < deadline (deadline defaults to the end of the horizon).
+    With min_block > 1 the device runs in blocks of min_block consecutive slots
+    (adjacent blocks merge into longer runs), which keeps compressors and
+    similar loads from short-cycling.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n_slots = len(prices)
+    if deadline is None:
+        deadline = n_slots
+    power_kw, energy_kwh, release, deadline, min_block = _device_arrays(
+        power_kw, energy_kwh, release, deadline, min_block)
+    min_block = np.maximum(min_block, 1).astype(np.int64)
+
+    slots_needed = np.ceil(energy_kwh / (power_kw * step_hours) - 1e-9).astype(np.int64)
+    blocks_needed = -(-slots_needed // min_block)
+    masked = _masked_prices(prices, release, deadline)
+
+    plan = np.zeros((len(power_kw), n_slots), dtype=bool)
+    for block in np.unique(min_block):
+        group = np.flatnonzero(min_block == block)
+        if block == 1:
+            plan[group] = _pick_cheapest_slots(masked[group], blocks_needed[group])
+        else:
+            plan[group] = _pick_cheapest_blocks(masked[group], blocks_needed[group], int(block))
+
+    feasible = (plan.sum(axis=1) == blocks_needed * min_block) & np.isfinite(
+        np.where(plan, masked, 0.0)).all(axis=1)
+    plan[~feasible] = False
+    cost = (plan * prices).sum(axis=1) * power_kw * step_hours / 1000.0
+    return SchedulePlan(plan, np.where(feasible, cost, np.nan), feasible)
+
+
+def _pick_cheapest_slots(masked, needed):
+    """Independent slots: the `needed` cheapest allowed slots per row (ranked with one argsort)."""
+    order = np.argsort(masked, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(masked.shape[1])[None, :], axis=1)
+    return ranks < needed[:, None]
+
+
+def _pick_cheapest_blocks(masked, needed, block):
+    """
+    Non-overlapping blocks of `block` slots minimising total price, by dynamic
+    programming over slots; the DP state (blocks placed so far) is vectorized
+    across devices.
+    """
+    n_dev, n_slots = masked.shape
+    max_blocks = int(needed.max()) if n_dev else 0
+    plan = np.zeros((n_dev, n_slots), dtype=bool)
+    if max_blocks == 0 or block > n_slots:
+        return plan
+
+    sums = window_sums(np.where(np.isinf(masked), np.nan, masked), block)
+    sums = np.where(np.isnan(sums), np.inf, sums)
+
+    # best[t % (block + 1)] holds the DP row for "first t slots used"
+    best = np.full((block + 1, n_dev, max_blocks + 1), np.inf)
+    best[0, :, 0] = 0.0
+    took = np.zeros((n_slots + 1, n_dev, max_blocks + 1), dtype=bool)
+    for t in range(1, n_slots + 1):
+        row = best[(t - 1) % (block + 1)].copy()
+        if t >= block:
+            prev = best[(t - block) % (block + 1)]
+            cand = prev[:, :-1] + sums[:, t - block, None]
+            better = cand < row[:, 1:]
+            row[:, 1:] = np.where(better, cand, row[:, 1:])
+            took[t, :, 1:] = better
+        best[t % (block + 1)] = row
+
+    # Walk the decisions back from the end, all devices in lockstep
+    t = np.full(n_dev, n_slots)
+    j = needed.copy()
+    offsets = np.arange(block)
+    for _ in range(n_slots):
+        active = j > 0
+        if not active.any():
+            break
+        dev = np.flatnonzero(active)
+        chose = took[t[dev], dev, j[dev]]
+        placed = dev[chose]
+        if len(placed):
+            plan[placed[:, None], (t[placed] - block)[:, None] + offsets] = True
+        t[dev] -= np.where(chose, block, 1)
+        j[placed] -= 1
+        j[t <= 0] = 0
+    return plan
+
+
+def schedule_battery(prices, capacity_kwh, power_kw, soc_kwh, target_soc_kwh=None,
+                     efficiency=0.9, step_hours=0.25):
+    """
+    Charge/discharge plan maximising arbitrage value for each battery.
+
+    SOC is discretised in steps of one full-power slot (power_kw * step_hours),
+    and each slot the battery charges, idles or discharges at full power.
+    Backward DP over (slot, SOC level) is vectorized across batteries.
+    efficiency is the round-trip efficiency, applied to discharged energy.
+    The battery must end with at least target_soc_kwh (defaults to soc_kwh).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n_slots = len(prices)
+    if target_soc_kwh is None:
+        target_soc_kwh = soc_kwh
+    capacity_kwh, power_kw, soc_kwh, target_soc_kwh, efficiency = _device_arrays(
+        capacity_kwh, power_kw, soc_kwh, target_soc_kwh, efficiency)
+
+    step_kwh = power_kw * step_hours
+    levels = np.floor(capacity_kwh / step_kwh + 1e-9).astype(np.int64)
+    start = np.minimum(np.round(soc_kwh / step_kwh).astype(np.int64), levels)
+    target = np.ceil(target_soc_kwh / step_kwh - 1e-9).astype(np.int64)
+
+    n_dev = len(capacity_kwh)
+    max_level = int(levels.max()) if n_dev else 0
+    level_idx = np.arange(max_level + 1)
+    valid = level_idx[None, :] <= levels[:, None]
+
+    # value[d, l]: cost-to-go from SOC level l; policy stores -1/0/+1 per slot
+    value = np.where(valid & (level_idx[None, :] >= target[:, None]), 0.0, np.inf)
+    policy = np.zeros((n_slots, n_dev, max_level + 1), dtype=np.int8)
+    energy_price = step_kwh / 1000.0
+
+    for t in range(n_slots - 1, -1, -1):
+        p = (prices[t] * energy_price)[:, None]
+        charge = np.full_like(value, np.inf)
+        charge[:, :-1] = value[:, 1:] + p
+        discharge = np.full_like(value, np.inf)
+        discharge[:, 1:] = value[:, :-1] - p * efficiency[:, None]
+        # Idle unless charging or discharging is strictly cheaper
+        charge_better = charge < value
+        best = np.where(charge_better, charge, value)
+        discharge_better = discharge < best
+        policy[t] = charge_better.astype(np.int8) - (discharge_better * (1 + charge_better)).astype(np.int8)
+        value = np.where(valid, np.where(discharge_better, discharge, best), np.inf)
+
+    feasible = np.isfinite(value[np.arange(n_dev), start])
+    plan = np.zeros((n_dev, n_slots))
+    level = start.copy()
+    for t in range(n_slots):
+        action = policy[t, np.arange(n_dev), level]
+        action[~feasible] = 0
+        plan[:, t] = action * power_kw
+        level += action
+
+    cost = np.where(plan > 0, plan, plan * efficiency[:, None]) @ prices * step_hours / 1000.0
+    return SchedulePlan(plan, np.where(feasible, cost, np.nan), feasible)
@@ -1,70 +1,109 @@
-import pandas as pd
 import folium
-import json
-import os
+import branca.colormap as cm
+
+from geometry import load_zone_geometry
+from time_map import DEFAULT_QUANTUM, TimeSlider, color_domain, encode_frames
+from zone_registry import ZONES
+
+
+def _feature_ids(zone):
+    """Map features of a zone; DE-LU and the Irish SEM span two."""
+    return ZONES[zone].geometry_ids if zone in ZONES else (zone,)
 
 class EllevioMapGenerator:
-    def __init__(self, geojson_path):
+    def __init__(self, geojson_path, zoom=5):
         self.geojson_path = geojson_path
+        self.zoom = zoom
 
     def generate_map(self, zone_price_dict):
         """
         Generates a clean, corporate-style Map (Folium).
         colors based on price relative to average.
+        Only the priced zones are embedded, simplified for the zoom level, in a
+        single GeoJson layer that carries both the colors and the tooltips.
         """
         # Center of Sweden
-        m = folium.Map(location=[62.0, 15.0], zoom_start=5, tiles='cartodbpositron') # 'positron' is very clean/Ellevio-like
+        m = folium.Map(location=[62.0, 15.0], zoom_start=self.zoom, tiles='cartodbpositron') # 'positron' is very clean/Ellevio-like
 
-        # Prepare Data for Choropleth
-        df = pd.DataFrame(list(zone_price_dict.items()), columns=['Zone', 'Price'])
+        # Zones spanning several map features (DE-LU, the Irish SEM) color all of them
+        feature_prices = {gid: price for zone, price in zone_price_dict.items() for gid in _feature_ids(zone)}
 
-        # Load GeoJSON
+        # Load pre-filtered, simplified geometry (cached per process and on disk)
         try:
-            with open(self.geojson_path, 'r', encoding='utf-8') as f:
-                geo_data = json.load(f)
+            geo = load_zone_geometry(self.geojson_path, feature_prices.keys(), zoom=self.zoom)
         except Exception as e:
             print(f"GeoJSON Load Error: {e}")
             return None
 
-        # Add Choropleth Layer
-        folium.Choropleth(
-            geo_data=geo_data,
-            name='Elpriser (Day-Ahead)',
-            data=df,
-            columns=['Zone', 'Price'],
-            key_on='feature.id',
-            fill_color='YlGn', # Yellow to Green (or Red for high prices if reversed) - Ellevio uses Green mostly
-            fill_opacity=0.6,
-            line_opacity=0.2,
-            legend_name='Pris (€/MWh)',
-            highlight=True
-        ).add_to(m)
+        # Attach prices to a copy of the cached features
+        features = []
+        for feature in geo['features']:
+            price = feature_prices.get(feature['id'])
+            props = dict(feature['properties'], price=None if price is None else round(float(price), 2))
+            features.append(dict(feature, properties=props))
+        geo_data = {'type': 'FeatureCollection', 'features': features}
+
+        prices = [p for p in zone_price_dict.values() if p is not None]
+        if not prices:
+            return m
+        low, high = min(prices), max(prices)
+        colormap = cm.linear.YlGn_09.scale(low, high if high > low else low + 1) # Ellevio uses Green mostly
+        colormap.caption = 'Pris (€/MWh)'
 
-        # Add clean tooltips
         style_function = lambda x: {
-            'fillColor': '#ffffff', 
-            'color': '#000000', 
-            'fillOpacity': 0.1, 
-            'weight': 0.1
+            'fillColor': colormap(x['properties']['price']) if x['properties']['price'] is not None else '#cccccc',
+            'color': '#000000',
+            'fillOpacity': 0.6,
+            'weight': 0.2
         }
         highlight_function = lambda x: {
-            'fillColor': '#000000', 
-            'color': '#000000', 
-            'fillOpacity': 0.50, 
+            'fillColor': '#000000',
+            'color': '#000000',
+            'fillOpacity': 0.50,
             'weight': 0.1
         }
-        
-        NIL = folium.features.GeoJson(
+
+        folium.features.GeoJson(
             geo_data,
-            style_function=style_function, 
-            control=False,
-            highlight_function=highlight_function, 
+            name='Elpriser (Day-Ahead)',
+            style_function=style_function,
+            highlight_function=highlight_function,
             tooltip=folium.features.GeoJsonTooltip(
-                fields=['name'],
-                aliases=['Område: '],
+                fields=['name', 'price'],
+                aliases=['Område: ', 'Pris (€/MWh): '],
                 style=("background-color: white; color: #333333; font-family: arial; font-size: 12px; padding: 10px;")
             )
-        )
-        m.add_child(NIL)
+        ).add_to(m)
+        colormap.add_to(m)
+
+        return m
+
+    def generate_time_map(self, zones, timestamps, matrix, quantum=DEFAULT_QUANTUM):
+        """
+        One map for a (zones x timesteps) price matrix, e.g. a week of
+        quarter-hours from time_map.align. The geometry is embedded once;
+        the prices travel as one delta/varint-encoded string and a time
+        slider restyles the zones in the browser.
+        """
+        m = folium.Map(location=[62.0, 15.0], zoom_start=self.zoom, tiles='cartodbpositron')
+        rows = {gid: row for row, zone in enumerate(zones) for gid in _feature_ids(zone)}
+        try:
+            geo_data = load_zone_geometry(self.geojson_path, rows.keys(), zoom=self.zoom)
+        except Exception as e:
+            print(f"GeoJSON Load Error: {e}")
+            return None
+
+        low, high = color_domain(matrix)
+        colormap = cm.linear.YlGn_09.scale(low, high)
+        colormap.caption = 'Pris (€/MWh)'
+        layer = folium.features.GeoJson(
+            geo_data,
+            name='Elpriser (Day-Ahead)',
+            style_function=lambda x: {'fillColor': '#cccccc', 'color': '#000000', 'fillOpacity': 0.6, 'weight': 0.2},
+            highlight_function=lambda x: {'fillColor': '#000000', 'color': '#000000', 'fillOpacity': 0.50, 'weight': 0.1},
+        ).add_to(m)
+        colors = [colormap.rgb_hex_str(v) for v in colormap.index]
+        TimeSlider(layer, encode_frames(timestamps, matrix, quantum), rows, colors, (low, high)).add_to(m)
+        colormap.add_to(m)
 
         return m
@@ -0,0 +1,219 @@
+"""
+Pipeline instrumentation: stage latencies, volumes and error counts.
+
+A Metrics registry holds counters and latency histograms keyed by name and
+labels. Components take an optional registry and record into it:
+
+- stage('fetch' | 'parse' | 'store' | 'analyze' | 'render', zone=...) times
+  a block into gridwatch_stage_seconds and counts exceptions that escape it
+  in gridwatch_stage_errors_total (the exception is re-raised),
+- inc() adds to counters such as bytes downloaded, rows parsed and written,
+  cache hits and misses, and API errors per zone.
+
+Every recorded value is also passed to the hooks registered with add_hook,
+so other sinks (logs, StatsD, tests) can subscribe without touching the
+pipeline. to_prometheus() renders the Prometheus text exposition format and
+write_prometheus() writes it atomically for the node_exporter textfile
+collector. profile() wraps a single run in cProfile or tracemalloc.
+"""
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Upper bounds in seconds; spans a cached lookup (~1 ms) to a slow API call or a large backfill
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'gridwatch_stage_seconds': 'Wall time per pipeline stage.',
+    'gridwatch_stage_errors_total': 'Exceptions raised inside a pipeline stage.',
+    'gridwatch_download_bytes_total': 'Bytes downloaded from the ENTSO-E API.',
+    'gridwatch_api_errors_total': 'Failed ENTSO-E API requests.',
+    'gridwatch_cache_requests_total': 'Response cache lookups by result (hit/miss).',
+    'gridwatch_rows_parsed_total': 'Points parsed from ENTSO-E documents.',
+    'gridwatch_rows_written_total': 'Price rows written to the database.',
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)    # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if it falls past the last bucket)."""
+        if not self.count:
+            return float('nan')
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms; fetch workers record from their own threads."""
+
+    def __init__(self):
+        self.counters = {}      # (name, labels) -> float
+        self.histograms = {}    # (name, labels) -> Histogram
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def add_hook(self, callback):
+        """Registers callback(kind, name, value, labels) with kind 'counter' or 'histogram', called on every record."""
+        self._hooks.append(callback)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        for callback in self._hooks:
+            callback('counter', name, value, dict(key[1]))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+        for callback in self._hooks:
+            callback('histogram', name, value, dict(key[1]))
+
+    @contextmanager
+    def stage(self, name, zone=None):
+        """Times the block as one `name` stage; exceptions are counted and re-raised."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc('gridwatch_stage_errors_total', stage=name, zone=zone)
+            raise
+        finally:
+            self.observe('gridwatch_stage_seconds', time.perf_counter() - t0, stage=name)
+
+    def counter(self, name, **labels):
+        return self.counters.get(self._key(name, labels), 0)
+
+    def total(self, name):
+        """Sum of a counter over all label values."""
+        return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    # --- Export --------------------------------------------------------------
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escape = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in pairs) + '}'
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            snapshot = [(key, h.buckets, list(h.counts), h.sum, h.count) for key, h in histograms]
+
+        lines, declared = [], set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, 'counter')
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), buckets, counts, total, count in snapshot:
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, n in zip(buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Writes to_prometheus() to path via a temporary file, so scrapers never see a partial file."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def summary(self):
+        """One line per stage: count, mean and approximate p50/p95 latency in ms."""
+        lines = []
+        for (name, labels), h in sorted(self.histograms.items()):
+            if name != 'gridwatch_stage_seconds' or not h.count:
+                continue
+            stage = dict(labels).get('stage', '?')
+            lines.append(f"{stage:<8} {h.count:5d}x  mean {h.sum / h.count * 1000:8.1f} ms  "
+                         f"p50 <={h.quantile(0.5) * 1000:7.0f} ms  p95 <={h.quantile(0.95) * 1000:7.0f} ms")
+        return lines
+
+
+@contextmanager
+def profile(mode, path=None, top=25):
+    """
+    Captures one run: mode 'cprofile' (cumulative time per function) or
+    'tracemalloc' (largest allocation sites and peak). The report is printed,
+    and cProfile stats are also dumped to path (for snakeviz/pstats) when given.
+    mode None is a no-op.
+    """
+    if mode is None:
+        yield
+        return
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+            print(out.getvalue())
+            if path:
+                profiler.dump_stats(path)
+    elif mode == 'tracemalloc':
+        tracemalloc.start(10)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"Peak traced memory: {peak / 2**20:.1f} MiB")
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f"  {stat}")
+            if path:
+                snapshot.dump(path)
+    else:
+        raise ValueError(f"Unknown profile mode '{mode}', expected 'cprofile' or 'tracemalloc'")
@@ -0,0 +1,108 @@
+"""
+Vectorized price analytics.
+
+Every function works along the last axis of an array of prices, so the same
+call handles one series (timesteps,), all zones (zones, timesteps) or all
+zones split per day (zones, days, steps_per_day). NaN marks missing prices.
+"""
+import numpy as np
+
+
+def to_matrix(frames, time_col='timestamp', value_col='price'):
+    """
+    Aligns per-zone DataFrames on a shared, sorted time axis.
+    frames: dict like {'SE1': df, 'SE2': df, ...}
+    Returns (zones, timestamps, matrix) where matrix is (zones x timesteps),
+    NaN where a zone has no value.
+    """
+    zones = list(frames)
+    times = [frames[z][time_col].to_numpy().astype('datetime64[s]') for z in zones]
+    timestamps = np.unique(np.concatenate(times)) if times else np.array([], dtype='datetime64[s]')
+
+    matrix = np.full((len(zones), len(timestamps)), np.nan)
+    for i, zone in enumerate(zones):
+        idx = np.searchsorted(timestamps, times[i])
+        matrix[i, idx] = frames[zone][value_col].to_numpy(dtype=np.float64)
+    return zones, timestamps, matrix
+
+
+def top_n(prices, n, largest=False):
+    """
+    Indices of the n cheapest (or most expensive) values along the last axis,
+    ordered best first. Uses argpartition, so only the selected n are sorted.
+    Missing values are never selected ahead of real ones.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n = min(n, prices.shape[-1])
+    if n == 0:
+        return np.empty(prices.shape[:-1] + (0,), dtype=np.intp)
+
+    keys = -prices if largest else prices
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    if n < keys.shape[-1]:
+        idx = np.argpartition(keys, n - 1, axis=-1)[..., :n]
+    else:
+        idx = np.broadcast_to(np.arange(n), keys.shape).copy()
+    order = np.argsort(np.take_along_axis(keys, idx, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(idx, order, axis=-1)
+
+
+def window_sums(prices, k):
+    """
+    Sum of every contiguous window of k steps along the last axis, via a cumulative
+    sum. Shape (..., timesteps - k + 1); windows containing NaN are NaN.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    csum = np.cumsum(np.nan_to_num(prices), axis=-1)
+    pad = np.zeros(prices.shape[:-1] + (1,))
+    csum = np.concatenate([pad, csum], axis=-1)
+    sums = csum[..., k:] - csum[..., :-k]
+
+    nans = np.concatenate([pad, np.cumsum(np.isnan(prices), axis=-1)], axis=-1)
+    sums[(nans[..., k:] - nans[..., :-k]) > 0] = np.nan
+    return sums
+
+
+def cheapest_window(prices, k):
+    """
+    Start index and mean price of the cheapest contiguous k-step window along the
+    last axis, i.e. the best block to shift a k-step load into.
+    Returns (start, mean); start is -1 where no complete window exists.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if k <= 0 or k > prices.shape[-1]:
+        raise ValueError(f"Window of {k} steps does not fit in {prices.shape[-1]} timesteps")
+
+    sums = window_sums(prices, k)
+    valid = ~np.isnan(sums)
+    start = np.argmin(np.where(valid, sums, np.inf), axis=-1)
+    best = np.take_along_axis(sums, start[..., None], axis=-1)[..., 0]
+    has_window = valid.any(axis=-1)
+    return np.where(has_window, start, -1), np.where(has_window, best / k, np.nan)
+
+
+def threshold_mask(prices, threshold, above=True):
+    """Boolean mask of prices strictly above (or below) a threshold; NaN is never flagged."""
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        return prices > threshold if above else prices < threshold
+
+
+def threshold_summary(prices, threshold, above=True):
+    """Per-series count and extreme value of threshold breaches along the last axis."""
+    prices = np.asarray(prices, dtype=np.float64)
+    mask = threshold_mask(prices, threshold, above)
+    count = mask.sum(axis=-1)
+    fill = -np.inf if above else np.inf
+    extreme = np.where(mask, prices, fill)
+    extreme = extreme.max(axis=-1) if above else extreme.min(axis=-1)
+    return count, np.where(count > 0, extreme, np.nan)
+
+
+def steps_per_hour(timestamps):
+    """Number of timesteps per hour inferred from a sorted timestamp array (defaults to 1)."""
+    timestamps = np.asarray(timestamps).astype('datetime64[s]')
+    if len(timestamps) < 2:
+        return 1
+    step = np.min(np.diff(timestamps)).astype(np.int64)
+    return max(1, int(3600 // step)) if step > 0 else 1
@@ -0,0 +1,472 @@
+"""
+Day-ahead price forecasts 1-7 days past the last published day.
+
+Prices are averaged to hourly values and laid out as a (days x 24) matrix
+per zone, one row per delivery day in MARKET_TZ (CET/CEST), so a day is
+complete as soon as it is published. Training rows for every day and hour come from a few array
+operations. For a target day t forecast on day d = t - h (horizon h), the
+features are:
+
+- hour of day (one-hot, acts as the intercept) and weekday of t,
+- the season (sine/cosine of the day of year),
+- the price at the same hour on d and on t - 7, the mean of d and of the
+  week up to d,
+- optionally the same-hour and daily-mean values of exogenous hourly
+  series on d (total load, renewable share), with a flag where missing.
+
+One ridge regression per horizon is kept as its sufficient statistics
+X'X and X'y, decayed by FORGET per day. A newly completed day adds its
+rows without refitting the history, and a forecast only solves a small
+linear system. Until MIN_DAYS target days have been seen, forecasts fall
+back to the seasonal-naive baseline (same hour a week earlier), as they do
+wherever a feature is missing.
+
+PriceForecaster keeps the statistics in grid_history.db (table
+forecast_state) and updates them as DatabaseManager.save_prices lands new
+days; backtest replays a history walk-forward for accuracy and runtime.
+"""
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+import numpy as np
+
+from ingest_daemon import MARKET_TZ
+
+HOURS = 24
+DAY = 86400
+HORIZON_DAYS = 7
+RIDGE_ALPHA = 1.0
+FORGET = 0.998              # Per day: older days count half after about a year
+MIN_DAYS = 28
+LOAD_SCALE = 1e4            # MW; keeps load features at the scale of the others
+EXOG_SOURCES = ('load', 'renewable_share')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# values/baseline are (zones x days * 24) €/MWh for the market hours of the delivery
+# days `days` (datetime64[D]); timestamps are their UTC starts (datetime64[s], NaT and
+# NaN values for the hour skipped when clocks go forward). issued is the last complete
+# delivery day each zone's forecast starts from.
+Forecast = namedtuple('Forecast', ['zones', 'issued', 'days', 'timestamps', 'values', 'baseline'])
+
+
+def _offsets(start, end):
+    """MARKET_TZ UTC offsets over [start, end] epoch s: (epoch s each offset starts, offsets in s)."""
+    def offset(t):
+        return int(datetime.fromtimestamp(t, MARKET_TZ).utcoffset().total_seconds())
+    first = start // DAY * DAY
+    starts, offsets = [first], [offset(first)]
+    for midnight in range(first + DAY, end // DAY * DAY + 2 * DAY, DAY):
+        if offset(midnight) != offsets[-1]:          # Clocks changed that day: find the hour
+            hour = next(t for t in range(midnight - DAY, midnight + 1, 3600) if offset(t) != offsets[-1])
+            starts.append(hour)
+            offsets.append(offset(hour))
+    return np.array(starts), np.array(offsets)
+
+
+def market_time(timestamps):
+    """Wall-clock epoch seconds in MARKET_TZ of epoch-second or datetime64 timestamps."""
+    ts = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+    if not len(ts):
+        return ts
+    starts, offsets = _offsets(int(ts.min()), int(ts.max()))
+    return ts + offsets[np.searchsorted(starts, ts, 'right') - 1]
+
+
+def market_midnight(day):
+    """Epoch seconds of the start of delivery day `day` (epoch days)."""
+    d = date.fromordinal(EPOCH_ORDINAL + int(day))
+    return int(datetime(d.year, d.month, d.day, tzinfo=MARKET_TZ).timestamp())
+
+
+def market_day(timestamp):
+    """Delivery day (epoch days) of one epoch second."""
+    return datetime.fromtimestamp(timestamp, MARKET_TZ).date().toordinal() - EPOCH_ORDINAL
+
+
+def market_hours(first_day, days):
+    """
+    (days x 24) UTC starts (datetime64[s]) of the wall-clock hours of `days`
+    delivery days from epoch day first_day; NaT for the hour skipped when
+    clocks go forward, the first occurrence for the one repeated.
+    """
+    utc = np.arange(market_midnight(first_day), market_midnight(first_day + days), 3600)
+    slot = (market_time(utc) - first_day * DAY) // 3600
+    first = np.r_[True, slot[1:] != slot[:-1]]
+    hours = np.full(days * HOURS, np.datetime64('NaT'), dtype='datetime64[s]')
+    hours[slot[first]] = utc[first]
+    return hours.reshape(days, HOURS)
+
+
+def hourly_matrix(timestamps, values, first_day=None, days=None):
+    """
+    (first delivery day as epoch days, days x 24 hourly means) of an
+    epoch-second or datetime64 series, by day and wall-clock hour in
+    MARKET_TZ; NaN for hours without data. The hour repeated when clocks go
+    back holds the mean of both, the one skipped when they go forward is
+    interpolated so the day still counts as complete. first_day/days fix
+    the window instead of spanning the data.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    keep = ~np.isnan(values)
+    ts, values = market_time(np.asarray(timestamps)[keep]), values[keep]
+    if first_day is None:
+        first_day = int(ts.min() // DAY) if len(ts) else 0
+    if days is None:
+        days = int(ts.max() // DAY) - first_day + 1 if len(ts) else 0
+    slot = ts // 3600 - first_day * HOURS
+    inside = (slot >= 0) & (slot < days * HOURS)
+    counts = np.bincount(slot[inside], minlength=days * HOURS)
+    sums = np.bincount(slot[inside], weights=values[inside], minlength=days * HOURS)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = sums / counts
+    skipped = np.flatnonzero(np.isnat(market_hours(first_day, days)))
+    matrix[skipped] = (matrix[skipped - 1] + matrix[skipped + 1]) / 2
+    return first_day, matrix.reshape(days, HOURS)
+
+
+def complete_days(matrix):
+    """Boolean per day: all 24 hours present."""
+    return ~np.isnan(matrix).any(axis=1)
+
+
+def _row_mean(rows):
+    counts = np.sum(~np.isnan(rows), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(rows, axis=-1) / counts
+
+
+def n_features(n_exog=0):
+    return HOURS + 6 + 2 + 4 + 3 * n_exog
+
+
+def design(first_day, prices, targets, horizon, exog=()):
+    """
+    Feature rows for target day indices `targets` (rows of `prices`) at
+    `horizon` days (one value or one per target): (len(targets) * 24,
+    n_features) in target-major, hour-minor order. exog are hourly matrices aligned with `prices`. Rows with a missing
+    price feature contain NaN. Needs targets >= max(7, horizon + 6).
+    """
+    t = np.asarray(targets, dtype=np.int64)
+    d = t - np.asarray(horizon, dtype=np.int64)
+    n = len(t)
+    X = np.zeros((n, HOURS, n_features(len(exog))))
+    X[:, np.arange(HOURS), np.arange(HOURS)] = 1.0
+
+    day = first_day + t
+    weekday = (day + 3) % 7                            # 0 = Monday (1970-01-01 was a Thursday)
+    week_cols = np.flatnonzero(weekday > 0)
+    X[week_cols, :, HOURS + weekday[week_cols] - 1] = 1.0
+    angle = 2 * np.pi * (day % 365.25) / 365.25
+    X[:, :, HOURS + 6] = np.sin(angle)[:, None]
+    X[:, :, HOURS + 7] = np.cos(angle)[:, None]
+
+    daily = _row_mean(prices)
+    col = HOURS + 8
+    X[:, :, col] = prices[d]
+    X[:, :, col + 1] = prices[t - 7]
+    X[:, :, col + 2] = daily[d][:, None]
+    X[:, :, col + 3] = _row_mean(daily[d[:, None] - np.arange(7)])[:, None]
+    col += 4
+    for series in exog:
+        same_hour = series[d]
+        missing = np.isnan(same_hour)
+        X[:, :, col] = np.where(missing, 0.0, same_hour)
+        mean = _row_mean(series[d])
+        X[:, :, col + 1] = np.where(np.isnan(mean), 0.0, mean)[:, None]
+        X[:, :, col + 2] = missing
+        col += 3
+    return X.reshape(n * HOURS, -1)
+
+
+def seasonal_naive(prices, targets):
+    """Same hour one week before each target day: (len(targets) x 24)."""
+    return prices[np.asarray(targets, dtype=np.int64) - 7]
+
+
+class RidgeForecaster:
+    """
+    Per-horizon ridge regressions over one zone's hourly matrix, kept as
+    decayed sufficient statistics (xtx, xty, n) and updated day by day.
+    """
+
+    def __init__(self, n_exog=0, horizon=HORIZON_DAYS, alpha=RIDGE_ALPHA, forget=FORGET):
+        self.n_exog = n_exog
+        self.horizon = horizon
+        self.alpha = alpha
+        self.forget = forget
+        f = n_features(n_exog)
+        self.xtx = np.zeros((horizon, f, f))
+        self.xty = np.zeros((horizon, f))
+        self.n = np.zeros(horizon)
+        self.last_day = None            # Last target day learned (epoch days)
+        self._weights = None
+
+    def partial_fit(self, first_day, prices, exog=()):
+        """
+        Learns every complete day of `prices` after last_day, in bulk. Days
+        before a gap are not revisited, so only call this with history up to
+        the last complete day.
+        """
+        days = np.arange(len(prices))
+        start = 0 if self.last_day is None else self.last_day - first_day + 1
+        new = days[(days >= max(start, 0)) & complete_days(prices)]
+        if not len(new):
+            return 0
+        end = int(new[-1])
+        decay = 1.0 if self.last_day is None else self.forget ** (first_day + end - self.last_day)
+        for h in range(1, self.horizon + 1):
+            t = new[new >= max(7, h + 6)]
+            if not len(t):
+                continue
+            X = design(first_day, prices, t, h, exog)
+            y = prices[t].ravel()
+            ok = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+            w = np.repeat(self.forget ** (end - t), HOURS)[ok]
+            X, y = X[ok], y[ok]
+            self.xtx[h - 1] = decay * self.xtx[h - 1] + (X * w[:, None]).T @ X
+            self.xty[h - 1] = decay * self.xty[h - 1] + (X * w[:, None]).T @ y
+            self.n[h - 1] = decay * self.n[h - 1] + w.sum() / HOURS
+        self.last_day = first_day + end
+        self._weights = None
+        return len(new)
+
+    def weights(self):
+        """(horizon x features) ridge solutions; rows of zeros for horizons not trained yet."""
+        if self._weights is None:
+            eye = self.alpha * np.eye(self.xtx.shape[1])
+            self._weights = np.linalg.solve(self.xtx + eye, self.xty[..., None])[..., 0]
+        return self._weights
+
+    def predict(self, first_day, prices, issued, days=HORIZON_DAYS, exog=()):
+        """
+        (days x 24) forecasts for the days after row `issued` of `prices`
+        (which must extend `days` rows past it, NaN-filled), and the seasonal-naive
+        baseline. Horizons beyond the model's, untrained ones and rows with
+        missing features use the baseline.
+        """
+        t = issued + np.arange(1, days + 1)
+        baseline = seasonal_naive(prices, np.minimum(t, issued + 7))
+        baseline[t - 7 > issued] = np.nan
+        out = baseline.copy()
+        h = np.arange(1, min(days, self.horizon) + 1)
+        h = h[self.n[h - 1] >= MIN_DAYS]
+        if len(h):
+            X = design(first_day, prices, issued + h, h, exog).reshape(len(h), HOURS, -1)
+            rows = np.einsum('thf,tf->th', X, self.weights()[h - 1])
+            out[h - 1] = np.where(np.isnan(rows), baseline[h - 1], rows)
+        return out, baseline
+
+    def to_state(self):
+        return self.last_day, self.n, self.xtx, self.xty
+
+    @classmethod
+    def from_state(cls, n_exog, last_day, n, xtx, xty):
+        model = cls(n_exog, horizon=len(n))
+        model.last_day, model.n, model.xtx, model.xty = last_day, n, xtx, xty
+        return model
+
+
+class PriceForecaster:
+    """
+    Forecasts for zones in a DatabaseManager, trained incrementally on its
+    prices table. exog names EXOG_SOURCES to add as features.
+    """
+
+    HISTORY_DAYS = 14           # Days of prices read around an update or forecast
+
+    def __init__(self, db, exog=()):
+        unknown = set(exog) - set(EXOG_SOURCES)
+        if unknown:
+            raise ValueError(f"Unknown exogenous sources: {sorted(unknown)}")
+        self.db = db
+        self.exog = tuple(exog)
+        self._models = {}
+        with db.conn:
+            db.conn.execute('''
+                CREATE TABLE IF NOT EXISTS forecast_state (
+                    zone TEXT NOT NULL,
+                    exog TEXT NOT NULL,
+                    last_day INTEGER,
+                    n BLOB,
+                    xtx BLOB,
+                    xty BLOB,
+                    PRIMARY KEY (zone, exog)
+                )
+            ''')
+
+    def _model(self, zone):
+        if zone not in self._models:
+            row = self.db.conn.execute(
+                "SELECT last_day, n, xtx, xty FROM forecast_state WHERE zone = ? AND exog = ?",
+                (zone, ','.join(self.exog))
+            ).fetchone()
+            if row is None:
+                self._models[zone] = RidgeForecaster(len(self.exog))
+            else:
+                last_day, n, xtx, xty = row
+                f = n_features(len(self.exog))
+                n = np.frombuffer(n, dtype=np.float64).copy()
+                self._models[zone] = RidgeForecaster.from_state(
+                    len(self.exog), last_day, n,
+                    np.frombuffer(xtx, dtype=np.float64).reshape(len(n), f, f).copy(),
+                    np.frombuffer(xty, dtype=np.float64).reshape(len(n), f).copy())
+        return self._models[zone]
+
+    def _prices(self, zone, first_day=None, days=None):
+        """Hourly price matrix from the database (all history, archive included, when first_day is None)."""
+        if first_day is None:
+            df = self.db.get_prices(zone)
+            return hourly_matrix(df['timestamp'].to_numpy(), df['price'].to_numpy())
+        rows = np.array(self.db.conn.execute(
+            "SELECT timestamp, price FROM prices WHERE zone = ? AND timestamp >= ? AND timestamp < ?",
+            (zone, market_midnight(first_day), market_midnight(first_day + days))
+        ).fetchall(), dtype=np.float64).reshape(-1, 2)
+        return hourly_matrix(rows[:, 0].astype(np.int64), rows[:, 1], first_day, days)
+
+    def _exog(self, zone, first_day, days):
+        series = []
+        start = np.datetime64(market_midnight(first_day), 's')
+        end = np.datetime64(market_midnight(first_day + days), 's')
+        for name in self.exog:
+            if name == 'load':
+                df = self.db.get_load(zone, start, end)
+                load = np.where(np.isnan(df['actual'].to_numpy()), df['forecast'].to_numpy(), df['actual'].to_numpy())
+                series.append(hourly_matrix(df['timestamp'].to_numpy(), load / LOAD_SCALE, first_day, days)[1])
+            else:
+                from generation_mix import renewable_share
+                cube = self.db.get_generation([zone], start, end)
+                if cube is None:
+                    series.append(np.full((days, HOURS), np.nan))
+                else:
+                    series.append(hourly_matrix(cube.timestamps, renewable_share(cube)[0], first_day, days)[1])
+        return series
+
+    def _last_day(self, zone):
+        """Delivery day (epoch days) of the zone's latest stored price, None without prices."""
+        last = self.db.conn.execute("SELECT MAX(timestamp) FROM prices WHERE zone = ?", (zone,)).fetchone()[0]
+        return None if last is None else market_day(last)
+
+    def update(self, zone):
+        """Learns the zone's complete days not seen yet (all history on the first call). Returns the day count."""
+        model = self._model(zone)
+        if model.last_day is None:
+            first_day, prices = self._prices(zone)
+        else:
+            first_day = model.last_day - self.HISTORY_DAYS
+            last = self._last_day(zone)
+            if last is None or last <= model.last_day:
+                return 0
+            first_day, prices = self._prices(zone, first_day, last - first_day + 1)
+        if not len(prices):
+            return 0
+        complete = np.flatnonzero(complete_days(prices))
+        if not len(complete):
+            return 0
+        prices = prices[:complete[-1] + 1]          # A partly published day is learned once complete
+        learned = model.partial_fit(first_day, prices, self._exog(zone, first_day, len(prices)) if self.exog else ())
+        if learned:
+            self._persist(zone, model)
+        return learned
+
+    def _persist(self, zone, model):
+        last_day, n, xtx, xty = model.to_state()
+        with self.db.conn:
+            self.db.conn.execute('''
+                INSERT OR REPLACE INTO forecast_state (zone, exog, last_day, n, xtx, xty) VALUES (?, ?, ?, ?, ?, ?)
+            ''', (zone, ','.join(self.exog), int(last_day), n.tobytes(), xtx.tobytes(), xty.tobytes()))
+
+    def on_prices_saved(self, zone, timestamps, prices):
+        """DatabaseManager listener: learns days completed by each committed batch."""
+        self.update(zone)
+
+    def forecast(self, zones, days=HORIZON_DAYS):
+        """
+        Hourly forecasts for `days` delivery days after the latest complete
+        day of any of `zones`, on one grid. Zones whose own last complete day
+        is older are forecast further out (NaN beyond the model horizon).
+        """
+        zones = tuple(zones)
+        issued, frames = [], []
+        for zone in zones:
+            last = self._last_day(zone)
+            if last is None:
+                issued.append(None)
+                frames.append(None)
+                continue
+            first_day = last - self.HISTORY_DAYS
+            first_day, prices = self._prices(zone, first_day, self.HISTORY_DAYS + 1)
+            complete = np.flatnonzero(complete_days(prices))
+            issued.append(first_day + int(complete[-1]) if len(complete) else None)
+            frames.append((first_day, prices))
+
+        known = [day for day in issued if day is not None]
+        start = (max(known) if known else market_day(time.time())) + 1
+        values = np.full((len(zones), days * HOURS), np.nan)
+        baseline = np.full((len(zones), days * HOURS), np.nan)
+        for row, (zone, day, frame) in enumerate(zip(zones, issued, frames)):
+            if day is None:
+                continue
+            first_day, prices = frame
+            ahead = start + days - 1 - day
+            grid = np.full((day - first_day + 1 + ahead, HOURS), np.nan)
+            grid[:day - first_day + 1] = prices[:day - first_day + 1]
+            exog = ()
+            if self.exog:
+                exog = [np.vstack([e, np.full((len(grid) - len(e), HOURS), np.nan)])
+                        for e in self._exog(zone, first_day, day - first_day + 1)]
+            out, base = self._model(zone).predict(first_day, grid, day - first_day, ahead, exog)
+            values[row] = out[-days:].ravel()
+            baseline[row] = base[-days:].ravel()
+
+        timestamps = market_hours(start, days).ravel()
+        values[:, np.isnat(timestamps)] = np.nan
+        baseline[:, np.isnat(timestamps)] = np.nan
+        issued = np.array([np.datetime64('NaT') if d is None else np.datetime64(d, 'D') for d in issued],
+                          dtype='datetime64[D]')
+        return Forecast(zones, issued, np.datetime64(start, 'D') + np.arange(days), timestamps, values, baseline)
+
+
+def backtest(timestamps, prices, exog=(), warmup=MIN_DAYS + 7, horizon=HORIZON_DAYS):
+    """
+    Walk-forward replay of one zone's history: on each day, forecast the
+    next `horizon` days with what is known so far, then learn the day.
+    Returns {'mae': {model: per-horizon MAE}, 'rmse': {...}, 'days',
+    'update_ms', 'predict_ms'} for the ridge, seasonal-naive (t - 7) and
+    persistence (same hour on the issue day) forecasts.
+    """
+    first_day, matrix = hourly_matrix(timestamps, prices)
+    exog = [hourly_matrix(ts, values, first_day, len(matrix))[1] for ts, values in exog]
+    model = RidgeForecaster(len(exog), horizon)
+    padded = np.vstack([matrix, np.full((horizon, HOURS), np.nan)])
+    exog = [np.vstack([e, np.full((horizon, HOURS), np.nan)]) for e in exog]
+
+    errors = {name: [[] for _ in range(horizon)] for name in ('ridge', 'seasonal_naive', 'persistence')}
+    update = predict = 0.0
+    days = 0
+    for issued in range(warmup, len(matrix) - 1):
+        t0 = time.perf_counter()
+        model.partial_fit(first_day, padded[:issued + 1], [e[:issued + 1] for e in exog])
+        t1 = time.perf_counter()
+        visible = padded.copy()
+        visible[issued + 1:] = np.nan
+        out, base = model.predict(first_day, visible, issued, horizon, exog)
+        predict += time.perf_counter() - t1
+        update += t1 - t0
+        days += 1
+        for h in range(1, min(horizon, len(matrix) - 1 - issued) + 1):
+            actual = matrix[issued + h]
+            for name, guess in (('ridge', out[h - 1]), ('seasonal_naive', base[h - 1]),
+                                ('persistence', matrix[issued])):
+                errors[name][h - 1].append(guess - actual)
+
+    def reduce(fn):
+        return {name: np.array([fn(np.concatenate(e)) if e else np.nan for e in per_h])
+                for name, per_h in errors.items()}
+    return {
+        'mae': reduce(lambda e: np.nanmean(np.abs(e))),
+        'rmse': reduce(lambda e: np.sqrt(np.nanmean(e ** 2))),
+        'days': days,
+        'update_ms': 1000 * update / max(days, 1),
+        'predict_ms': 1000 * predict / max(days, 1),
+    }
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from entsoe_parser import parse_header
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw ENTSO-E documents keyed by (documentType, domain, period).
+
+    Documents are stored zlib-compressed together with their revisionNumber and
+    createdDateTime. Day-ahead price documents (A44) for periods that ended before
+    today (UTC) are final and never expire. Other document types (generation,
+    actual load) keep being revised after their period ends, so they become final
+    only ACTUALS_GRACE after it. Everything else, including empty acknowledgement
+    documents, expires after a short TTL. When the total compressed size exceeds max_bytes the
+    least recently used documents are evicted. Safe to share between threads.
+    """
+    CACHE_PATH = "backend_rebuild/db/entsoe_cache.db"
+    MAX_BYTES = 256 * 1024 * 1024
+    SHORT_TTL = timedelta(minutes=15)
+    FINAL_TYPES = ('A44',)              # Published once; later revisions are rare corrections
+    ACTUALS_GRACE = timedelta(days=3)   # Other types settle this long after the period ends
+
+    def __init__(self, path=None, max_bytes=None, short_ttl=None):
+        self.path = path or self.CACHE_PATH
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.short_ttl = short_ttl or self.SHORT_TTL
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    key TEXT PRIMARY KEY,
+                    content BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    revision INTEGER,
+                    created TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_lru ON documents (last_access)")
+        self._total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+
+    @staticmethod
+    def make_key(document_type, domain, start, end):
+        return f"{document_type}|{domain}|{start:%Y%m%d%H%M}|{end:%Y%m%d%H%M}"
+
+    def get(self, document_type, domain, start, end):
+        """Returns the cached raw document, or None if missing or expired."""
+        key = self.make_key(document_type, domain, start, end)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT content, expires_at FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE documents SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def get_revision(self, document_type, domain, start, end):
+        """(revisionNumber, createdDateTime) of the cached document, expired or not; None if never cached."""
+        key = self.make_key(document_type, domain, start, end)
+        with self._lock:
+            row = self.conn.execute("SELECT revision, created FROM documents WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, document_type, domain, start, end, content):
+        """
+        Stores a freshly fetched document. Returns True if it differs from the
+        cached revision (new document, new revisionNumber or changed createdDateTime).
+        """
+        key = self.make_key(document_type, domain, start, end)
+        header = parse_header(content)
+        revision = int(header['revisionNumber']) if header.get('revisionNumber', '').isdigit() else None
+        created = header.get('createdDateTime')
+
+        now = time.time()
+        final = b'<TimeSeries>' in content and self._settled(document_type, end)
+        expires_at = None if final else now + self.short_ttl.total_seconds()
+        blob = zlib.compress(content, 6)
+
+        with self._lock:
+            previous = self.conn.execute(
+                "SELECT size, revision, created FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            with self.conn:
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO documents
+                        (key, content, size, revision, created, fetched_at, expires_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (key, blob, len(blob), revision, created, now, expires_at, now))
+            self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return previous is None or (previous[1], previous[2]) != (revision, created)
+
+    def _settled(self, document_type, end):
+        """True once a period ending at `end` (naive UTC, as in the keys) will not be revised."""
+        today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        if document_type in self.FINAL_TYPES:
+            return end <= today
+        return end + self.ACTUALS_GRACE <= today
+
+    def _evict(self):
+        """Drops least recently used documents until the cache fits in max_bytes (lock held)."""
+        excess = self._total_bytes - self.max_bytes
+        victims, freed = [], 0
+        for key, size in self.conn.execute("SELECT key, size FROM documents ORDER BY last_access"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        with self.conn:
+            self.conn.executemany("DELETE FROM documents WHERE key = ?", victims)
+        self._total_bytes -= freed
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'bytes': self._total_bytes,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,189 @@
+"""
+Cross-border price spread analytics over all bidding zones.
+
+The spread between zones a and b at time t is price[a, t] - price[b, t]. For
+Z zones and T timesteps that is a (Z x Z x T) tensor; spread_tensor builds it
+with one broadcast. The statistics never hold the whole tensor: mean, std
+and correlation come from pairwise sums computed as matrix products, and
+the rest takes each unordered pair once (a < b) in time blocks of
+CHUNK_BYTES, so a year of PT15M for 60 zones (62 million pair-steps) needs
+tens of MB of scratch instead of a Python loop over 1770 pairs.
+
+Two zones count as coupled at a timestep when their prices differ by at
+most `tol` (market coupling gives identical prices when the border is not
+congested); the share of uncoupled steps on a real border approximates its
+congestion frequency. NaN marks a missing price; pairs only use timesteps
+where both zones have one.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+CHUNK_BYTES = 16 * 1024 * 1024
+
+# Per-pair (zones x zones) matrices; mean/mean_abs/... are of price[a] - price[b]
+# over the `count` timesteps where both are known.
+CouplingStats = namedtuple('CouplingStats', [
+    'zones', 'count', 'mean', 'mean_abs', 'std', 'max_abs', 'coupled_share', 'correlation',
+])
+
+# Largest |spread| points, sorted descending: zone indices, time index and signed spread
+Divergences = namedtuple('Divergences', ['a', 'b', 'time', 'spread'])
+
+
+def to_common_grid(timestamps, matrix, step=3600):
+    """
+    Averages a (zones x timesteps) matrix onto a regular grid of `step`
+    seconds, e.g. to compare PT15M and PT60M zones on hourly prices. Returns
+    (grid timestamps as datetime64[s], grid matrix); empty buckets are NaN.
+    """
+    ts = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if not len(ts):
+        return np.array([], dtype='datetime64[s]'), matrix[:, :0]
+    first = ts.min() - ts.min() % step
+    bucket = (ts - first) // step
+    n = int(bucket.max()) + 1
+
+    valid = ~np.isnan(matrix)
+    sums = np.zeros((matrix.shape[0], n))
+    counts = np.zeros((matrix.shape[0], n))
+    rows = np.broadcast_to(np.arange(matrix.shape[0])[:, None], matrix.shape)
+    cols = np.broadcast_to(bucket, matrix.shape)
+    np.add.at(sums, (rows[valid], cols[valid]), matrix[valid])
+    np.add.at(counts, (rows[valid], cols[valid]), 1)
+    with np.errstate(invalid='ignore'):
+        grid = sums / counts
+    return (first + np.arange(n) * step).astype('datetime64[s]'), grid
+
+
+def spread_tensor(matrix, dtype=np.float32):
+    """(zones x zones x timesteps) spreads price[a] - price[b]; antisymmetric, zero diagonal."""
+    matrix = np.asarray(matrix, dtype=dtype)
+    return matrix[:, None, :] - matrix[None, :, :]
+
+
+def _moments(matrix):
+    """
+    Pairwise sums over the timesteps where both zones are known, as matrix
+    products: n[a, b] common steps, sx[a, b] sum of a's prices, sxx[a, b] sum
+    of a's squares, sxy[a, b] sum of products. Missing prices count as 0.
+    """
+    valid = ~np.isnan(matrix)
+    x = np.where(valid, matrix, 0.0)
+    v = valid.astype(np.float64)
+    return valid, x, v @ v.T, x @ v.T, (x * x) @ v.T, x @ x.T
+
+
+def _correlation(n, sx, sxx, sxy):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sx.T / n
+        var = sxx - sx * sx / n            # var[a, b]: a's variance over the steps shared with b
+        return np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+
+
+def correlation(matrix):
+    """Pearson correlation between zone series over their common timesteps, via matrix products."""
+    _, _, n, sx, sxx, sxy = _moments(np.asarray(matrix, dtype=np.float64))
+    return _correlation(n, sx, sxx, sxy)
+
+
+def coupling_stats(zones, matrix, tol=0.01):
+    """
+    CouplingStats for every zone pair of a (zones x timesteps) price matrix.
+    Mean, std and correlation of the spreads follow from pairwise sums
+    (matrix products, no pair loop); only mean |spread|, max |spread| and the
+    coupled share need a pass over the pair-steps, done in chunks on the
+    upper triangle.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    z, t = matrix.shape
+    valid, x, n, sx, sxx, sxy = _moments(matrix)
+    gaps = not valid.all()
+
+    i, j = np.triu_indices(z, 1)
+    total_abs, coupled, max_abs = np.zeros(len(i)), np.zeros(len(i)), np.zeros(len(i))
+    step = max(1, CHUNK_BYTES // (8 * max(len(i), 1)))
+    for lo in range(0, t, step):
+        hi = min(lo + step, t)
+        d = x[i, lo:hi] - x[j, lo:hi]                       # (pairs x chunk)
+        np.abs(d, out=d)
+        near = d <= tol
+        if gaps:
+            both = valid[i, lo:hi] & valid[j, lo:hi]
+            d *= both
+            near &= both
+        total_abs += d.sum(axis=1)
+        coupled += near.sum(axis=1)
+        np.maximum(max_abs, d.max(axis=1, initial=0.0), out=max_abs)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (sx - sx.T) / n
+        std = np.sqrt(np.maximum((sxx + sxx.T - 2 * sxy) / n - mean * mean, 0.0))
+        count = n[i, j]
+        mean_abs = np.zeros((z, z))
+        mean_abs[i, j] = mean_abs[j, i] = total_abs / count
+        share = np.ones((z, z))
+        share[i, j] = share[j, i] = coupled / count
+        peak = np.zeros((z, z))
+        peak[i, j] = peak[j, i] = np.where(count > 0, max_abs, np.nan)
+        missing = n == 0
+        return CouplingStats(
+            zones=list(zones), count=n.astype(np.int64),
+            mean=np.where(missing, np.nan, mean), mean_abs=np.where(missing, np.nan, mean_abs),
+            std=np.where(missing, np.nan, std), max_abs=np.where(missing, np.nan, peak),
+            coupled_share=np.where(missing, np.nan, share), correlation=_correlation(n, sx, sxx, sxy),
+        )
+
+
+def top_divergences(matrix, k=20, pairs=None):
+    """
+    The k largest |price[a] - price[b]| over all timesteps and zone pairs
+    (a < b), or only over `pairs` given as (i, j) index arrays such as
+    zone_registry.border_index. Per chunk, the k-th largest per-pair maximum
+    bounds the candidates from below, so only the few points above it are
+    partitioned.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    z, t = matrix.shape
+    i, j = pairs if pairs is not None else np.triu_indices(z, 1)
+    if not len(i) or not t or k <= 0:
+        empty = np.empty(0, dtype=np.intp)
+        return Divergences(empty, empty, empty, np.empty(0))
+
+    x = np.nan_to_num(matrix, nan=np.inf)
+    best_keys, best_flat = np.empty(0), np.empty(0, dtype=np.int64)
+    step = max(1, CHUNK_BYTES // (8 * len(i)))
+    for lo in range(0, t, step):
+        hi = min(lo + step, t)
+        with np.errstate(invalid='ignore'):
+            d = x[i, lo:hi] - x[j, lo:hi]                   # (pairs x chunk); inf - inf = NaN
+        np.abs(d, out=d)
+        d[~np.isfinite(d)] = -1.0                           # Missing prices never qualify
+        peaks = d.max(axis=1)
+        kth = len(peaks) - min(k, len(peaks))
+        floor = max(np.partition(peaks, kth)[kth], 0.0)
+        if len(best_keys) >= k:
+            floor = max(floor, best_keys.min())
+        pair, col = np.nonzero(d >= floor)
+        best_keys = np.concatenate([best_keys, d[pair, col]])
+        best_flat = np.concatenate([best_flat, pair * t + lo + col])
+        if len(best_keys) > k:
+            keep = np.argpartition(best_keys, len(best_keys) - k)[len(best_keys) - k:]
+            best_keys, best_flat = best_keys[keep], best_flat[keep]
+
+    pair, time = np.divmod(best_flat, t)
+    a, b = i[pair], j[pair]
+    spread = matrix[a, time] - matrix[b, time]
+    order = np.argsort(-np.abs(spread), kind='stable')
+    return Divergences(a[order], b[order], time[order], spread[order])
+
+
+def border_table(stats, pairs):
+    """Rows (zone a, zone b, mean spread, mean |spread|, max |spread|, coupled share, correlation) for (i, j) pairs."""
+    i, j = pairs
+    return [
+        (stats.zones[a], stats.zones[b], stats.mean[a, b], stats.mean_abs[a, b], stats.max_abs[a, b],
+         stats.coupled_share[a, b], stats.correlation[a, b])
+        for a, b in zip(i.tolist(), j.tolist())
+    ]
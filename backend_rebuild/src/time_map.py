@@ -0,0 +1,224 @@
+"""
+Time-animated price maps in a single HTML file.
+
+A map per timestep would re-embed the zone geometry every time. Instead the
+geometry goes in once (one GeoJson layer, simplified by geometry.py) and
+the prices of every zone and timestep travel as one compact string:
+
+1. quantized to `quantum` €/MWh (default the cent, as ENTSO-E publishes),
+2. delta-encoded along time per zone, so a slowly moving price costs a
+   small integer,
+3. zigzag + varint packed (1 byte for |delta| < 64 quanta) and base64'd.
+
+Timestamps are delta-encoded the same way (a regular grid costs one byte
+per step). Missing prices are listed separately as delta-encoded flat
+indices. The browser decodes everything once and a slider (with play
+button) restyles the zones client-side.
+"""
+import base64
+import json
+
+import numpy as np
+from branca.element import MacroElement
+from jinja2 import Template
+
+DEFAULT_QUANTUM = 0.01
+
+
+def align(series):
+    """
+    {zone: (timestamps, prices)} -> (zones, common timestamps as
+    datetime64[s], zones x timesteps matrix) on the union of all timestamps;
+    NaN where a zone has no price.
+    """
+    zones = list(series)
+    stamps = [np.asarray(ts).astype('datetime64[s]') for ts, _ in series.values()]
+    grid = np.unique(np.concatenate(stamps)) if stamps else np.array([], dtype='datetime64[s]')
+    matrix = np.full((len(zones), len(grid)), np.nan)
+    for row, (ts, (_, prices)) in enumerate(zip(stamps, series.values())):
+        matrix[row, np.searchsorted(grid, ts)] = np.asarray(prices, dtype=np.float64)
+    return zones, grid, matrix
+
+
+def _pack(values):
+    """Signed integers -> zigzag varint bytes (LEB128, 7 bits per byte)."""
+    v = np.asarray(values, dtype=np.int64).ravel()
+    zz = ((v << 1) ^ (v >> 63)).view(np.uint64)
+    n = np.ones(len(zz), dtype=np.int64)
+    rest = zz >> np.uint64(7)
+    while rest.any():
+        n += rest > 0
+        rest >>= np.uint64(7)
+    out = np.empty(int(n.sum()), dtype=np.uint8)
+    offsets = np.cumsum(n) - n
+    for k in range(int(n.max(initial=0))):
+        sel = n > k
+        byte = (zz[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (n[sel] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[sel] + k] = (byte | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def _unpack(data):
+    """Inverse of _pack (the reference for the JavaScript decoder)."""
+    b = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.r_[0, ends[:-1] + 1]
+    zz = np.zeros(len(ends), dtype=np.uint64)
+    for k in range(int((ends - starts).max(initial=-1)) + 1):
+        sel = starts + k <= ends
+        zz[sel] |= (b[starts[sel] + k] & np.uint64(0x7F)) << np.uint64(7 * k)
+    return (zz >> np.uint64(1)).astype(np.int64) ^ -(zz & np.uint64(1)).astype(np.int64)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def encode_frames(timestamps, matrix, quantum=DEFAULT_QUANTUM):
+    """
+    Compact payload for a (zones x timesteps) price matrix:
+    {'t', 'p', 'gaps', 'zones', 'steps', 'quantum'}, where t, p and gaps are
+    base64 zigzag-varint strings of delta-encoded epoch seconds, quantized
+    prices (row by row) and NaN flat indices.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+    ts = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+    missing = np.isnan(matrix)
+    q = np.round(matrix / quantum)
+    if missing.any():
+        # Carry the last price over gaps so they add no deltas; leading gaps become 0
+        idx = np.where(missing, 0, np.arange(matrix.shape[1]))
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        q = np.nan_to_num(np.take_along_axis(q, idx, axis=1))
+    q = q.astype(np.int64)
+    gaps = np.flatnonzero(missing)
+    return {
+        't': _b64(_pack(np.diff(ts, prepend=0))),
+        'p': _b64(_pack(np.diff(q, axis=1, prepend=0))),
+        'gaps': _b64(_pack(np.diff(gaps, prepend=0))),
+        'zones': matrix.shape[0],
+        'steps': matrix.shape[1],
+        'quantum': quantum,
+    }
+
+
+def decode_frames(payload):
+    """(timestamps as datetime64[s], zones x timesteps matrix) from encode_frames output."""
+    ts = np.cumsum(_unpack(base64.b64decode(payload['t'])))
+    q = np.cumsum(_unpack(base64.b64decode(payload['p'])).reshape(payload['zones'], payload['steps']), axis=1)
+    matrix = q * payload['quantum']
+    matrix.ravel()[np.cumsum(_unpack(base64.b64decode(payload['gaps'])))] = np.nan
+    return ts.astype('datetime64[s]'), matrix
+
+
+def color_domain(matrix):
+    """Color scale bounds: the 2nd-98th percentile, so a few spikes do not wash out the map."""
+    finite = matrix[np.isfinite(matrix)]
+    if not finite.size:
+        return 0.0, 1.0
+    low, high = np.percentile(finite, [2, 98])
+    return float(low), float(high if high > low else low + 1)
+
+
+class TimeSlider(MacroElement):
+    """
+    Slider, play button and time label restyling `layer` (a GeoJson of zone
+    features) per timestep. `rows` maps feature ids to rows of the encoded
+    matrix; `colors` are hex stops spread evenly over `domain`.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var data = {{ this.payload }};
+            function varints(b64) {
+                var s = atob(b64), out = new Float64Array(s.length), n = 0, v = 0, shift = 1;
+                for (var i = 0; i < s.length; i++) {
+                    var c = s.charCodeAt(i);
+                    v += (c & 127) * shift;
+                    if (c & 128) { shift *= 128; continue; }
+                    out[n++] = v % 2 ? -(v + 1) / 2 : v / 2;
+                    v = 0; shift = 1;
+                }
+                return out.subarray(0, n);
+            }
+            function cumsum(a, from, to) { for (var i = from + 1; i < to; i++) a[i] += a[i - 1]; }
+
+            var T = data.steps, times = varints(data.t), prices = varints(data.p), gaps = varints(data.gaps);
+            cumsum(times, 0, times.length);
+            for (var z = 0; z < data.zones; z++) cumsum(prices, z * T, (z + 1) * T);
+            for (var i = 0; i < prices.length; i++) prices[i] *= data.quantum;
+            for (var i = 0, g = 0; i < gaps.length; i++) { g += gaps[i]; prices[g] = NaN; }
+
+            var stops = data.colors.map(function(h) {
+                return [1, 3, 5].map(function(k) { return parseInt(h.substr(k, 2), 16); });
+            });
+            function color(p) {
+                if (isNaN(p)) return '#cccccc';
+                var x = (p - data.domain[0]) / (data.domain[1] - data.domain[0]) * (stops.length - 1);
+                x = Math.max(0, Math.min(stops.length - 1, x));
+                var k = Math.min(Math.floor(x), stops.length - 2), f = x - k;
+                return 'rgb(' + [0, 1, 2].map(function(c) {
+                    return Math.round(stops[k][c] + (stops[k + 1][c] - stops[k][c]) * f);
+                }).join(',') + ')';
+            }
+
+            var layer = {{ this.layer.get_name() }}, base = layer.options.style, step = 0;
+            function price(feature) {
+                var row = data.rows[feature.id];
+                return row === undefined ? NaN : prices[row * T + step];
+            }
+            // Through options.style, so the highlight's resetStyle restores the current step
+            layer.options.style = function(feature) {
+                return Object.assign({}, base ? base(feature) : {}, {fillColor: color(price(feature))});
+            };
+            layer.eachLayer(function(l) {
+                l.bindTooltip(function() {
+                    var p = price(l.feature);
+                    return '{{ this.zone_label }}' + l.feature.properties.name + '<br>{{ this.price_label }}'
+                        + (isNaN(p) ? '-' : p.toFixed(2));
+                });
+            });
+
+            var control = L.control({position: 'bottomleft'});
+            control.onAdd = function() {
+                var div = L.DomUtil.create('div', 'leaflet-bar');
+                div.style.cssText = 'background: white; padding: 6px 10px; font: 12px arial; color: #333333;';
+                div.innerHTML = '<button type="button" style="width: 28px;">&#9654;</button> '
+                    + '<input type="range" min="0" max="' + (T - 1) + '" value="0" style="width: 320px; vertical-align: middle;"> '
+                    + '<span></span>';
+                L.DomEvent.disableClickPropagation(div);
+                L.DomEvent.disableScrollPropagation(div);
+                return div;
+            };
+            control.addTo({{ this._parent.get_name() }});
+            var div = control.getContainer(), button = div.querySelector('button'),
+                slider = div.querySelector('input'), label = div.querySelector('span'), timer = null;
+
+            function show(t) {
+                step = t;
+                slider.value = t;
+                label.textContent = new Date(times[t] * 1000).toISOString().slice(0, 16).replace('T', ' ') + ' UTC';
+                layer.setStyle(layer.options.style);
+            }
+            slider.addEventListener('input', function() { show(+slider.value); });
+            button.addEventListener('click', function() {
+                if (timer) { clearInterval(timer); timer = null; button.innerHTML = '&#9654;'; return; }
+                button.innerHTML = '&#10074;&#10074;';
+                timer = setInterval(function() { show((step + 1) % T); }, {{ this.interval }});
+            });
+            if (T) show(0);
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, layer, payload, rows, colors, domain, interval=200,
+                 zone_label='Område: ', price_label='Pris (€/MWh): '):
+        super().__init__()
+        self._name = 'TimeSlider'
+        self.layer = layer
+        self.payload = json.dumps(dict(payload, rows=rows, colors=list(colors), domain=list(domain)),
+                                  separators=(',', ':'))
+        self.interval = int(interval)
+        self.zone_label = zone_label
+        self.price_label = price_label
@@ -0,0 +1,145 @@
+"""
+Registry of European bidding zones shared by the loaders, analytics and maps.
+
+Each zone has the short code used throughout the backend and frontend
+('SE3', 'DK1', 'IT-NO', ...), its ENTSO-E EIC code, a display name, its
+country and the ids of its features in zones.json (after geometry.zone_id,
+so 'SE-SE3' -> 'SE3'). DE-LU and the Irish SEM span two map features.
+
+BORDERS lists the interconnected zone pairs (AC and HVDC) that the market
+coupling allocates capacity on; spread analytics use them to single out
+congestion on real borders among all zone pairs.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+Zone = namedtuple('Zone', ['code', 'eic', 'name', 'country', 'geometry_ids'])
+
+_ZONES = (
+    # Nordics
+    Zone('SE1', '10Y1001A1001A44P', 'Luleå / SE1', 'SE', ('SE1',)),
+    Zone('SE2', '10Y1001A1001A45N', 'Sundsvall / SE2', 'SE', ('SE2',)),
+    Zone('SE3', '10Y1001A1001A46L', 'Stockholm / SE3', 'SE', ('SE3',)),
+    Zone('SE4', '10Y1001A1001A47J', 'Malmö / SE4', 'SE', ('SE4',)),
+    Zone('NO1', '10YNO-1--------2', 'Oslo / NO1', 'NO', ('NO1',)),
+    Zone('NO2', '10YNO-2--------T', 'Kristiansand / NO2', 'NO', ('NO2',)),
+    Zone('NO3', '10YNO-3--------J', 'Trondheim / NO3', 'NO', ('NO3',)),
+    Zone('NO4', '10YNO-4--------9', 'Tromsø / NO4', 'NO', ('NO4',)),
+    Zone('NO5', '10Y1001A1001A48H', 'Bergen / NO5', 'NO', ('NO5',)),
+    Zone('FI', '10YFI-1--------U', 'Finland', 'FI', ('FI',)),
+    Zone('DK1', '10YDK-1--------W', 'West Denmark / DK1', 'DK', ('DK1',)),
+    Zone('DK2', '10YDK-2--------M', 'East Denmark / DK2', 'DK', ('DK2',)),
+    # Baltics
+    Zone('EE', '10Y1001A1001A39I', 'Estonia', 'EE', ('EE',)),
+    Zone('LV', '10YLV-1001A00074', 'Latvia', 'LV', ('LV',)),
+    Zone('LT', '10YLT-1001A0008Q', 'Lithuania', 'LT', ('LT',)),
+    # Central Western Europe
+    Zone('DE', '10Y1001A1001A82H', 'Germany-Luxembourg', 'DE', ('DE', 'LU')),
+    Zone('NL', '10YNL----------L', 'Netherlands', 'NL', ('NL',)),
+    Zone('BE', '10YBE----------2', 'Belgium', 'BE', ('BE',)),
+    Zone('FR', '10YFR-RTE------C', 'France', 'FR', ('FR',)),
+    Zone('AT', '10YAT-APG------L', 'Austria', 'AT', ('AT',)),
+    Zone('CH', '10YCH-SWISSGRIDZ', 'Switzerland', 'CH', ('CH',)),
+    # Central Eastern Europe
+    Zone('PL', '10YPL-AREA-----S', 'Poland', 'PL', ('PL',)),
+    Zone('CZ', '10YCZ-CEPS-----N', 'Czechia', 'CZ', ('CZ',)),
+    Zone('SK', '10YSK-SEPS-----K', 'Slovakia', 'SK', ('SK',)),
+    Zone('HU', '10YHU-MAVIR----U', 'Hungary', 'HU', ('HU',)),
+    Zone('SI', '10YSI-ELES-----O', 'Slovenia', 'SI', ('SI',)),
+    Zone('HR', '10YHR-HEP------M', 'Croatia', 'HR', ('HR',)),
+    Zone('RO', '10YRO-TEL------P', 'Romania', 'RO', ('RO',)),
+    Zone('BG', '10YCA-BULGARIA-R', 'Bulgaria', 'BG', ('BG',)),
+    # Iberia
+    Zone('ES', '10YES-REE------0', 'Spain', 'ES', ('ES',)),
+    Zone('PT', '10YPT-REN------W', 'Portugal', 'PT', ('PT',)),
+    # Italy
+    Zone('IT-NO', '10Y1001A1001A73I', 'Italy North', 'IT', ('IT-NO',)),
+    Zone('IT-CNO', '10YDOM-1001A0307', 'Italy Centre-North', 'IT', ('IT-CNO',)),
+    Zone('IT-CSO', '10YDOM-1001A0308', 'Italy Centre-South', 'IT', ('IT-CSO',)),
+    Zone('IT-SO', '10YDOM-1001A0309', 'Italy South', 'IT', ('IT-SO',)),
+    Zone('IT-SIC', '10YDOM-1001A0170', 'Italy Sicily', 'IT', ('IT-SIC',)),
+    Zone('IT-SAR', '10YDOM-1001A0158', 'Italy Sardinia', 'IT', ('IT-SAR',)),
+    # South East Europe
+    Zone('GR', '10YGR-HTSO-----Y', 'Greece', 'GR', ('GR',)),
+    Zone('RS', '10YCS-SERBIATSOV', 'Serbia', 'RS', ('RS',)),
+    Zone('BA', '10YBA-JPCC-----D', 'Bosnia and Herzegovina', 'BA', ('BA',)),
+    Zone('ME', '10YCS-CG-TSO---S', 'Montenegro', 'ME', ('ME',)),
+    Zone('MK', '10YMK-MEPSO----8', 'North Macedonia', 'MK', ('MK',)),
+    Zone('AL', '10YAL-KESH-----5', 'Albania', 'AL', ('AL',)),
+    # British Isles
+    Zone('GB', '10YGB----------A', 'Great Britain', 'GB', ('GB',)),
+    Zone('IE', '10Y1001A1001A59C', 'Ireland (SEM)', 'IE', ('IE', 'GB-NIR')),
+)
+
+ZONES = {z.code: z for z in _ZONES}
+
+# The zones the backend fetches by default
+DEFAULT_ZONES = ('SE1', 'SE2', 'SE3', 'SE4')
+
+BORDERS = (
+    ('SE1', 'SE2'), ('SE1', 'FI'), ('SE1', 'NO4'), ('SE2', 'SE3'), ('SE2', 'NO3'), ('SE2', 'NO4'),
+    ('SE3', 'SE4'), ('SE3', 'NO1'), ('SE3', 'DK1'), ('SE3', 'FI'), ('SE4', 'DK2'), ('SE4', 'DE'),
+    ('SE4', 'PL'), ('SE4', 'LT'),
+    ('NO1', 'NO2'), ('NO1', 'NO3'), ('NO1', 'NO5'), ('NO2', 'NO5'), ('NO3', 'NO4'), ('NO3', 'NO5'),
+    ('NO2', 'DK1'), ('NO2', 'NL'), ('NO2', 'DE'), ('NO2', 'GB'), ('NO4', 'FI'),
+    ('FI', 'EE'), ('DK1', 'DK2'), ('DK1', 'DE'), ('DK1', 'NL'), ('DK1', 'GB'), ('DK2', 'DE'),
+    ('EE', 'LV'), ('LV', 'LT'), ('LT', 'PL'),
+    ('DE', 'NL'), ('DE', 'BE'), ('DE', 'FR'), ('DE', 'AT'), ('DE', 'CH'), ('DE', 'CZ'), ('DE', 'PL'),
+    ('NL', 'BE'), ('NL', 'GB'), ('BE', 'FR'), ('BE', 'GB'), ('FR', 'CH'), ('FR', 'ES'), ('FR', 'GB'),
+    ('FR', 'IT-NO'), ('ES', 'PT'),
+    ('AT', 'CH'), ('AT', 'CZ'), ('AT', 'HU'), ('AT', 'SI'), ('AT', 'IT-NO'), ('CH', 'IT-NO'),
+    ('CZ', 'SK'), ('CZ', 'PL'), ('SK', 'PL'), ('SK', 'HU'),
+    ('HU', 'RO'), ('HU', 'HR'), ('HU', 'RS'), ('HU', 'SI'),
+    ('IT-NO', 'IT-CNO'), ('IT-CNO', 'IT-CSO'), ('IT-CNO', 'IT-SAR'), ('IT-CSO', 'IT-SO'),
+    ('IT-CSO', 'IT-SAR'), ('IT-SO', 'IT-SIC'), ('IT-SO', 'GR'), ('IT-NO', 'SI'), ('IT-CSO', 'ME'),
+    ('SI', 'HR'), ('HR', 'RS'), ('HR', 'BA'), ('BA', 'RS'), ('BA', 'ME'), ('RS', 'ME'), ('RS', 'MK'),
+    ('RS', 'RO'), ('RS', 'BG'), ('RS', 'AL'), ('ME', 'AL'), ('MK', 'GR'), ('MK', 'BG'), ('AL', 'GR'),
+    ('GR', 'BG'), ('RO', 'BG'),
+    ('GB', 'IE'),
+)
+
+_BY_EIC = {z.eic: z for z in _ZONES}
+_BY_GEOMETRY = {gid: z for z in _ZONES for gid in z.geometry_ids}
+
+
+def get(key):
+    """
+    Zone for a code ('SE3'), an EIC code ('10Y1001A1001A46L') or a map
+    feature name ('SE-SE3', 'LU'). Raises KeyError for unknown zones.
+    """
+    zone = ZONES.get(key) or _BY_EIC.get(key) or _BY_GEOMETRY.get(key)
+    if zone is None:
+        country, _, rest = key.partition('-')
+        zone = _BY_GEOMETRY.get(rest) if rest.startswith(country) else None
+    if zone is None:
+        raise KeyError(f"Unknown bidding zone: {key}")
+    return zone
+
+
+def eic_codes(codes=None):
+    """{code: EIC} for the given zone codes (default every registered zone)."""
+    return {code: ZONES[code].eic for code in (ZONES if codes is None else codes)}
+
+
+def geometry_ids(codes):
+    """Map feature ids covering the given zones, e.g. for geometry.load_zone_geometry."""
+    return [gid for code in codes for gid in ZONES[code].geometry_ids]
+
+
+def neighbours(code):
+    return [b if a == code else a for a, b in BORDERS if code in (a, b)]
+
+
+def border_index(codes):
+    """
+    (i, j) index arrays of the BORDERS between zones in `codes`, with i < j
+    in the order of `codes`; the selection for zones x zones matrices.
+    """
+    position = {code: k for k, code in enumerate(codes)}
+    pairs = sorted(tuple(sorted((position[a], position[b]))) for a, b in BORDERS
+                   if a in position and b in position)
+    if not pairs:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    i, j = np.array(pairs, dtype=np.intp).T
+    return i, j